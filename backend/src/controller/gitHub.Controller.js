@@ -478,7 +478,7 @@ export const githubWebhookController = async (req, res) => {
         })
       }
 
-      const result = await handlePush(payload);
+      const result = await handlePush(payload, { deliveryId });
       return res.status(200).json(result);
     }
     if (event === "pull_request") {
@@ -585,7 +585,7 @@ export const retryWebhookDelivery = async (req, res) => {
     const jobName = eventToJobName(evt.event);
     await webhookQueue.add(
       jobName,
-      { event: evt.event, payload: evt.payload },
+      { event: evt.event, payload: evt.payload, deliveryId },
       { jobId: deliveryId }
     );
     await WebhookEvent.update(
@@ -4,7 +4,8 @@ import { RepoPushEvent } from "../../database/models/repoAnalytics.js";
 import { processPushAnalysis, processPushScan } from "../push.Service.js";
 
 
-export async function handlePush(payload) {
+// deliveryId is the webhook's X-GitHub-Delivery; the analysis service drops redeliveries by it
+export async function handlePush(payload, { deliveryId = null } = {}) {
   try {
     const repo = payload.repository?.full_name;
     const repoId = payload.repository?.id;
@@ -147,7 +148,7 @@ export async function handlePush(payload) {
     const scanJobId = `scan-${repoId}-${headCommit?.id || Date.now()}`;
     const safeScanJobId = scanJobId.replace(/[^\w.-]/g, "_");
 
-    const ScanJobData = { repoId, repo, installationId, commitSha, branch, added: addedArray, modified: modifiedArray };
+    const ScanJobData = { repoId, repo, installationId, commitSha, branch, deliveryId, added: addedArray, modified: modifiedArray };
 
     try {
       const scanResult = await processPushScan(ScanJobData);
@@ -159,7 +160,7 @@ export async function handlePush(payload) {
 
     console.log("[pushScan] enqueue request", { ScanJobData });
 
-    const jobData = { repo, repoId, branch, headCommit, installationId, commits, pusher };
+    const jobData = { repo, repoId, branch, headCommit, before: payload.before ?? null, deliveryId, installationId, commits, pusher };
 
     console.log("[push] enqueue request", { repo, repoId, branch, headSha: headCommit?.id, installationId });
 
@@ -8,7 +8,7 @@ const DEADLINE_MS = Number(process.env.ANALYSIS_DEADLINE_MS || 15 * 60 * 1000);
 export async function processPushScan(data) {
   console.log("[PushScan] Processing scan request", { repoId: data.repoId, commitSha: data.commitSha });
 
-  const { repoId, added, modified, commitSha, repo, installationId, branch } = data;
+  const { repoId, added, modified, commitSha, repo, installationId, branch, deliveryId } = data;
 
   if (!added || !modified || !repoId || !commitSha || !repo || !installationId || !branch) {
     throw new Error("Invalid scan data, required fields are missing");
@@ -23,6 +23,7 @@ export async function processPushScan(data) {
     repoName: repo,
     commitSha,
     branch,
+    deliveryId: deliveryId ?? null,
     filesAdded: Array.isArray(added) ? added : Array.from(added),
     filesModified: Array.isArray(modified) ? modified : Array.from(modified),
   };
@@ -75,7 +76,7 @@ export async function processPushScan(data) {
 export async function processPushAnalysis(data) {
   console.log("[push] Processing analysis", { repoId: data.repoId });
 
-  const { repo, repoId, branch, headCommit, installationId, commits, pusher } = data;
+  const { repo, repoId, branch, headCommit, before, deliveryId, installationId, commits, pusher } = data;
   
   if (!repo || !branch || !installationId) {
     throw new Error(`Invalid job data: repo=${repo} branch=${branch} installationId=${installationId}`);
@@ -90,12 +91,15 @@ export async function processPushAnalysis(data) {
     installationId,
     branch,
     headCommitSha: headCommit?.id ?? headCommit?.sha ?? null,
+    beforeSha: before ?? null,
+    deliveryId: deliveryId ?? null,
     pushedBy: pusher,
     commitCount: Array.isArray(commits) ? commits.length : 0,
     commits: (commits || []).map(c => ({
       id: c.id,
       message: c.message,
       author: c.author?.username || c.author?.name,
+      authorLogin: c.author?.username ?? null,
       added: c.added,
       removed: c.removed,
       modified: c.modified,
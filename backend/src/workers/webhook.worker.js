@@ -6,13 +6,13 @@ import { handleIssues } from '../services/handlers/issues.handler.js';
 import { connection } from '../lib/redis.js';
 
 export const worker = new Worker('webhooks', async job => {
-  const { event, payload } = job.data;
+  const { event, payload, deliveryId } = job.data;
 
   switch (job.name) {
     case 'installation.lifecycle':
       return handleInstallationLifecycle(payload);
     case 'repo.push':
-      return handlePush(payload);
+      return handlePush(payload, { deliveryId: deliveryId ?? job.id });
     case 'repo.pull_request':
       return handlePullRequest(payload);
     case 'repo.issues':
@@ -16,7 +16,7 @@ async def analyze_refactoring_opportunities(files_data: List[RefactorPriorityFil
         return []
     
     prompt = build_refactoring_prompt(files_data, metrics)
-    llm_response = await call_llm_claude(prompt, max_tokens=6000)
+    llm_response = await call_llm_claude(prompt, max_tokens=6000, insight="refactoring")
     parsed = await parse_llm_response(llm_response)
     
     return parsed.get("refactoringSuggestions", [])
@@ -27,7 +27,7 @@ async def detect_code_smells(files_data: List[RefactorPriorityFile], health_scor
         return {"codeSmells": [], "overallCodeHealth": "No files to analyze"}
     
     prompt = build_code_smell_prompt(files_data, health_score)
-    llm_response = await call_llm_claude(prompt, max_tokens=5000)
+    llm_response = await call_llm_claude(prompt, max_tokens=5000, insight="code_smell")
     parsed = await parse_llm_response(llm_response)
     
     return {
@@ -42,7 +42,7 @@ async def generate_architectural_recommendations(
 ) -> Dict[str, Any]:
     
     prompt = build_architectural_prompt(metrics, health_score, commit_analysis)
-    llm_response = await call_llm_claude(prompt, max_tokens=7000)
+    llm_response = await call_llm_claude(prompt, max_tokens=7000, insight="architectural")
     parsed = await parse_llm_response(llm_response)
     
     return {
@@ -57,7 +57,7 @@ async def generate_quick_wins(files_data: List[RefactorPriorityFile], metrics: R
         return {"quickWins": [], "totalEstimatedTime": "0 hours", "expectedImpact": "No files to analyze"}
     
     prompt = build_quick_wins_prompt(files_data, metrics)
-    llm_response = await call_llm_claude(prompt, max_tokens=5000)
+    llm_response = await call_llm_claude(prompt, max_tokens=5000, insight="quick_wins")
     parsed = await parse_llm_response(llm_response)
     
     return {
@@ -145,7 +145,7 @@ Format as JSON:
 }}
 """
     
-    llm_response = await call_llm_claude2(prompt, max_tokens=6000)
+    llm_response = await call_llm_claude2(prompt, max_tokens=6000, insight="overall_assessment")
     parsed = await parse_llm_response(llm_response)
     
     return {
@@ -0,0 +1,14 @@
+import hmac
+
+from fastapi import Header, HTTPException
+
+from app.core.config import settings
+
+
+def require_admin(authorization: str | None = Header(None)) -> None:
+    """Bearer ADMIN_TOKEN; without a configured token the admin endpoints don't exist"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), settings.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Admin token required")
@@ -5,6 +5,70 @@ from pydantic import Field, ConfigDict
 class Settings(BaseSettings):
     PORT: int = Field(...,env="PORT")
     EXPRESS_URL: str = Field(..., env="EXPRESS_URL")
+    CHECKPOINT_DIR: str = Field(".codehealth/checkpoints", env="CHECKPOINT_DIR")
+    SCHEDULER_MAX_CONCURRENCY: int = Field(4, env="SCHEDULER_MAX_CONCURRENCY")
+    SCHEDULER_BACKGROUND_LIMIT: int = Field(2, env="SCHEDULER_BACKGROUND_LIMIT")
+    PUSH_DEBOUNCE_SECONDS: float = Field(2.0, env="PUSH_DEBOUNCE_SECONDS")  # quiet time before a repo/branch is analyzed
+    PUSH_DEBOUNCE_MAX_SECONDS: float = Field(5.0, env="PUSH_DEBOUNCE_MAX_SECONDS")  # longest a push waits; Express gives pushScan 10s
+    PUSH_DEDUPE_SECONDS: float = Field(600.0, env="PUSH_DEDUPE_SECONDS")  # how long a delivery's result is remembered
+    PUSH_DEDUPE_ENTRIES: int = Field(10000, env="PUSH_DEDUPE_ENTRIES")
+    PUSH_SCAN_BATCH_MAX_PUSHES: int = Field(100, env="PUSH_SCAN_BATCH_MAX_PUSHES")  # larger /pushScan/batch requests get a 413
+    GITHUB_API_URL: str = Field("https://api.github.com/", env="GITHUB_API_URL")
+    GITHUB_MAX_CONCURRENCY: int = Field(8, env="GITHUB_MAX_CONCURRENCY")
+    GITHUB_MAX_RETRIES: int = Field(3, env="GITHUB_MAX_RETRIES")
+    GITHUB_BACKGROUND_RESERVE: float = Field(0.2, env="GITHUB_BACKGROUND_RESERVE")
+    GITHUB_PACE_THRESHOLD: float = Field(0.5, env="GITHUB_PACE_THRESHOLD")
+    GITHUB_CACHE_DIR: str = Field(".codehealth/github-cache", env="GITHUB_CACHE_DIR")
+    GITHUB_CACHE_MEMORY_ENTRIES: int = Field(2000, env="GITHUB_CACHE_MEMORY_ENTRIES")
+    GITHUB_CACHE_MEMORY_BYTES: int = Field(64 * 1024 * 1024, env="GITHUB_CACHE_MEMORY_BYTES")
+    GITHUB_CACHE_DISK_BYTES: int = Field(1024 * 1024 * 1024, env="GITHUB_CACHE_DISK_BYTES")
+    GITHUB_CACHE_MAX_AGE_DAYS: float = Field(30.0, env="GITHUB_CACHE_MAX_AGE_DAYS")  # unused entries are dropped after this
+    COMPARE_CACHE_PATH: str = Field(".codehealth/compare-cache.sqlite3", env="COMPARE_CACHE_PATH")  # empty = memory only
+    COMPARE_CACHE_MEMORY_ENTRIES: int = Field(256, env="COMPARE_CACHE_MEMORY_ENTRIES")
+    GITHUB_USE_GRAPHQL: bool = Field(True, env="GITHUB_USE_GRAPHQL")
+    GIT_MIRROR_ENABLED: bool = Field(False, env="GIT_MIRROR_ENABLED")  # read trees, blobs, history and diffs from local clones
+    GIT_MIRROR_DIR: str = Field(".codehealth/mirrors", env="GIT_MIRROR_DIR")
+    GIT_MIRROR_REMOTE: str = Field("https://github.com/{owner}/{repo}.git", env="GIT_MIRROR_REMOTE")
+    GIT_MIRROR_FETCH_INTERVAL: float = Field(30.0, env="GIT_MIRROR_FETCH_INTERVAL")  # seconds between fetches of one repo
+    EXPRESS_COMPRESSION: str = Field("gzip", env="EXPRESS_COMPRESSION")  # gzip | identity
+    EXPRESS_GZIP_LEVEL: int = Field(5, env="EXPRESS_GZIP_LEVEL")
+    EXPRESS_COMPRESS_MIN_BYTES: int = Field(1024, env="EXPRESS_COMPRESS_MIN_BYTES")
+    EXPRESS_MAX_BODY_BYTES: int = Field(8 * 1024 * 1024, env="EXPRESS_MAX_BODY_BYTES")
+    EXPRESS_MAX_IN_FLIGHT: int = Field(2, env="EXPRESS_MAX_IN_FLIGHT")
+    ANALYSIS_WORKERS: int = Field(0, env="ANALYSIS_WORKERS")  # 0 = one per CPU
+    JS_ANALYSIS_IN_PROCESS: bool = Field(True, env="JS_ANALYSIS_IN_PROCESS")
+    ANALYSIS_MAX_FILE_BYTES: int = Field(1_000_000, env="ANALYSIS_MAX_FILE_BYTES")  # larger files get raw counts only
+    ANALYSIS_MAX_LINES: int = Field(30_000, env="ANALYSIS_MAX_LINES")
+    ANALYSIS_MAX_LINE_LENGTH: int = Field(2000, env="ANALYSIS_MAX_LINE_LENGTH")  # longer lines mean minified code
+    ANALYSIS_DETECT_GENERATED: bool = Field(True, env="ANALYSIS_DETECT_GENERATED")
+    ANALYSIS_CPU_TIMEOUT_SECONDS: float = Field(20.0, env="ANALYSIS_CPU_TIMEOUT_SECONDS")  # per file; 0 = no limit
+    BLOB_STORE_DIR: str = Field(".codehealth/blobs", env="BLOB_STORE_DIR")  # empty = keep file contents in memory
+    BLOCK_METRICS_PATH: str = Field(".codehealth/block-metrics.sqlite3", env="BLOCK_METRICS_PATH")
+    BLOCK_METRICS_MEMORY_ENTRIES: int = Field(20000, env="BLOCK_METRICS_MEMORY_ENTRIES")
+    BLOCK_METRICS_MAX_BYTES: int = Field(256 * 1024 * 1024, env="BLOCK_METRICS_MAX_BYTES")  # stored records, least recently used go first
+    BLOCK_METRICS_MAX_AGE_DAYS: float = Field(30.0, env="BLOCK_METRICS_MAX_AGE_DAYS")  # unused chunks are dropped after this
+    PR_ANALYSIS_CACHE_ENTRIES: int = Field(5000, env="PR_ANALYSIS_CACHE_ENTRIES")
+    PR_PATCH_INLINE_BYTES: int = Field(64 * 1024, env="PR_PATCH_INLINE_BYTES")
+    PATH_RULES_DIR: str = Field(".codehealth/path-rules", env="PATH_RULES_DIR")
+    REVIEWER_HISTORY_PATH: str = Field(".codehealth/reviewer-history.sqlite3", env="REVIEWER_HISTORY_PATH")  # empty = memory only
+    REVIEWER_HISTORY_FILES: int = Field(20000, env="REVIEWER_HISTORY_FILES")  # per repository
+    REVIEWER_HISTORY_PER_FILE: int = Field(20, env="REVIEWER_HISTORY_PER_FILE")
+    MAX_RECOMMENDED_REVIEWERS: int = Field(5, env="MAX_RECOMMENDED_REVIEWERS")
+    TRACING_EXPORTER: str = Field("none", env="TRACING_EXPORTER")  # none | otlp | file | console
+    TRACING_FILE: str = Field(".codehealth/traces.jsonl", env="TRACING_FILE")
+    TRACING_SAMPLE_RATIO: float = Field(1.0, env="TRACING_SAMPLE_RATIO")
+    TRACING_QUEUE_SIZE: int = Field(20000, env="TRACING_QUEUE_SIZE")
+    ADMIN_TOKEN: str = Field("", env="ADMIN_TOKEN")  # empty = admin endpoints disabled
+    PROFILE_SAMPLE_INTERVAL_MS: float = Field(10.0, env="PROFILE_SAMPLE_INTERVAL_MS")
+    PROFILE_SLOW_SECONDS: float = Field(0.0, env="PROFILE_SLOW_SECONDS")  # 0 = don't auto-capture
+    PROFILE_MAX_WINDOW_SECONDS: float = Field(600.0, env="PROFILE_MAX_WINDOW_SECONDS")
+    PROFILE_KEEP: int = Field(20, env="PROFILE_KEEP")
+    PROFILE_TRACEMALLOC_FRAMES: int = Field(25, env="PROFILE_TRACEMALLOC_FRAMES")
+    BATCH_INITIAL_FILES: int = Field(50, env="BATCH_INITIAL_FILES")
+    BATCH_MIN_FILES: int = Field(10, env="BATCH_MIN_FILES")
+    BATCH_MAX_FILES: int = Field(500, env="BATCH_MAX_FILES")
+    BATCH_TARGET_BYTES: int = Field(2 * 1024 * 1024, env="BATCH_TARGET_BYTES")  # bytes sent to Express per batch
+    BATCH_TARGET_SECONDS: float = Field(2.0, env="BATCH_TARGET_SECONDS")
     model_config = ConfigDict(
         extra="ignore",  
         env_file=".env",   
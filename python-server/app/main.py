@@ -1,7 +1,9 @@
 from fastapi import FastAPI
 from app.core.cors import setup_cors
 from app.core.config import settings
-from app.routers import health, analyze, llmInsights, scan
+from app.routers import health, analyze, llmInsights, scan, admin
+from app.services import analysis_pool
+from app.services.tracing import setup_tracing, shutdown_tracing
 
 app = FastAPI(title="CodeHealth AI Python API", version="0.1.0")
 setup_cors(app, settings.ALLOWED_ORIGINS)
@@ -10,6 +12,19 @@ app.include_router(health.router)
 app.include_router(analyze.router)
 app.include_router(llmInsights.router)
 app.include_router(scan.router)
+app.include_router(admin.router)
+
+@app.on_event("startup")
+def start_tracing():
+    setup_tracing()
+
+@app.on_event("shutdown")
+def stop_analysis_pool():
+    analysis_pool.shutdown()
+
+@app.on_event("shutdown")
+def flush_traces():
+    shutdown_tracing()
 
 @app.get("/")
 def root():
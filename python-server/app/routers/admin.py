@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app.core.admin import require_admin
+from app.schemas.profiling import ProfileJobRequest, ProfileWindowRequest
+from app.services import profiling
+
+router = APIRouter(prefix="/admin/profiling", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("")
+async def list_profiles():
+    return {"profiles": profiling.list_profiles()}
+
+
+@router.post("/start")
+async def start_window(payload: ProfileWindowRequest):
+    return profiling.start_window(payload.seconds, payload.memory).summary()
+
+
+@router.post("/jobs/{job_id}")
+async def arm_job(job_id: str, payload: ProfileJobRequest):
+    """Profile the next run of a repository (by repoId) or of a resumable run (by run ID)"""
+    return profiling.arm_job(job_id, payload.memory).summary()
+
+
+@router.post("/{profile_id}/stop")
+async def stop(profile_id: str):
+    profile = profiling.stop(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Unknown profile")
+    return profile.summary()
+
+
+@router.get("/{profile_id}/{kind}")
+async def download(profile_id: str, kind: str):
+    """Collapsed stacks (cpu: samples, memory: bytes) for flamegraph.pl, speedscope or inferno"""
+    profile = profiling.get(profile_id)
+    if profile is None or kind not in ("cpu", "memory"):
+        raise HTTPException(status_code=404, detail="Unknown profile")
+    body = profile.folded(kind)
+    if body is None:
+        raise HTTPException(status_code=404, detail=f"No {kind} profile was collected")
+    return PlainTextResponse(
+        body, headers={"Content-Disposition": f'attachment; filename="{profile.id}-{kind}.folded"'}
+    )
@@ -1,27 +1,39 @@
 from fastapi import APIRouter
 from app.schemas.push_analyze import PushAnalyzeRequest, PushAnalyzeResponse
-from app.services.analyze_service import push_analyze_repo
+from app.services.analyze_service import push_analyze_repo, merge_push_analyses
 from app.schemas.pull_analyze import PullAnalyzeRequest, PullAnalyzeResponse
 from app.services.analyze_service import pull_analyze_repo
 from app.services.analyze_service import full_repo_analysis
 from app.schemas.fullrepo_analyze import FullRepoAnalysisRequest, FullRepoAnalysisResponse
+from app.services.scheduler import scheduler, Priority
+from app.services.coalescer import push_events
+import uuid
 
 router = APIRouter(prefix="/v1", tags=["analyze"])
 
 @router.post("/internal/analysis/run", response_model=PushAnalyzeResponse)
 async def analyze(payload: PushAnalyzeRequest) -> PushAnalyzeResponse:
-    result = await push_analyze_repo(payload)  
+    async def run(merged: PushAnalyzeRequest) -> PushAnalyzeResponse:
+        async with scheduler.slot(Priority.PUSH, merged.installationId):
+            return await push_analyze_repo(merged)
+
+    # Pushes to one branch in quick succession are scored once, at the latest head
+    event_id = payload.deliveryId or payload.headCommitSha or uuid.uuid4().hex
+    result = await push_events.submit("analysis", (payload.repoId, payload.branch), event_id, payload,
+                                      merge_push_analyses, run)
     print(result)
     return result
 
 @router.post("/internal/analysis/pr",response_model=PullAnalyzeResponse)
 async def analyze(payload: PullAnalyzeRequest) -> PullAnalyzeResponse:
-    result = await pull_analyze_repo(payload)
+    async with scheduler.slot(Priority.PR, payload.installationId):
+        result = await pull_analyze_repo(payload)
     return result
 
 @router.post("/internal/analysis/full-repo")
 async def analyze(payload: FullRepoAnalysisRequest):
-    await full_repo_analysis(payload)
+    async with scheduler.slot(Priority.FULL_REPO, payload.installationId):
+        await full_repo_analysis(payload)
 
 # @router.post("/internal/analysis/issue")
 # async def analyze():
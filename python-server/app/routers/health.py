@@ -1,7 +1,20 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
+from app.services.github_governor import quota_snapshot
+from app.services.github_cache import github_cache
+from app.services.compare_cache import compare_cache
+from app.services import metrics
 
 router = APIRouter(prefix="", tags=["health"])
 
 @router.get("/health")
 def health():
     return {"status": "ok"}
+
+@router.get("/health/github-quota")
+def github_quota():
+    return {"installations": quota_snapshot(), "conditionalCache": github_cache.stats(), "compareCache": compare_cache.stats()}
+
+@router.get("/metrics")
+def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
@@ -203,7 +203,7 @@ User Query:
 Provide a detailed analysis based on the context and query above. Format your response as JSON if possible.
 """
         
-        llm_response = await call_llm_claude(full_prompt, max_tokens)
+        llm_response = await call_llm_claude(full_prompt, max_tokens, insight="custom_query")
         parsed = await parse_llm_response(llm_response)
         
         return {
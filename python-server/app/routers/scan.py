@@ -1,15 +1,72 @@
 from fastapi import APIRouter, HTTPException
-from app.schemas.pushScan_model import PushScanResponse, PushScanPayload
-from app.services.pushScan_service import ScanFiles
+from app.schemas.pushScan_model import PushScanResponse, PushScanPayload, PushScanBatchPayload, PushScanBatchResponse
+from app.services.pushScan_service import ScanFiles, ScanFilesBatch, merge_push_scans
+from app.services.scheduler import scheduler, Priority
+from app.services.coalescer import push_events
+from app.core.config import settings
+import asyncio
 
 router = APIRouter(prefix="/v3", tags=["scan"])
 
 @router.post("/internal/pushScan/run", response_model=PushScanResponse)
 async def scan(payload:PushScanPayload)->PushScanResponse:
+    async def run(merged: PushScanPayload) -> PushScanResponse:
+        async with scheduler.slot(Priority.PUSH, merged.installationId):
+            return await ScanFiles(merged)
+
     try:
-        result = await ScanFiles(payload)
+        # Overlapping pushes to one branch are merged and their files scanned once
+        result = await push_events.submit("pushScan", (payload.repoId, payload.branch),
+                                          payload.deliveryId or payload.commitSha, payload, merge_push_scans, run)
         print(result)
         return result
     except Exception as e:
         print(f"Error in scan endpoint: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/internal/pushScan/batch", response_model=PushScanBatchResponse)
+async def scan_batch(payload: PushScanBatchPayload) -> PushScanBatchResponse:
+    if len(payload.pushes) > settings.PUSH_SCAN_BATCH_MAX_PUSHES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch has {len(payload.pushes)} pushes; send at most {settings.PUSH_SCAN_BATCH_MAX_PUSHES} per request",
+        )
+
+    try:
+        # Pushes already scanned or pending through /pushScan/run (or an earlier batch) are not scanned again
+        event_ids = [p.deliveryId or p.commitSha for p in payload.pushes]
+        earlier = [push_events.seen("pushScan", (p.repoId, p.branch), event_id)
+                   for p, event_id in zip(payload.pushes, event_ids)]
+        fresh = [p for p, seen in zip(payload.pushes, earlier) if seen is None]
+
+        scanned, files_scanned = iter([]), 0
+        if fresh:
+            # The batch spans installations, so it takes one PUSH slot as a tenant of its own
+            async with scheduler.slot(Priority.PUSH, "batch"):
+                result = await ScanFilesBatch(fresh)
+            scanned, files_scanned = iter(result.results), result.filesScanned
+
+        results = []
+        for p, event_id, seen in zip(payload.pushes, event_ids, earlier):
+            if seen is None:
+                response = next(scanned)
+                # Failures aren't remembered, so a redelivery retries them
+                if response.ok:
+                    push_events.record("pushScan", (p.repoId, p.branch), [event_id], response)
+            else:
+                try:
+                    response = await asyncio.shield(seen)
+                except Exception as e:
+                    response = PushScanResponse(ok=False, filesScanned=0, message=f"Error: {str(e)}")
+            results.append(response)
+
+        result = PushScanBatchResponse(
+            ok=all(r.ok for r in results),
+            filesScanned=files_scanned,
+            results=results,
+        )
+        print(f"Scanned {len(fresh)} of {len(payload.pushes)} pushes: {result.filesScanned} files, ok={result.ok}")
+        return result
+    except Exception as e:
+        print(f"Error in scan batch endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -10,6 +10,7 @@ class FullRepoAnalysisRequest(BaseModel):
     installationId:str
     requestedBy:str
     requestedAt:str
+    resume:bool = True
 
     model_config = ConfigDict(extra="ignore")
 
@@ -45,6 +46,10 @@ class StaticAnalysisResponse(BaseModel):
     cyclomatic: List[Cyclomatic]
     halstead: Halstead
     maintainability: Maintainability
+    # "degraded": only line counts were measured, see degradedReason
+    # (oversized | generated | minified | timeout); complexity fields are zero
+    analysisMode: str = "full"
+    degradedReason: Optional[str] = None
 
 class FullRepoAnalysisResponse(BaseModel):
     ok: bool
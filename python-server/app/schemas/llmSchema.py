@@ -7,6 +7,7 @@ class LLMSettings(BaseSettings):
     together_api_key: str = Field(..., env="TOGETHER_API_KEY")
     gemini_api_key: str = Field(..., env="GEMINI_API_KEY")
     gemini_api_key2: str = Field(..., env="GEMINI_API_KEY2")
+    gemini_api_base: str = Field("https://generativelanguage.googleapis.com", env="GEMINI_API_BASE")
     
     class Config:
         env_file = ".env"
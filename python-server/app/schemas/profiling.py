@@ -0,0 +1,11 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class ProfileWindowRequest(BaseModel):
+    seconds: Optional[float] = Field(None, gt=0)  # None = until stopped (capped by PROFILE_MAX_WINDOW_SECONDS)
+    memory: bool = False
+
+
+class ProfileJobRequest(BaseModel):
+    memory: bool = False
@@ -48,6 +48,25 @@ class Suggestion(BaseModel):
     model_config = ConfigDict(extra="ignore")
 
 
+class FunctionComplexityDelta(BaseModel):
+    path: str
+    name: str
+    before: Optional[int] = None
+    after: Optional[int] = None
+    delta: int
+
+    model_config = ConfigDict(extra="ignore")
+
+
+class FileMaintainabilityDelta(BaseModel):
+    path: str
+    before: Optional[float] = None
+    after: Optional[float] = None
+    delta: float
+
+    model_config = ConfigDict(extra="ignore")
+
+
 class AnalysisMetrics(BaseModel):
     """Detailed metrics for PR analysis"""
     riskScore: float = Field(..., ge=0.0, le=100.0)
@@ -64,6 +83,8 @@ class AnalysisMetrics(BaseModel):
     fileExtensions: List[str] = Field(default_factory=list)
     missingTests: bool = False
     missingDocs: bool = False
+    functionDeltas: List[FunctionComplexityDelta] = Field(default_factory=list)
+    fileDeltas: List[FileMaintainabilityDelta] = Field(default_factory=list)
     
     model_config = ConfigDict(extra="ignore")
 
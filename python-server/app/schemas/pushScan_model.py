@@ -7,6 +7,7 @@ class PushScanPayload(BaseModel):
     commitSha: str
     installationId: int
     branch: Optional[str] = Field(default="main", description="Branch name")
+    deliveryId: Optional[str] = Field(default=None, description="X-GitHub-Delivery of the push; redeliveries are not rescanned")
     
     filesAdded: List[str] = Field(default_factory=list)
     filesModified: List[str] = Field(default_factory=list)
@@ -14,4 +15,12 @@ class PushScanPayload(BaseModel):
 class PushScanResponse(BaseModel):
     ok:bool
     filesScanned: int = 0
-    message: Optional[str] = None
\ No newline at end of file
+    message: Optional[str] = None
+
+class PushScanBatchPayload(BaseModel):
+    pushes: List[PushScanPayload] = Field(..., min_length=1)
+
+class PushScanBatchResponse(BaseModel):
+    ok: bool
+    filesScanned: int = 0
+    results: List[PushScanResponse] = Field(default_factory=list, description="One per push, in request order")
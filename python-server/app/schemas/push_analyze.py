@@ -5,6 +5,7 @@ class CommitItem(BaseModel):
     id: str = Field(..., min_length=1)
     message: Optional[str] = None
     author: Optional[str] = None
+    authorLogin: Optional[str] = None   # GitHub username; absent when the email isn't linked to an account
     added: Optional[List[str]] = None
     removed: Optional[List[str]] = None
     modified: Optional[List[str]] = None
@@ -19,9 +20,11 @@ class PushAnalyzeRequest(BaseModel):
     repoId: int
     installationId: int
     headCommitSha: Optional[str] = None
+    beforeSha: Optional[str] = None     # the push's `before`: branch head the push started from
     pushedBy: Optional[str] = None
     commitCount: Optional[int] = None
     commits: Optional[List[CommitItem]] = None
+    deliveryId: Optional[str] = None    # X-GitHub-Delivery; redeliveries are not reanalyzed
 
     model_config = ConfigDict(
         validate_by_name=True,      
@@ -0,0 +1,114 @@
+import re
+import signal
+import threading
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from app.core.config import settings
+from app.schemas.fullrepo_analyze import StaticAnalysisResponse, Halstead, Maintainability
+
+DEGRADED_OVERSIZED = "oversized"
+DEGRADED_GENERATED = "generated"
+DEGRADED_MINIFIED = "minified"
+DEGRADED_TIMEOUT = "timeout"
+
+# Generators announce themselves in the first lines (protoc, swagger-codegen, Go-style "Code generated ... DO NOT EDIT")
+_HEADER_CHARS = 1024
+_GENERATED_HEADER = re.compile(r"@generated|do not edit|auto-?generated|automatically generated", re.IGNORECASE)
+_GENERATED_PATH = re.compile(r"(_pb2(_grpc)?\.py|\.pb\.(js|ts)|[.-]min\.js|[.-]bundle\.js|\.generated\.\w+)$")
+# Hand-written code averages well under 80 characters a line
+_MINIFIED_MEAN_LINE_LENGTH = 300
+
+
+class AnalysisTimeout(Exception):
+    pass
+
+
+def degrade_reason(path: str, content: str) -> Optional[str]:
+    """Why a file should only get raw line counts, or None for a full analysis.
+
+    Every check is a single pass over the text, far cheaper than parsing it.
+    """
+    if len(content.encode("utf-8", "surrogatepass")) > settings.ANALYSIS_MAX_FILE_BYTES:
+        return DEGRADED_OVERSIZED
+    lines = content.count("\n") + 1
+    if lines > settings.ANALYSIS_MAX_LINES:
+        return DEGRADED_OVERSIZED
+    if not settings.ANALYSIS_DETECT_GENERATED:
+        return None
+    if _GENERATED_PATH.search(path) or _GENERATED_HEADER.search(content, 0, _HEADER_CHARS):
+        return DEGRADED_GENERATED
+    if len(content) / lines > _MINIFIED_MEAN_LINE_LENGTH:
+        return DEGRADED_MINIFIED
+    if max(map(len, content.split("\n"))) > settings.ANALYSIS_MAX_LINE_LENGTH:
+        return DEGRADED_MINIFIED
+    return None
+
+
+def raw_metrics(path: str, content: str, reason: str) -> StaticAnalysisResponse:
+    """Line counts only, by line prefix rather than a tokenizer, so any size of file is cheap"""
+    lines = content.split("\n")
+    comment_prefix = "#" if path.endswith(".py") else "//"
+    blank = comments = 0
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            blank += 1
+        elif stripped.startswith(comment_prefix):
+            comments += 1
+    sloc = len(lines) - blank - comments
+    return StaticAnalysisResponse(
+        path=path,
+        loc=len(lines),
+        lloc=sloc,
+        sloc=sloc,
+        comments=comments,
+        multi=0,
+        blank=blank,
+        cyclomatic=[],
+        halstead=Halstead(h1=0, h2=0, N1=0, N2=0, volume=0, difficulty=0, effort=0),
+        maintainability=Maintainability(mi=0, rank=""),
+        analysisMode="degraded",
+        degradedReason=reason,
+    )
+
+
+@contextmanager
+def cpu_time_limit(seconds: float):
+    """Raise AnalysisTimeout once this process has used `seconds` of CPU time in the block.
+
+    Uses SIGPROF, so it only applies on the main thread of a process on a
+    platform with setitimer; elsewhere the block runs unlimited.
+    """
+    if (seconds <= 0 or not hasattr(signal, "setitimer")
+            or threading.current_thread() is not threading.main_thread()):
+        yield
+        return
+
+    def on_timeout(signum, frame):
+        raise AnalysisTimeout(f"analysis used more than {seconds:g}s of CPU")
+
+    previous = signal.signal(signal.SIGPROF, on_timeout)
+    signal.setitimer(signal.ITIMER_PROF, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, previous)
+
+
+def analyze_guarded(path: str, content: str,
+                    analyze: Callable[[str, str], StaticAnalysisResponse]) -> StaticAnalysisResponse:
+    """Run `analyze` on the file unless it is oversized or generated, within the CPU time limit.
+
+    Skipped and timed-out files get raw_metrics, marked as degraded with the
+    reason, so they still reach Express instead of holding up the batch.
+    """
+    reason = degrade_reason(path, content)
+    if reason is not None:
+        return raw_metrics(path, content, reason)
+    try:
+        with cpu_time_limit(settings.ANALYSIS_CPU_TIMEOUT_SECONDS):
+            return analyze(path, content)
+    except AnalysisTimeout:
+        return raw_metrics(path, content, DEGRADED_TIMEOUT)
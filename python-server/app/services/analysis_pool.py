@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from opentelemetry.trace import Status, StatusCode
+
+from app.core.config import settings
+from app.schemas.fullrepo_analyze import StaticAnalysisResponse
+from app.services.analysis_guards import analyze_guarded
+from app.services.blob_store import content_text, release_mappings
+from app.services.block_metrics import analyze_py_incremental, block_store
+from app.services.metrics import (
+    ANALYSIS_FILES_IN_FLIGHT, CACHE_LOOKUPS, FILE_ANALYSIS_DEGRADED, FILE_ANALYSIS_FAILURES, FILE_ANALYSIS_SECONDS,
+)
+from app.services.js_metrics import analyze_js_source, JS_EXTENSIONS
+from app.services.profiling import StackSampler, add_worker_samples, worker_sample_interval
+from app.services.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ProcessPoolExecutor] = None
+_workers = 1
+
+
+def can_analyze(path: str) -> bool:
+    """Whether metrics for this file are computed here rather than by the Express worker"""
+    if path.endswith(".py"):
+        return True
+    return settings.JS_ANALYSIS_IN_PROCESS and path.endswith(JS_EXTENSIONS)
+
+
+def _language(path: str) -> str:
+    return "python" if path.endswith(".py") else "javascript"
+
+
+def _analyze_many(files: List[Tuple[str, str]], sample_interval: Optional[float] = None) -> Tuple[List[Tuple[str, Optional[StaticAnalysisResponse], Optional[str], int, int]], int, int, Counter]:
+    """Runs in a worker process: one task per batch keeps pickling overhead low.
+
+    Returns (path, result, error, start, end) per file, as epoch nanoseconds, plus
+    the block cache hits and misses of the batch, since the worker's counters
+    and spans aren't visible here. With `sample_interval`, the batch is also
+    profiled and its folded stacks returned.
+    """
+    hits, misses = block_store.hits, block_store.misses
+    samples: Counter = Counter()
+    sampler = None
+    if sample_interval:
+        sampler = StackSampler(threading.get_ident(), sample_interval)
+        sampler.add(samples)
+    results = []
+    for path, content in files:
+        analyze = analyze_py_incremental if path.endswith(".py") else analyze_js_source
+        started = time.time_ns()
+        try:
+            results.append((path, analyze_guarded(path, content_text(content), analyze), None, started, time.time_ns()))
+        except Exception as e:
+            results.append((path, None, str(e), started, time.time_ns()))
+    if sampler is not None:
+        sampler.remove(samples)
+    release_mappings()
+    return results, block_store.hits - hits, block_store.misses - misses, samples
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor, _workers
+    if _executor is None:
+        _workers = settings.ANALYSIS_WORKERS or os.cpu_count() or 1
+        # spawn: forking a process that already runs an event loop and threads is unsafe
+        _executor = ProcessPoolExecutor(max_workers=_workers, mp_context=multiprocessing.get_context("spawn"))
+        logger.info(f"Started analysis pool with {_workers} workers")
+    return _executor
+
+
+async def analyze_each(files: List[Dict[str, str]]) -> List[Optional[StaticAnalysisResponse]]:
+    """Analyze Python and JS/TS files off the event loop, spread across the worker pool.
+
+    Results line up with `files`; a file that fails to analyze is logged and
+    gets None. Oversized, generated and timed-out files get degraded results
+    (raw line counts only, see analysis_guards).
+    """
+    if not files:
+        return []
+
+    executor = _get_executor()
+    per_task = max(1, -(-len(files) // _workers))
+    loop = asyncio.get_running_loop()
+
+    interval = worker_sample_interval()
+    tasks = [
+        loop.run_in_executor(executor, _analyze_many, [(f["path"], f["content"]) for f in files[i:i + per_task]], interval)
+        for i in range(0, len(files), per_task)
+    ]
+
+    analysis = []
+    with tracer.start_as_current_span("analysis_pool", attributes={"analysis.files": len(files)}):
+        ANALYSIS_FILES_IN_FLIGHT.inc(len(files))
+        try:
+            batches = await asyncio.gather(*tasks)
+        finally:
+            ANALYSIS_FILES_IN_FLIGHT.dec(len(files))
+
+        for results, hits, misses, samples in batches:
+            CACHE_LOOKUPS.labels("block_metrics", "hit").inc(hits)
+            CACHE_LOOKUPS.labels("block_metrics", "miss").inc(misses)
+            add_worker_samples(samples)
+            for path, result, error, started, ended in results:
+                language = _language(path)
+                FILE_ANALYSIS_SECONDS.labels(language).observe((ended - started) / 1e9)
+                # The work ran in a worker; record its span here with the worker's timestamps
+                span = tracer.start_span(
+                    "analyze_py_code" if language == "python" else "analyze_js_code",
+                    attributes={"code.filepath": path, "code.language": language},
+                    start_time=started,
+                )
+                if error is not None:
+                    FILE_ANALYSIS_FAILURES.labels(language).inc()
+                    span.set_status(Status(StatusCode.ERROR, error))
+                    print(f"Error analyzing {path}: {error}")
+                elif result.analysisMode != "full":
+                    FILE_ANALYSIS_DEGRADED.labels(language, result.degradedReason).inc()
+                    span.set_attribute("analysis.degraded_reason", result.degradedReason)
+                    logger.warning(f"Only raw metrics for {path}: {result.degradedReason}")
+                span.end(end_time=ended)
+                analysis.append(result)
+    return analysis
+
+
+async def analyze_files(files: List[Dict[str, str]]) -> Tuple[List[StaticAnalysisResponse], List[Dict[str, str]]]:
+    """Returns the metrics and the files that failed; callers decide whether to
+    skip failures or hand them to Express.
+    """
+    analysis, failed = [], []
+    for f, result in zip(files, await analyze_each(files)):
+        if result is None:
+            failed.append(f)
+        else:
+            analysis.append(result)
+    return analysis, failed
+
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -3,24 +3,50 @@ from app.schemas.pull_analyze import AnalysisMetrics, Annotation, PullAnalyzeReq
 from app.services.impact_analyzer import seed_impact
 from app.services.prioritization import seed_prioritization
 from app.schemas.fullrepo_analyze import FullRepoAnalysisRequest, FullRepoAnalysisResponse, StaticAnalysisResponse, Halstead, Cyclomatic, Maintainability
-from app.services.github_api import fetch_repo_code, get_all_commits, get_all_contributors, get_all_issues, get_all_pr, get_all_releases, get_repo_metadata, fetch_pr_files
+from app.services.github_api import fetch_repo_tree, fetch_blobs, get_all_commits, get_all_contributors, get_repo_metadata, iter_pr_files, PullPatches
 from app.services.github_auth import get_installation_token
+from app.services.github_graphql import collect_repo_context
+from app.core.config import settings
 from app.services.pull_analysis_service import analyze_pr_opened
+from app.services.pr_complexity import analyze_pr_structure, comparison_base
+from app.services.path_rules import classifier_for
+from app.services.reviewers import author_history, load_codeowners, recommend_reviewers
+from app.services.scheduler import scheduler
+from app.services.express_transport import post_json, post_items, all_ok
+from app.services.checkpoint_store import load_checkpoint, pending_files, STAGE_FETCHED, STAGE_ANALYZED, STAGE_ACKNOWLEDGED
+from app.services.analysis_pool import analyze_files, can_analyze
+from app.services.upload_pipeline import default_batcher, UploadWindow
+from app.services.blob_store import temporary_store
+from app.services.tracing import bind_run_id, traced_run
+from app.services.profiling import profiled_run
 import asyncio
 import aiohttp
 from app.services.scanning import analysisClass
 import logging
 from datetime import datetime
+import time
 import uuid
-import os
-from dotenv import load_dotenv
-load_dotenv()
 
 logger = logging.getLogger(__name__)
-BACKEND_URL=os.getenv('EXPRESS_URL')
 
 
+def merge_push_analyses(pending: PushAnalyzeRequest, newer: PushAnalyzeRequest) -> PushAnalyzeRequest:
+    """One request covering both pushes, scored at the newer head from where the first one started"""
+    commits = {c.id: c for c in (pending.commits or []) + (newer.commits or [])}
+    count = None
+    if pending.commitCount is not None or newer.commitCount is not None:
+        count = (pending.commitCount or 0) + (newer.commitCount or 0)
+    return newer.model_copy(update={
+        "commits": list(commits.values()) or None,
+        "commitCount": count,
+        "beforeSha": pending.beforeSha or newer.beforeSha,
+    })
+
+
+@traced_run("push_analyze_repo")
+@profiled_run
 async def push_analyze_repo(req: PushAnalyzeRequest) -> PushAnalyzeResponse:
+    author_history.record(req.repo, req.commits or [])
     impact = await seed_impact(req)
     prio = await seed_prioritization(req, impact)
 
@@ -29,23 +55,25 @@ async def push_analyze_repo(req: PushAnalyzeRequest) -> PushAnalyzeResponse:
     message = f"Analyzed {req.repo} on {req.branch}. Impact={score:.2f}, threshold={req.threshold:.2f}."
 
     async with aiohttp.ClientSession() as session:
-        async with session.post(
-            f"{BACKEND_URL}/scanning/pushMetric",
-            json={
+        status, result = await post_json(
+            session,
+            "/scanning/pushMetric",
+            {
                 "message":message, 
                 "impact":impact,
                 "prio":prio,
                 "repoId":req.repoId
             }
-        )as resp:
-            result = await resp.json()
-            print(result)
+        )
+        print(result)
     
 
     print(message, impact, prio)
     return PushAnalyzeResponse(ok=ok, score=score, message=message)
 
 
+@traced_run("pull_analyze_repo")
+@profiled_run
 async def pull_analyze_repo(payload: PullAnalyzeRequest) -> PullAnalyzeResponse:
     """
     Main function to analyze a pull request
@@ -59,16 +87,35 @@ async def pull_analyze_repo(payload: PullAnalyzeRequest) -> PullAnalyzeResponse:
     logger.info(f"Action: {payload.action}")
     
     run_id = str(uuid.uuid4())
+    bind_run_id(run_id)
   
-    pr_files = await fetch_pr_files(
-        token=token,
-        owner=owner,
-        repo=repo,
-        pull_number=payload.prNumber
-    )
+    # Page through the PR's files, starting the head/base comparison of each
+    # page's source files while the next pages are still downloading
+    base_ref = payload.base.sha or payload.base.ref
+    codeowners_task = asyncio.ensure_future(load_codeowners(owner, repo, base_ref, token))
+    # Deltas are measured from where the PR branched off, not the base branch's tip
+    compare_base = asyncio.ensure_future(comparison_base(owner, repo, token, base_ref, payload.head.sha))
+
+    async def page_structure(page):
+        # Shared by every page: one page's task being cancelled mustn't cancel it for the rest
+        return await analyze_pr_structure(owner, repo, token, page, await asyncio.shield(compare_base))
+
+    pr_files = []
+    structure_tasks = []
+    try:
+        async for page in iter_pr_files(token, owner, repo, payload.prNumber):
+            pr_files.extend(page)
+            structure_tasks.append(asyncio.ensure_future(page_structure(page)))
+    except Exception as e:
+        logger.error(f"Failed to fetch files for PR #{payload.prNumber}: {str(e)}")
+        for task in structure_tasks:
+            task.cancel()
+        pr_files, structure_tasks = [], []
     
     if not pr_files:
         logger.warning(f"No files found for PR #{payload.prNumber}")
+        codeowners_task.cancel()
+        compare_base.cancel()
         return PullAnalyzeResponse(
             ok=True,
             repo=repoFullName,
@@ -80,8 +127,31 @@ async def pull_analyze_repo(payload: PullAnalyzeRequest) -> PullAnalyzeResponse:
             analyzedAt=datetime.utcnow().isoformat(),
         )
     
+    structure = {"functionDeltas": [], "fileDeltas": []}
+    for result in await asyncio.gather(*structure_tasks, return_exceptions=True):
+        if isinstance(result, Exception):
+            logger.warning(f"Structural analysis failed for PR #{payload.prNumber}: {str(result)}")
+            continue
+        structure["functionDeltas"].extend(result["functionDeltas"])
+        structure["fileDeltas"].extend(result["fileDeltas"])
+
     # Analyze the PR
-    analysis = await analyze_pr_opened(pr_files)
+    patches = PullPatches(token, owner, repo, payload.prNumber)
+    analysis = await analyze_pr_opened(pr_files, structure, patches.get, classifier_for(repoFullName))
+    
+    # Rank reviewers from CODEOWNERS and recent authors, falling back to the path-rule teams
+    try:
+        codeowners = await codeowners_task
+    except Exception as e:
+        logger.warning(f"Could not load CODEOWNERS for {repoFullName}: {str(e)}")
+        codeowners = None
+    analysis["recommendedReviewers"] = recommend_reviewers(
+        repoFullName,
+        [f["filename"] for f in pr_files],
+        codeowners,
+        exclude=[(payload.sender or {}).get("login")],
+        fallback=analysis.get("recommendedReviewers", []),
+    )
     
     annotations = []
     
@@ -92,6 +162,25 @@ async def pull_analyze_repo(payload: PullAnalyzeRequest) -> PullAnalyzeResponse:
             severity="warning"
         ))
     
+    # Point at each line that looks like a secret
+    for finding in analysis.get("secretFindings", []):
+        annotations.append(Annotation(
+            path=finding["path"],
+            start_line=finding["line"],
+            end_line=finding["line"],
+            message=finding["message"],
+            severity=finding["severity"]
+        ))
+    
+    # Add annotations for functions that became complex
+    for delta in analysis.get("functionDeltas", []):
+        if delta["delta"] > 0 and (delta["after"] or 0) > 10:
+            annotations.append(Annotation(
+                path=delta["path"],
+                message=f"Cyclomatic complexity of {delta['name']} is {delta['after']} (was {delta['before'] or 0})",
+                severity="warning"
+            ))
+    
     # Add missing tests annotation
     if analysis.get("missingTests"):
         annotations.append(Annotation(
@@ -142,6 +231,8 @@ async def pull_analyze_repo(payload: PullAnalyzeRequest) -> PullAnalyzeResponse:
         fileExtensions=analysis["fileExtensions"],
         missingTests=analysis["missingTests"],
         missingDocs=analysis["missingDocs"],
+        functionDeltas=analysis["functionDeltas"],
+        fileDeltas=analysis["fileDeltas"],
     )
     
     # Create summary
@@ -180,23 +271,64 @@ async def pull_analyze_repo(payload: PullAnalyzeRequest) -> PullAnalyzeResponse:
     )
 
 
-async def full_repo_analysis(payload: FullRepoAnalysisRequest) -> FullRepoAnalysisResponse:
-    token = await get_installation_token(payload.installationId)
-    repofiles = await fetch_repo_code(payload.owner, payload.repoName, payload.branch, token)
-    analysis = []
-    batchSize = 50
+async def _collect_repo_context(payload: FullRepoAnalysisRequest, token: str):
+    """Commits, contributors and metadata for Express, via GraphQL with a REST fallback.
+
+    With the git mirror enabled, history is read from the mirror instead (no
+    paging through GraphQL or REST), and GraphQL only answers the metadata.
+    """
+    metadata = None
+    if settings.GITHUB_USE_GRAPHQL:
+        with_history = not settings.GIT_MIRROR_ENABLED
+        try:
+            context = await collect_repo_context(payload.owner, payload.repoName, token, with_history=with_history)
+            if with_history:
+                return context["commits"], context["contributors"], context["metadata"]
+            metadata = context["metadata"]
+        except Exception as e:
+            logger.warning(f"GraphQL collection failed for {payload.fullName}, falling back to REST: {str(e)}")
 
-    # Fetch all repository data
     contributors = await get_all_contributors(payload.owner, payload.repoName, token)
-    issues = await get_all_issues(payload.owner, payload.repoName, token)
-    pr = await get_all_pr(payload.owner, payload.repoName, token)
+    # From the mirror when it's enabled
     commits = await get_all_commits(payload.owner, payload.repoName, token)
-    releases = await get_all_releases(payload.owner, payload.repoName, token)
-    metadata = await get_repo_metadata(payload.owner, payload.repoName, token)
+    if metadata is None:
+        metadata = await get_repo_metadata(payload.owner, payload.repoName, token)
+    return commits, contributors, metadata
 
-    # Analyze commits
-    commits_analysis = await analysisClass.analyze_commits(commits)
-    print("Commits Analysis:", commits_analysis)
+
+def _plan_batches(pending: list, checkpoint, batcher):
+    """(batch number, files) to upload: first the batches an earlier attempt cut
+    but never got acknowledged, unchanged so their idempotency keys match, then
+    the remaining files in adaptively sized batches."""
+    by_path = {f["path"]: f for f in pending}
+    replayed = set()
+    for batch_num, paths in checkpoint.unfinished_batches():
+        items = [by_path[p] for p in paths if p in by_path]
+        replayed.update(paths)
+        if items:
+            yield batch_num, items
+
+    rest = [f for f in pending if f["path"] not in replayed]
+    i = 0
+    while i < len(rest):
+        end = batcher.next_batch(rest, i)
+        # Numbered when cut: the previous batch is recorded by now
+        yield checkpoint.next_batch_number(), rest[i:end]
+        i = end
+
+
+@traced_run("full_repo_analysis")
+@profiled_run
+async def full_repo_analysis(payload: FullRepoAnalysisRequest) -> FullRepoAnalysisResponse:
+    token = await get_installation_token(payload.installationId)
+    tree = await fetch_repo_tree(payload.owner, payload.repoName, payload.branch, token)
+    repofiles = tree["files"]
+
+    checkpoint = load_checkpoint(payload.repoId, payload.branch, tree["sha"], resume=payload.resume)
+    pending = pending_files(repofiles, checkpoint)
+    bind_run_id(checkpoint.run_id)
+    if checkpoint.resumed:
+        print(f"Resuming run {checkpoint.run_id}: {len(repofiles) - len(pending)}/{len(repofiles)} files already acknowledged")
 
     # Count total files that need analysis (Python + JS/TS)
     python_files_count = len([f for f in repofiles if f["path"].endswith(".py")])
@@ -209,109 +341,172 @@ async def full_repo_analysis(payload: FullRepoAnalysisRequest) -> FullRepoAnalys
     #session for all HTTP requests
     async with aiohttp.ClientSession() as session:
         # Initializing analysis counter FIRST
-        if total_files_to_analyze > 0:
+        if total_files_to_analyze > 0 and not checkpoint.step_done("initialize"):
             try:
-                async with session.post(
-                    f"{BACKEND_URL}/scanning/initialize-analysis",
-                    json={"repoId": payload.repoId, "totalFiles": total_files_to_analyze}
-                ) as resp:
-                    result = await resp.json()
-                    print(f"Analysis initialized: {result}")
+                status, result = await post_json(
+                    session,
+                    "/scanning/initialize-analysis",
+                    {"repoId": payload.repoId, "totalFiles": total_files_to_analyze},
+                    idempotency_key=checkpoint.idempotency_key("initialize", [])
+                )
+                print(f"Analysis initialized: {result}")
+                if status < 400:
+                    await checkpoint.mark_step("initialize")
             except Exception as e:
                 print(f"Error initializing analysis: {str(e)}")
                 # Don't proceed if initialization fails
                 raise Exception(f"Failed to initialize analysis: {str(e)}")
 
         #Send metadata to Express server
-        async def send_metadata(url: str, data: dict, name: str):
+        async def send_metadata(path: str, data: dict, name: str, items_key: str = None):
             try:
-                async with session.post(url, json=data) as resp:
-                    result = await resp.json()
-                    print(f"{name} sent: {result}")
-                    return result
+                key = checkpoint.idempotency_key(name, [])
+                if items_key:
+                    items = data.pop(items_key)
+                    results = await post_items(session, path, items_key, items, data, idempotency_key=key)
+                else:
+                    results = [await post_json(session, path, data, idempotency_key=key)]
+                print(f"{name} sent: {[r for _, r in results]}")
+                if not all_ok(results):
+                    return {"error": f"status {[st for st, _ in results]}"}
+                return {"parts": len(results)}
             except Exception as e:
                 print(f"Error sending {name}: {str(e)}")
                 return {"error": str(e)}
 
-        # Create tasks for parallel execution
-        metadata_tasks = [
-            send_metadata(
-                f"{BACKEND_URL}/scanning/Commits",
-                {"commits": commits, "repoId": payload.repoId, "branch": payload.branch},
-                "Commits"
-            ),
-            send_metadata(
-                f"{BACKEND_URL}/scanning/commits-analysis",
-                {"commits_analysis": commits_analysis, "repoId": payload.repoId, "branch": payload.branch},
-                "Commits Analysis"
-            ),
-            send_metadata(
-                f"{BACKEND_URL}/scanning/repo-metadata",
-                {"metadata": metadata, "repoId": payload.repoId, "branch": payload.branch},
-                "Metadata"
-            ),
-            send_metadata(
-                f"{BACKEND_URL}/scanning/contributors",
-                {"contributors": contributors, "repoId": payload.repoId, "branch": payload.branch},
-                "Contributors"
-            ),
-        ]
-
-        await asyncio.gather(*metadata_tasks, return_exceptions=True)
-
-        #Processing repository files in batches
-        for i in range(0, len(repofiles), batchSize):
-            chunk = repofiles[i:i+batchSize]
-            batch_num = i // batchSize + 1
-
-            # Process Python files
-            py_files = [f for f in chunk if f["path"].endswith(".py")]
-            if py_files:
-                for repofile in py_files:
-                    path = repofile["path"]
-                    content = repofile["content"]
+        if not checkpoint.step_done("metadata"):
+            # Fetch all repository data
+            commits, contributors, metadata = await _collect_repo_context(payload, token)
+
+            # Analyze commits
+            commits_analysis = await analysisClass.analyze_commits(commits)
+            print("Commits Analysis:", commits_analysis)
+
+            # Create tasks for parallel execution
+            metadata_tasks = [
+                send_metadata(
+                    "/scanning/Commits",
+                    {"commits": commits, "repoId": payload.repoId, "branch": payload.branch},
+                    "Commits",
+                    items_key="commits"
+                ),
+                send_metadata(
+                    "/scanning/commits-analysis",
+                    {"commits_analysis": commits_analysis, "repoId": payload.repoId, "branch": payload.branch},
+                    "Commits Analysis"
+                ),
+                send_metadata(
+                    "/scanning/repo-metadata",
+                    {"metadata": metadata, "repoId": payload.repoId, "branch": payload.branch},
+                    "Metadata"
+                ),
+                send_metadata(
+                    "/scanning/contributors",
+                    {"contributors": contributors, "repoId": payload.repoId, "branch": payload.branch},
+                    "Contributors"
+                ),
+            ]
+
+            results = await asyncio.gather(*metadata_tasks, return_exceptions=True)
+            if all(isinstance(r, dict) and "error" not in r for r in results):
+                await checkpoint.mark_step("metadata")
+
+        #Processing repository files in batches; uploads run behind fetch + analysis
+        batcher = default_batcher()
+        window = UploadWindow(settings.EXPRESS_MAX_IN_FLIGHT)
+        failed_batches = 0
+
+        async def upload_batch(batch_num: int, batch_paths: list, analysis: list, queued_files: list, batch_bytes: int):
+            nonlocal failed_batches
+            batch_ok = True
+            sent = []
+            started = time.monotonic()
+
+            # Send file metrics in batch (the endpoint stores any language)
+            if analysis:
+                try:
+                    results = await post_items(
+                        session,
+                        "/scanning/python-batch",
+                        "Metrics",
+                        analysis,
+                        {"repoId": payload.repoId, "branch": payload.branch},
+                        idempotency_key=checkpoint.idempotency_key("python-batch", batch_paths),
+                        sent=sent
+                    )
+                    print(f"Metrics batch {batch_num} result: {[r for _, r in results]}")
+                    batch_ok = batch_ok and all_ok(results)
                     
-                    try:
-                        analysis_result = await analysisClass.analyze_py_code(path, content)
-                        analysis.append(analysis_result)
-                    except Exception as e:
-                        print(f"Error analyzing {path}: {str(e)}")
-                        continue
-                
-                # Send Python metrics in batch
-                if analysis:
-                    try:
-                        # Convert Pydantic models to dicts for JSON serialization
-                        serialized_analysis = [
-                            a.model_dump() if hasattr(a, 'model_dump') else a.dict()
-                            for a in analysis
-                        ]
-                        
-                        async with session.post(
-                            f"{BACKEND_URL}/scanning/python-batch",
-                            json={"Metrics": serialized_analysis, "repoId": payload.repoId, "branch": payload.branch}
-                        ) as resp:
-                            result = await resp.json()
-                            print(f"Python batch {batch_num} result: {result}")
-                        
-                        print(f"Sent {len(analysis)} Python files to Express")
-                        analysis = []  # Clear for next batch
-                    except Exception as e:
-                        print(f"Error sending Python batch {batch_num}: {str(e)}")
-            
-            # Process non-Python files (JS/TS/etc)
-            non_py_files = [f for f in chunk if not f["path"].endswith(".py")]
-            if non_py_files:
+                    print(f"Sent metrics for {len(analysis)} files to Express in {len(results)} requests")
+                except Exception as e:
+                    batch_ok = False
+                    print(f"Error sending metrics batch {batch_num}: {str(e)}")
+
+            # Send files without local metrics to the Express queue
+            if queued_files:
                 try:
-                    async with session.post(
-                        f"{BACKEND_URL}/scanning/enqueue-batch",
-                        json={"files": non_py_files, "repoId": payload.repoId, "branch": payload.branch}
-                    ) as resp:
-                        result = await resp.json()
-                        print(f"Batch {batch_num} (non-Python): {result}")
+                    results = await post_items(
+                        session,
+                        "/scanning/enqueue-batch",
+                        "files",
+                        queued_files,
+                        {"repoId": payload.repoId, "branch": payload.branch},
+                        idempotency_key=checkpoint.idempotency_key("enqueue-batch", batch_paths),
+                        sent=sent
+                    )
+                    print(f"Batch {batch_num} (queued): {[r for _, r in results]}")
+                    batch_ok = batch_ok and all_ok(results)
                 except Exception as e:
-                    print(f"Error processing batch {batch_num} non-Python files: {str(e)}")
+                    batch_ok = False
+                    print(f"Error processing batch {batch_num} queued files: {str(e)}")
+
+            batcher.observe(len(batch_paths), sum(sent), time.monotonic() - started, source_bytes=batch_bytes)
+            if batch_ok:
+                await checkpoint.mark_batch(batch_num, batch_paths, STAGE_ACKNOWLEDGED)
+            else:
+                failed_batches += 1
+
+        # File contents live in a pack on disk until their batch is uploaded; the
+        # process only holds offsets into it
+        with temporary_store(f"full-repo-{payload.repoId}-") as blobs:
+            try:
+                for batch_num, batch_items in _plan_batches(pending, checkpoint, batcher):
+                    # Let queued PR and push work run before the next batch
+                    await scheduler.checkpoint()
+
+                    batch_paths = [f["path"] for f in batch_items]
+                    batch_bytes = sum(f.get("size") or 0 for f in batch_items)
+
+                    chunk = await fetch_blobs(payload.owner, payload.repoName, batch_items, token, blobs)
+                    await checkpoint.mark_batch(batch_num, batch_paths, STAGE_FETCHED)
+
+                    # Python and JS/TS metrics are computed in the worker pool; anything
+                    # else (or JS/TS that failed to tokenize) goes to the Express queue
+                    local_files = [f for f in chunk if can_analyze(f["path"])]
+                    analysis, failed = await analyze_files(local_files)
+                    await checkpoint.mark_batch(batch_num, batch_paths, STAGE_ANALYZED)
+
+                    queued_files = [f for f in chunk if not can_analyze(f["path"])]
+                    queued_files += [f for f in failed if not f["path"].endswith(".py")]
+                    await window.submit(upload_batch(batch_num, batch_paths, analysis, queued_files, batch_bytes))
+
+                await window.drain()
+            finally:
+                # Uploads read file contents from the pack; none may outlive it
+                await window.cancel()
+        failed_batches += window.failed
+
+    if failed_batches:
+        # Keep the checkpoint so the next run only retries the unacknowledged batches
+        print(f"{failed_batches} batches were not acknowledged; run {checkpoint.run_id} can be resumed")
+        return FullRepoAnalysisResponse(
+            ok=False,
+            fileCount=len(repofiles),
+            score=0,
+            message=f"{failed_batches} batches failed, resume to retry them",
+        )
 
+    checkpoint.complete()
     print(f"Successfully processed {len(repofiles)} files")
     
     return FullRepoAnalysisResponse(
@@ -319,5 +514,4 @@ async def full_repo_analysis(payload: FullRepoAnalysisRequest) -> FullRepoAnalys
         fileCount=len(repofiles),
         score=0,  
         message="Repository analysis completed",
-        files=repofiles
     )
@@ -0,0 +1,141 @@
+import logging
+import mmap
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Per process: pack path -> (read-only mapping, mapped length). A mapping still
+# referenced by a memoryview can't be closed, so a grown pack gets a new
+# mapping and the old one is released with its last view.
+_mappings: Dict[str, Tuple[mmap.mmap, int]] = {}
+_mappings_lock = threading.Lock()
+
+
+def _mapping(pack: str, end: int) -> mmap.mmap:
+    with _mappings_lock:
+        current = _mappings.get(pack)
+        if current is not None and current[1] >= end:
+            return current[0]
+        with open(pack, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        _mappings[pack] = (mapped, len(mapped))
+        return mapped
+
+
+def _forget(pack: str) -> None:
+    with _mappings_lock:
+        _mappings.pop(pack, None)
+
+
+def release_mappings() -> None:
+    """Drop this process's mappings, so packs deleted since can free their disk space"""
+    with _mappings_lock:
+        _mappings.clear()
+
+
+class BlobRef:
+    """Where one file's content lives in a pack.
+
+    Stands in for the content string in file dicts: it pickles to a few dozen
+    bytes for the analysis workers, which map the pack themselves, and the
+    Express encoder turns it into text one item at a time.
+    """
+
+    __slots__ = ("pack", "offset", "length")
+
+    def __init__(self, pack: str, offset: int, length: int):
+        self.pack = pack
+        self.offset = offset
+        self.length = length
+
+    def __len__(self) -> int:
+        return self.length
+
+    def view(self) -> memoryview:
+        """Zero-copy view of the content; only valid while the pack exists"""
+        if not self.length:
+            return memoryview(b"")
+        return memoryview(_mapping(self.pack, self.offset + self.length))[self.offset:self.offset + self.length]
+
+    def text(self) -> str:
+        return str(self.view(), "utf-8", "ignore")
+
+    def __repr__(self) -> str:
+        return f"BlobRef({os.path.basename(self.pack)}@{self.offset}+{self.length})"
+
+
+def content_text(content: Union[str, BlobRef]) -> str:
+    return content.text() if isinstance(content, BlobRef) else content
+
+
+class BlobStore:
+    """Append-only pack file of fetched file contents, indexed by blob SHA.
+
+    Each blob is written once, straight from the decoded response, so the
+    process holds offsets instead of a str per file; readers map the pack and
+    slice it. The pack is scratch space for one run and is deleted on close.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+        self._size = 0
+        self._index: Dict[str, BlobRef] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def get(self, key: str) -> Optional[BlobRef]:
+        return self._index.get(key)
+
+    def put(self, key: str, data: Union[bytes, memoryview]) -> BlobRef:
+        """Append `data` unless a blob with this key is already stored"""
+        with self._lock:
+            ref = self._index.get(key)
+            if ref is not None:
+                return ref
+            # Unbuffered, so worker processes mapping the file see it as soon as this returns
+            view = memoryview(data)
+            written = 0
+            while written < len(view):
+                written += os.pwrite(self._fd, view[written:], self._size + written)
+            ref = self._index[key] = BlobRef(self.path, self._size, len(view))
+            self._size += len(view)
+            return ref
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fd < 0:
+                return
+            os.close(self._fd)
+            self._fd = -1
+            self._index.clear()
+        _forget(self.path)
+        try:
+            os.unlink(self.path)
+        except OSError as e:
+            logger.warning(f"Could not remove blob pack {self.path}: {str(e)}")
+
+
+@contextmanager
+def temporary_store(prefix: str) -> Iterator[Optional[BlobStore]]:
+    """A pack under BLOB_STORE_DIR for the duration of the block, or None when BLOB_STORE_DIR is empty"""
+    if not settings.BLOB_STORE_DIR:
+        yield None
+        return
+    os.makedirs(settings.BLOB_STORE_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix=prefix, suffix=".pack", dir=settings.BLOB_STORE_DIR)
+    os.close(fd)
+    store = BlobStore(path)
+    try:
+        yield store
+    finally:
+        store.close()
@@ -0,0 +1,366 @@
+import ast
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+from radon.complexity import cc_rank
+from radon.metrics import halstead_visitor_report, mi_compute
+from radon.raw import analyze, Module
+from radon.visitors import ComplexityVisitor, HalsteadVisitor
+
+from app.core.config import settings
+from app.schemas.fullrepo_analyze import StaticAnalysisResponse, Halstead, Cyclomatic, Maintainability
+
+logger = logging.getLogger(__name__)
+
+# Bump when the stored record layout or the radon version changes
+_RECORD_VERSION = "2"
+
+# Expired and least recently used chunks are swept at least this often, per process
+_SWEEP_INTERVAL = 3600
+# A sweep goes this far below the byte budget, so it doesn't rerun on the next write
+_SWEEP_TARGET = 0.9
+# A read refreshes a row's last-used time at most this often, to keep reads from becoming writes
+_TOUCH_INTERVAL = 86400
+_JSON_SCALARS = (str, int, float, bool, type(None))
+
+
+def _operand(value: Any) -> Any:
+    """An operand value that survives a JSON round trip and keeps radon's equality.
+
+    Names and most constants already do; bytes, complex and Ellipsis become a
+    (type, repr) pair, which no other operand can equal.
+    """
+    if isinstance(value, _JSON_SCALARS):
+        return value
+    return (type(value).__name__, repr(value))
+
+
+def _statement_metrics(node: ast.stmt) -> Dict[str, Any]:
+    """radon results for one top-level statement, in a form that can be summed per file.
+
+    radon visits a module one top-level statement at a time, so file totals are
+    the sum of these (complexity, operator/operand counts) plus the union of the
+    distinct operator and operand sets. Operands that are AST nodes are distinct
+    by identity in radon, so only their count is kept.
+    """
+    cc = ComplexityVisitor.from_ast(node)
+    hal = HalsteadVisitor.from_ast(node)
+
+    operands = set()
+    node_operands = 0
+    for operand in hal.operands_seen:
+        if isinstance(operand[1], ast.AST):
+            node_operands += 1
+        else:
+            operands.add((operand[0], _operand(operand[1])))
+
+    return {
+        "functions": [(f.name, f.complexity) for f in cc.functions],
+        "classes": [
+            [(c.name, c.complexity)] + [(m.name, m.complexity) for m in c.methods]
+            for c in cc.classes
+        ],
+        "complexity": cc.total_complexity - 1,
+        "operators": frozenset(hal.operators_seen),
+        "operands": frozenset(operands),
+        "nodeOperands": node_operands,
+        "N1": hal.operators,
+        "N2": hal.operands,
+    }
+
+
+def _chunk_metrics(text: str, nodes: List[ast.stmt]) -> Dict[str, Any]:
+    """Raw line counts for a chunk of lines plus the summed metrics of its statements"""
+    record = {
+        "raw": tuple(analyze(text)),
+        "functions": [],
+        "classes": [],
+        "complexity": 0,
+        "operators": frozenset(),
+        "operands": frozenset(),
+        "nodeOperands": 0,
+        "N1": 0,
+        "N2": 0,
+    }
+    for node in nodes:
+        stmt = _statement_metrics(node)
+        record["functions"] += stmt["functions"]
+        record["classes"] += stmt["classes"]
+        record["complexity"] += stmt["complexity"]
+        record["operators"] |= stmt["operators"]
+        record["operands"] |= stmt["operands"]
+        record["nodeOperands"] += stmt["nodeOperands"]
+        record["N1"] += stmt["N1"]
+        record["N2"] += stmt["N2"]
+    return record
+
+
+# Line ends as the tokenizer sees them, so indexes match ast's line numbers.
+# str.splitlines also breaks on \x0c, \x1c-\x1e, \x85, \u2028 and \u2029.
+_LINE = re.compile(r"[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+\Z")
+
+
+def _chunks(content: str, tree: ast.Module) -> List[Tuple[str, List[ast.stmt]]]:
+    """Split a module into runs of whole lines, each ending with a top-level statement.
+
+    A chunk holds the blank lines and comments before a statement plus the
+    statement itself (several statements when they share a line). radon's raw
+    counts add up exactly over such chunks, and the statements in a chunk are
+    fully determined by its text.
+    """
+    lines = _LINE.findall(content)
+    chunks = []
+    start = 0
+    group: List[ast.stmt] = []
+    for i, node in enumerate(tree.body):
+        group.append(node)
+        following = tree.body[i + 1] if i + 1 < len(tree.body) else None
+        if following is not None and following.lineno == node.end_lineno:
+            continue
+        chunks.append(("".join(lines[start:node.end_lineno]), group))
+        start, group = node.end_lineno, []
+    if start < len(lines) or not chunks:
+        chunks.append(("".join(lines[start:]), []))
+    return chunks
+
+
+def _dump_record(record: Dict[str, Any]) -> str:
+    return json.dumps({
+        **record,
+        "operators": sorted(record["operators"]),
+        "operands": list(record["operands"]),
+    }, separators=(",", ":"))
+
+
+def _load_record(text: str) -> Dict[str, Any]:
+    record = json.loads(text)
+    record["raw"] = tuple(record["raw"])
+    record["operators"] = frozenset(record["operators"])
+    record["operands"] = frozenset(
+        (context, tuple(value) if isinstance(value, list) else value) for context, value in record["operands"]
+    )
+    return record
+
+
+class BlockMetricsStore:
+    """Per-chunk radon results keyed by a hash of the chunk's source.
+
+    Kept in a small in-memory LRU per process, backed by SQLite (JSON records)
+    so every worker in the analysis pool (and the next push) can reuse them.
+    The table is bounded: chunks unused for `max_age_seconds` and then the
+    least recently used beyond `max_bytes` are deleted by a periodic sweep;
+    SQLite reuses the freed pages, so the file stops growing.
+    """
+
+    def __init__(self, path: str, max_memory_entries: int, max_bytes: int, max_age_seconds: float):
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._last_sweep = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        if not self.path:
+            return None
+        # Connections can't cross a fork
+        if self._conn is None or self._pid != os.getpid():
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                # Pickled records from before the JSON layout; their keys can't be hit any more
+                self._conn.execute("DROP TABLE IF EXISTS blocks")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS chunks (key TEXT PRIMARY KEY, record TEXT NOT NULL, used_at REAL NOT NULL)"
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS chunks_used_at ON chunks (used_at)")
+                self._pid = os.getpid()
+                self._last_sweep = 0.0
+            except sqlite3.Error as e:
+                logger.warning(f"Block metrics store unavailable: {str(e)}")
+                self.path = ""
+                return None
+        return self._conn
+
+    def _remember(self, key: str, record: Dict[str, Any]) -> None:
+        self._memory[key] = record
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        found: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        for key in keys:
+            record = self._memory.get(key)
+            if record is not None:
+                self._memory.move_to_end(key)
+                found[key] = record
+            else:
+                missing.append(key)
+
+        db = self._db()
+        if missing and db is not None:
+            now = time.time()
+            try:
+                for i in range(0, len(missing), 500):
+                    part = missing[i:i + 500]
+                    placeholders = ",".join("?" * len(part))
+                    rows = db.execute(f"SELECT key, record FROM chunks WHERE key IN ({placeholders})", part).fetchall()
+                    for key, text in rows:
+                        record = _load_record(text)
+                        self._remember(key, record)
+                        found[key] = record
+                    if rows:
+                        db.execute(
+                            f"UPDATE chunks SET used_at = ? WHERE key IN ({placeholders}) AND used_at < ?",
+                            [now, *part, now - _TOUCH_INTERVAL],
+                        )
+            except (sqlite3.Error, ValueError) as e:
+                logger.warning(f"Block metrics lookup failed: {str(e)}")
+        return found
+
+    def put_many(self, records: Dict[str, Dict[str, Any]]) -> None:
+        for key, record in records.items():
+            self._remember(key, record)
+
+        db = self._db()
+        if records and db is not None:
+            now = time.time()
+            try:
+                db.executemany(
+                    "INSERT OR REPLACE INTO chunks (key, record, used_at) VALUES (?, ?, ?)",
+                    [(key, _dump_record(record), now) for key, record in records.items()],
+                )
+                if time.monotonic() - self._last_sweep > _SWEEP_INTERVAL:
+                    self._sweep(db)
+            except sqlite3.Error as e:
+                logger.warning(f"Block metrics write failed: {str(e)}")
+
+    def _sweep(self, db: sqlite3.Connection) -> None:
+        """Delete expired chunks, then the least recently used until under the byte budget"""
+        self._last_sweep = time.monotonic()
+        db.execute("DELETE FROM chunks WHERE used_at < ?", (time.time() - self.max_age_seconds,))
+        count, total = db.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(record)), 0) FROM chunks").fetchone()
+        if total <= self.max_bytes:
+            return
+        # Rows are similar in size, so the excess over the target is a row count
+        evict = int((total - self.max_bytes * _SWEEP_TARGET) / (total / count)) + 1
+        db.execute("DELETE FROM chunks WHERE key IN (SELECT key FROM chunks ORDER BY used_at LIMIT ?)", (evict,))
+        logger.info(f"Block metrics over {self.max_bytes} bytes; evicted {evict} of {count} chunks")
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "memoryEntries": len(self._memory)}
+
+
+block_store = BlockMetricsStore(
+    settings.BLOCK_METRICS_PATH,
+    settings.BLOCK_METRICS_MEMORY_ENTRIES,
+    settings.BLOCK_METRICS_MAX_BYTES,
+    settings.BLOCK_METRICS_MAX_AGE_DAYS * 86400,
+)
+
+
+def _chunk_key(text: str) -> str:
+    return hashlib.sha1(f"{_RECORD_VERSION}\0{text}".encode()).hexdigest()
+
+
+def analyze_py_incremental(path: str, content: str, store: BlockMetricsStore = block_store) -> StaticAnalysisResponse:
+    """Same result as analyze_py_source, but only code that changed is re-measured.
+
+    The file is parsed once to find its top-level statements. Raw line counts,
+    cyclomatic and Halstead results for every unchanged chunk come from the
+    store; changed chunks are measured and saved. File totals and MI are then
+    re-aggregated, so an edit to one function costs about one function's work.
+    """
+    tree = ast.parse(content)
+    chunks = _chunks(content, tree)
+    keys = [_chunk_key(text) for text, _ in chunks]
+    records = store.get_many(list(set(keys)))
+
+    computed: Dict[str, Dict[str, Any]] = {}
+    for key, (text, nodes) in zip(keys, chunks):
+        if key in records:
+            store.hits += 1
+        elif key not in computed:
+            store.misses += 1
+            computed[key] = _chunk_metrics(text, nodes)
+    if computed:
+        store.put_many(computed)
+        records.update(computed)
+
+    raw = [0] * len(Module._fields)
+    functions, classes = [], []
+    complexity = 1
+    operators, operands = set(), set()
+    node_operands = N1 = N2 = 0
+    for key in keys:
+        record = records[key]
+        raw = [total + part for total, part in zip(raw, record["raw"])]
+        functions.extend(record["functions"])
+        for class_blocks in record["classes"]:
+            classes.extend(class_blocks)
+        complexity += record["complexity"]
+        operators |= record["operators"]
+        operands |= record["operands"]
+        node_operands += record["nodeOperands"]
+        N1 += record["N1"]
+        N2 += record["N2"]
+    raw = Module(*raw)
+
+    # Same block order as ComplexityVisitor.blocks: functions, then each class and its methods
+    cyclo = [
+        Cyclomatic(name=name, complexity=block_complexity, rank=cc_rank(block_complexity))
+        for name, block_complexity in functions + classes
+    ]
+
+    report = halstead_visitor_report(SimpleNamespace(
+        distinct_operators=len(operators),
+        distinct_operands=len(operands) + node_operands,
+        operators=N1,
+        operands=N2,
+    ))
+    halstead = Halstead(
+        h1=report.h1,
+        h2=report.h2,
+        N1=report.N1,
+        N2=report.N2,
+        vocabulary=report.vocabulary,
+        length=report.length,
+        volume=report.volume,
+        difficulty=report.difficulty,
+        effort=report.effort,
+        time=report.time,
+        bugs=report.bugs
+    )
+
+    comment_lines = raw.comments + raw.multi
+    comments = comment_lines / float(raw.sloc) * 100 if raw.sloc != 0 else 0
+    mi_score = mi_compute(report.volume, complexity, raw.lloc, comments)
+    mi_rank = "A" if mi_score >= 20 else "B" if mi_score >= 10 else "C"
+
+    return StaticAnalysisResponse(
+        path=path,
+        loc=raw.loc,
+        lloc=raw.lloc,
+        sloc=raw.sloc,
+        comments=raw.comments,
+        multi=raw.multi,
+        blank=raw.blank,
+        cyclomatic=cyclo,
+        halstead=halstead,
+        maintainability=Maintainability(mi=mi_score, rank=mi_rank),
+    )
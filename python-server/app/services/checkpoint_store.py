@@ -0,0 +1,168 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+STAGE_FETCHED = "fetched"
+STAGE_ANALYZED = "analyzed"
+STAGE_ACKNOWLEDGED = "acknowledged"
+
+
+class ScanCheckpoint:
+    """Per-batch progress of a full-repo scan, persisted so a failed run can resume.
+
+    A checkpoint is keyed by (repoId, branch, tree sha): if the branch moves on,
+    the next run starts fresh instead of mixing two revisions.
+
+    On disk it is an append-only JSONL log: a header line, then one small record
+    per step or batch stage change, written from a thread. A batch's file list
+    is written once, when the batch is cut, so a resumed run can replay an
+    unacknowledged batch with the same files (and idempotency keys) even though
+    adaptive batching would now cut it differently.
+    """
+
+    def __init__(self, repo_id: str, branch: str, tree_sha: str, header: Optional[Dict] = None,
+                 records: Iterable[Dict] = ()):
+        self.repo_id = str(repo_id)
+        self.branch = branch
+        self.tree_sha = tree_sha
+        self.header = header or {
+            "runId": str(uuid.uuid4()),
+            "repoId": self.repo_id,
+            "branch": branch,
+            "treeSha": tree_sha,
+            "createdAt": datetime.utcnow().isoformat(),
+        }
+        self.steps: Dict[str, str] = {}
+        # batch number -> {"files": [...], "stage": ...}
+        self.batches: Dict[int, Dict] = {}
+        for record in records:
+            self._apply(record)
+        self._on_disk = header is not None
+        self._lock = threading.Lock()
+
+    @property
+    def run_id(self) -> str:
+        return self.header["runId"]
+
+    @property
+    def path(self) -> str:
+        return _checkpoint_path(self.repo_id, self.branch)
+
+    @property
+    def resumed(self) -> bool:
+        return bool(self.batches or self.steps)
+
+    def next_batch_number(self) -> int:
+        return max(self.batches, default=0) + 1
+
+    def acknowledged_files(self) -> Set[str]:
+        done = set()
+        for batch in self.batches.values():
+            if batch["stage"] == STAGE_ACKNOWLEDGED:
+                done.update(batch["files"])
+        return done
+
+    def unfinished_batches(self) -> List[Tuple[int, List[str]]]:
+        """(batch number, files) of batches cut by an earlier attempt and never acknowledged"""
+        return [(num, batch["files"]) for num, batch in sorted(self.batches.items())
+                if batch["stage"] != STAGE_ACKNOWLEDGED]
+
+    def step_done(self, name: str) -> bool:
+        return self.steps.get(name) == STAGE_ACKNOWLEDGED
+
+    async def mark_step(self, name: str) -> None:
+        await self._record({"step": name, "stage": STAGE_ACKNOWLEDGED})
+
+    async def mark_batch(self, batch_num: int, files: Iterable[str], stage: str) -> None:
+        record = {"batch": batch_num, "stage": stage, "at": datetime.utcnow().isoformat()}
+        if batch_num not in self.batches:
+            record["files"] = sorted(files)
+        await self._record(record)
+
+    def idempotency_key(self, kind: str, files: Iterable[str]) -> str:
+        """Stable key for a POST to Express, derived from the run and the batch contents."""
+        digest = hashlib.sha1()
+        digest.update(f"{self.run_id}:{kind}".encode())
+        for path in sorted(files):
+            digest.update(b"\0" + path.encode())
+        return digest.hexdigest()
+
+    def _apply(self, record: Dict) -> None:
+        if "step" in record:
+            self.steps[record["step"]] = record["stage"]
+        elif "batch" in record:
+            batch = self.batches.setdefault(record["batch"], {"files": record.get("files", []), "stage": None})
+            batch["stage"] = record["stage"]
+
+    async def _record(self, record: Dict) -> None:
+        self._apply(record)
+        await asyncio.to_thread(self._append, record)
+
+    def _append(self, record: Dict) -> None:
+        """Runs in a thread"""
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            if not self._on_disk:
+                # A fresh run replaces any checkpoint left by an older tree
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, "w") as f:
+                    f.write(json.dumps(self.header) + "\n" + line)
+                self._on_disk = True
+                return
+            with open(self.path, "a") as f:
+                f.write(line)
+
+    def complete(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _checkpoint_path(repo_id: str, branch: str) -> str:
+    safe_branch = branch.replace("/", "__")
+    return os.path.join(settings.CHECKPOINT_DIR, f"{repo_id}-{safe_branch}.jsonl")
+
+
+def load_checkpoint(repo_id: str, branch: str, tree_sha: str, resume: bool = True) -> ScanCheckpoint:
+    """Return the unfinished checkpoint for this tree, or a fresh one."""
+    path = _checkpoint_path(str(repo_id), branch)
+
+    if resume and os.path.exists(path):
+        try:
+            with open(path) as f:
+                header = json.loads(f.readline())
+                records = []
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # A write cut short by a crash; everything before it stands
+                        break
+            if header.get("treeSha") == tree_sha:
+                checkpoint = ScanCheckpoint(repo_id, branch, tree_sha, header, records)
+                logger.info(
+                    f"Resuming run {checkpoint.run_id} for repo {repo_id}: "
+                    f"{len(checkpoint.acknowledged_files())} files already acknowledged"
+                )
+                return checkpoint
+            logger.info(f"Discarding checkpoint for repo {repo_id}: tree changed")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {path}: {str(e)}")
+
+    return ScanCheckpoint(repo_id, branch, tree_sha)
+
+
+def pending_files(files: List[Dict], checkpoint: ScanCheckpoint) -> List[Dict]:
+    done = checkpoint.acknowledged_files()
+    return [f for f in files if f["path"] not in done]
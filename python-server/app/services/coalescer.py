@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.services.metrics import PUSH_EVENTS
+
+logger = logging.getLogger(__name__)
+
+
+class _Burst:
+    def __init__(self, payload: Any, event_id: str):
+        now = time.monotonic()
+        self.payload = payload
+        self.event_ids: Set[str] = {event_id}
+        self.first_at = now
+        self.last_at = now
+        self.result: "asyncio.Future" = asyncio.get_running_loop().create_future()
+        # Nobody may be waiting any more when it fails; don't log "exception never retrieved"
+        self.result.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+
+class Coalescer:
+    """Turns a burst of events for the same key into one run.
+
+    An event waits `window` seconds for more events with the same key (e.g.
+    repoId and branch); each one that arrives is merged into the pending
+    payload and restarts the wait, up to `max_wait` after the first. Then the
+    merged payload runs once and every event in the burst gets its result.
+
+    An event ID seen before (a redelivery) joins its burst if that is still
+    pending, or gets the stored result if it finished within `remember`
+    seconds; it never triggers another run.
+    """
+
+    def __init__(self, window: float, max_wait: float, remember: float, max_remembered: int):
+        self.window = window
+        self.max_wait = max(window, max_wait)
+        self.remember = remember
+        self.max_remembered = max_remembered
+        self._pending: Dict[Hashable, _Burst] = {}
+        self._pending_ids: Dict[Tuple[Hashable, str], _Burst] = {}
+        # The loop only keeps weak references to tasks; an unreferenced flush could be collected mid-run
+        self._tasks: Set["asyncio.Task"] = set()
+        # (key, event ID) -> (finished at, result)
+        self._done: "OrderedDict[Tuple[Hashable, str], Tuple[float, Any]]" = OrderedDict()
+
+    def _recall(self, key: Hashable, event_id: str) -> Optional[Tuple[float, Any]]:
+        entry = self._done.get((key, event_id))
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > self.remember:
+            del self._done[(key, event_id)]
+            return None
+        return entry
+
+    def _store(self, key: Hashable, event_ids: Iterable[str], result: Any) -> None:
+        now = time.monotonic()
+        for event_id in event_ids:
+            self._done[(key, event_id)] = (now, result)
+            self._done.move_to_end((key, event_id))
+        while len(self._done) > self.max_remembered:
+            self._done.popitem(last=False)
+
+    def seen(self, kind: str, key: Hashable, event_id: str) -> Optional["asyncio.Future"]:
+        """The result of an event already handled or pending here, or None if it is new.
+
+        For callers that run events themselves (e.g. a batch) but must not
+        repeat one this coalescer has run or is about to run.
+        """
+        key = (kind, key)
+        remembered = self._recall(key, event_id)
+        if remembered is not None:
+            done = asyncio.get_running_loop().create_future()
+            done.set_result(remembered[1])
+        else:
+            burst = self._pending_ids.get((key, event_id))
+            if burst is None:
+                return None
+            done = burst.result
+        PUSH_EVENTS.labels(kind, "duplicate").inc()
+        return done
+
+    def record(self, kind: str, key: Hashable, event_ids: Iterable[str], result: Any) -> None:
+        """Remember the result of events run outside submit(), so their redeliveries are not run again"""
+        self._store((kind, key), event_ids, result)
+
+    async def submit(self, kind: str, key: Hashable, event_id: str, payload: Any,
+                     merge: Callable[[Any, Any], Any], run: Callable[[Any], Awaitable[Any]]) -> Any:
+        """Result of the run that covers this event.
+
+        `merge(pending, newer)` returns the combined payload; `run(payload)`
+        does the work. Both are the caller's, so one coalescer serves any
+        event type; `kind` only labels metrics and logs.
+        """
+        key = (kind, key)
+        remembered = self._recall(key, event_id)
+        if remembered is not None:
+            PUSH_EVENTS.labels(kind, "duplicate").inc()
+            logger.info(f"{kind} event {event_id} for {key[1]} already analyzed, returning its result")
+            return remembered[1]
+
+        burst = self._pending_ids.get((key, event_id))
+        if burst is not None:
+            PUSH_EVENTS.labels(kind, "duplicate").inc()
+        else:
+            burst = self._pending.get(key)
+            if burst is None:
+                burst = self._pending[key] = _Burst(payload, event_id)
+                task = asyncio.create_task(self._flush(kind, key, burst, run))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+                PUSH_EVENTS.labels(kind, "analyzed").inc()
+            else:
+                burst.payload = merge(burst.payload, payload)
+                burst.event_ids.add(event_id)
+                burst.last_at = time.monotonic()
+                PUSH_EVENTS.labels(kind, "coalesced").inc()
+                logger.info(f"Coalesced {kind} event {event_id} into the pending run for {key[1]} "
+                            f"({len(burst.event_ids)} events)")
+            self._pending_ids[(key, event_id)] = burst
+
+        # The run is shared: a client that hangs up must not cancel it for the others
+        return await asyncio.shield(burst.result)
+
+    async def _flush(self, kind: str, key: Hashable, burst: _Burst,
+                     run: Callable[[Any], Awaitable[Any]]) -> None:
+        try:
+            try:
+                while True:
+                    wait = min(burst.last_at + self.window, burst.first_at + self.max_wait) - time.monotonic()
+                    if wait <= 0:
+                        break
+                    await asyncio.sleep(wait)
+            finally:
+                # Events from here on start the next burst
+                del self._pending[key]
+                for event_id in burst.event_ids:
+                    self._pending_ids.pop((key, event_id), None)
+
+            try:
+                result = await run(burst.payload)
+            except Exception as e:
+                logger.error(f"{kind} run for {key[1]} failed: {str(e)}")
+                burst.result.set_exception(e)
+                return
+            self._store(key, burst.event_ids, result)
+            burst.result.set_result(result)
+        finally:
+            # Cancelled (e.g. on shutdown): the waiters get CancelledError instead of hanging
+            if not burst.result.done():
+                burst.result.cancel()
+
+
+push_events = Coalescer(
+    settings.PUSH_DEBOUNCE_SECONDS,
+    settings.PUSH_DEBOUNCE_MAX_SECONDS,
+    settings.PUSH_DEDUPE_SECONDS,
+    settings.PUSH_DEDUPE_ENTRIES,
+)
@@ -0,0 +1,104 @@
+import json
+import logging
+import os
+import sqlite3
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.services.git_mirror import is_commit_sha
+
+logger = logging.getLogger(__name__)
+
+
+class CompareStore:
+    """Compare results (base...head) keyed by repository and the two commit SHAs.
+
+    Only SHA...SHA compares are stored: their diff can never change, so entries
+    never expire and need no revalidation. Kept in a small in-memory LRU,
+    backed by SQLite (zlib-compressed JSON, patches included) so redelivered
+    and repeated pushes cost no GitHub calls after a restart either.
+    """
+
+    def __init__(self, path: str, max_memory_entries: int):
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(owner: str, repo: str, base: str, head: str) -> Optional[str]:
+        if not (is_commit_sha(base) and is_commit_sha(head)):
+            return None
+        return f"{owner.lower()}/{repo.lower()}:{base.lower()}...{head.lower()}"
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        if not self.path:
+            return None
+        if self._conn is None:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("CREATE TABLE IF NOT EXISTS compares (key TEXT PRIMARY KEY, result BLOB NOT NULL)")
+            except sqlite3.Error as e:
+                logger.warning(f"Compare cache unavailable: {str(e)}")
+                self.path = ""
+                return None
+        return self._conn
+
+    def _remember(self, key: str, result: Dict[str, Any]) -> None:
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, owner: str, repo: str, base: str, head: str) -> Optional[Dict[str, Any]]:
+        key = self.key(owner, repo, base, head)
+        if key is None:
+            return None
+        result = self._memory.get(key)
+        if result is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return result
+
+        db = self._db()
+        if db is not None:
+            try:
+                row = db.execute("SELECT result FROM compares WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    result = json.loads(zlib.decompress(row[0]))
+                    self._remember(key, result)
+                    self.hits += 1
+                    return result
+            except (sqlite3.Error, zlib.error, ValueError) as e:
+                logger.warning(f"Compare cache lookup failed: {str(e)}")
+        self.misses += 1
+        return None
+
+    def put(self, owner: str, repo: str, base: str, head: str, result: Dict[str, Any]) -> None:
+        """Store the result if base and head are both commit SHAs; refs are ignored"""
+        key = self.key(owner, repo, base, head)
+        if key is None:
+            return
+        self._remember(key, result)
+
+        db = self._db()
+        if db is not None:
+            try:
+                db.execute(
+                    "INSERT OR REPLACE INTO compares (key, result) VALUES (?, ?)",
+                    (key, zlib.compress(json.dumps(result, separators=(",", ":")).encode())),
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"Compare cache write failed: {str(e)}")
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "memoryEntries": len(self._memory)}
+
+
+compare_cache = CompareStore(settings.COMPARE_CACHE_PATH, settings.COMPARE_CACHE_MEMORY_ENTRIES)
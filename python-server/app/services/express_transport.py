@@ -0,0 +1,134 @@
+import gzip
+import logging
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import aiohttp
+import orjson
+
+from app.core.config import settings
+from app.services.blob_store import BlobRef
+from app.services.metrics import EXPRESS_BODY_BYTES, EXPRESS_REQUESTS, EXPRESS_REQUEST_SECONDS
+from app.services.tracing import propagation_headers, tracer
+
+logger = logging.getLogger(__name__)
+
+def _to_jsonable(obj: Any) -> Any:
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    if isinstance(obj, BlobRef):
+        # File content kept in a blob pack; decoded only while its item is encoded
+        return obj.text()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(payload: Any) -> bytes:
+    return orjson.dumps(payload, default=_to_jsonable)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    # express.json() inflates gzip and deflate request bodies; it has no zstd
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=settings.EXPRESS_GZIP_LEVEL)
+    return body
+
+
+def split_by_bytes(encoded_items: List[bytes], max_bytes: int) -> Iterator[List[bytes]]:
+    """Group pre-serialized items into chunks whose total size stays under max_bytes.
+
+    A single item larger than the limit is sent on its own rather than dropped.
+    """
+    chunk: List[bytes] = []
+    size = 0
+    for item in encoded_items:
+        if chunk and size + len(item) + 1 > max_bytes:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(item)
+        size += len(item) + 1
+    if chunk:
+        yield chunk
+
+
+def _json_body(envelope: Dict[str, Any], items_key: str, encoded_items: List[bytes]) -> bytes:
+    """Splice already-encoded items into `{...envelope, items_key: [...]}` without re-encoding them"""
+    head = dumps(envelope)[:-1]
+    if len(head) > 1:
+        head += b","
+    return head + dumps(items_key) + b":[" + b",".join(encoded_items) + b"]}"
+
+
+def _decode_response(body: bytes) -> Any:
+    try:
+        return orjson.loads(body)
+    except orjson.JSONDecodeError:
+        return {"raw": body.decode("utf-8", errors="replace")}
+
+
+async def _send(session: aiohttp.ClientSession, path: str, body: bytes, content_type: str,
+                idempotency_key: Optional[str], encoding: str) -> Tuple[int, Any]:
+    with tracer.start_as_current_span("express POST", attributes={"http.method": "POST", "express.path": path}) as span:
+        # Trace context and run ID let Express log its side of the same run
+        headers = {"Content-Type": content_type, **propagation_headers()}
+        if idempotency_key:
+            headers["Idempotency-Key"] = idempotency_key
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+
+        EXPRESS_BODY_BYTES.labels(path).observe(len(body))
+        span.set_attribute("express.body_bytes", len(body))
+        started = time.monotonic()
+        async with session.post(f"{settings.EXPRESS_URL}{path}", data=body, headers=headers) as resp:
+            result = resp.status, _decode_response(await resp.read())
+        EXPRESS_REQUEST_SECONDS.labels(path).observe(time.monotonic() - started)
+        EXPRESS_REQUESTS.labels(path, str(result[0])).inc()
+        span.set_attribute("http.status_code", result[0])
+        return result
+
+
+async def post_body(session: aiohttp.ClientSession, path: str, body: bytes, *,
+                    idempotency_key: Optional[str] = None,
+                    encoding: Optional[str] = None,
+                    sent: Optional[List[int]] = None) -> Tuple[int, Any]:
+    """POST an already-encoded JSON body, compressing it when it's big enough to pay off.
+
+    The size of the body as sent is appended to `sent` when given.
+    """
+    encoding = encoding or settings.EXPRESS_COMPRESSION
+    if encoding != "gzip" or len(body) < settings.EXPRESS_COMPRESS_MIN_BYTES:
+        encoding = "identity"
+    else:
+        body = compress(body, encoding)
+    if sent is not None:
+        sent.append(len(body))
+    return await _send(session, path, body, "application/json", idempotency_key, encoding)
+
+
+async def post_json(session: aiohttp.ClientSession, path: str, payload: Dict[str, Any], *,
+                    idempotency_key: Optional[str] = None,
+                    encoding: Optional[str] = None) -> Tuple[int, Any]:
+    """POST an orjson-encoded, optionally compressed body to Express"""
+    return await post_body(session, path, dumps(payload), idempotency_key=idempotency_key, encoding=encoding)
+
+
+async def post_items(session: aiohttp.ClientSession, path: str, items_key: str, items: List[Any],
+                     envelope: Dict[str, Any], *, idempotency_key: Optional[str] = None,
+                     sent: Optional[List[int]] = None) -> List[Tuple[int, Any]]:
+    """Send a list payload to Express, split into requests of at most EXPRESS_MAX_BODY_BYTES.
+
+    Each item is serialized once; parts are spliced from the encoded bytes. Each
+    part gets its own idempotency key suffix so a retried part can be recognized.
+    Body sizes as sent are appended to `sent` when given.
+    """
+    encoded_items = [dumps(item) for item in items]
+    parts = list(split_by_bytes(encoded_items, settings.EXPRESS_MAX_BODY_BYTES))
+    results = []
+    for index, part in enumerate(parts):
+        key = f"{idempotency_key}:{index}" if idempotency_key and len(parts) > 1 else idempotency_key
+        results.append(await post_body(session, path, _json_body(envelope, items_key, part),
+                                       idempotency_key=key, sent=sent))
+    return results
+
+
+def all_ok(results: List[Tuple[int, Any]]) -> bool:
+    return all(status < 400 for status, _ in results)
@@ -0,0 +1,345 @@
+import asyncio
+import base64
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import git
+
+from app.core.config import settings
+from app.services.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# Branches and tags only: GitHub also advertises refs/pull/*, one per PR ever opened
+_REFSPECS = ["+refs/heads/*:refs/heads/*", "+refs/tags/*:refs/tags/*"]
+
+_STATUS = {"A": "added", "D": "removed", "M": "modified", "R": "renamed", "C": "copied", "T": "changed"}
+
+# Field and record separators for `git log --format`; neither can appear in a commit header
+_FIELD = "\x1f"
+_RECORD = "\x1e"
+_LOG_FORMAT = _FIELD.join(["%H", "%an", "%ae", "%aI", "%cn", "%cI", "%B"]) + _RECORD
+
+
+_FULL_SHA = re.compile(r"^[0-9a-f]{40}$")
+# A full SHA, optionally followed by ~N / ^N steps: names the same commit forever
+_PINNED = re.compile(r"^[0-9a-f]{40}(?:[~^]\d*)*$")
+
+
+def is_commit_sha(ref: Optional[str]) -> bool:
+    """A full commit SHA; branches, tags and `~N` expressions can move, SHAs can't"""
+    return bool(ref) and bool(_FULL_SHA.match(ref.lower()))
+
+
+def _utc(iso: str) -> str:
+    """git's strict ISO 8601 with an offset -> GitHub's UTC form"""
+    return datetime.fromisoformat(iso).astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _auth_env(token: str) -> Dict[str, str]:
+    """Send the installation token as a header for one command, so it is never written to the mirror's config"""
+    if not token:
+        return {}
+    credentials = base64.b64encode(f"x-access-token:{token}".encode()).decode()
+    return {
+        "GIT_TERMINAL_PROMPT": "0",
+        "GIT_CONFIG_COUNT": "1",
+        "GIT_CONFIG_KEY_0": "http.extraHeader",
+        "GIT_CONFIG_VALUE_0": f"Authorization: Basic {credentials}",
+    }
+
+
+class GitMirror:
+    """A bare clone of one repository, kept current with incremental fetches.
+
+    Cloned on first use with the installation token; afterwards `sync` fetches
+    only objects the mirror doesn't have yet. Trees, blobs, history and diffs
+    are then read from the local object store, in the same shapes the REST
+    helpers in github_api return. Git commands block, so every read runs in a
+    thread, one at a time per mirror.
+    """
+
+    def __init__(self, owner: str, repo: str):
+        self.owner = owner
+        self.repo = repo
+        self.path = os.path.join(settings.GIT_MIRROR_DIR, owner, f"{repo}.git")
+        self.remote = settings.GIT_MIRROR_REMOTE.format(owner=owner, repo=repo)
+        self._repo: Optional[git.Repo] = None
+        self._io = threading.Lock()
+        self._sync_lock = asyncio.Lock()
+        self._synced_at = 0.0
+
+    @property
+    def cloned(self) -> bool:
+        return os.path.isfile(os.path.join(self.path, "HEAD"))
+
+    def _open(self) -> git.Repo:
+        if self._repo is None:
+            self._repo = git.Repo(self.path)
+        return self._repo
+
+    def _clone_or_fetch(self, token: str) -> None:
+        env = _auth_env(token)
+        with self._io:
+            if not self.cloned:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                # --bare points HEAD at the default branch, which --mirror's refs/* would also bring PR refs for
+                git.Repo.clone_from(self.remote, self.path, bare=True, env=env)
+                repo = self._open()
+                with repo.config_writer() as config:
+                    config.set_value('remote "origin"', "fetch", _REFSPECS[0])
+                    config.add_value('remote "origin"', "fetch", _REFSPECS[1])
+                    config.set_value("gc", "auto", "0")
+            else:
+                repo = self._open()
+                repo.git.fetch("origin", "--prune", "--no-tags", *_REFSPECS, env=env)
+
+    async def sync(self, token: str, force: bool = False) -> None:
+        """Clone, or fetch new objects, at most once per GIT_MIRROR_FETCH_INTERVAL seconds"""
+        async with self._sync_lock:
+            if not force and self.cloned and time.monotonic() - self._synced_at < settings.GIT_MIRROR_FETCH_INTERVAL:
+                return
+            action = "fetch" if self.cloned else "clone"
+            with tracer.start_as_current_span(f"git {action}", attributes={"git.repository": f"{self.owner}/{self.repo}"}):
+                started = time.monotonic()
+                await asyncio.to_thread(self._clone_or_fetch, token)
+            self._synced_at = time.monotonic()
+            logger.info(f"git {action} of {self.owner}/{self.repo} took {self._synced_at - started:.1f}s")
+
+    async def _run(self, func, *args):
+        def locked():
+            with self._io:
+                return func(self._open(), *args)
+        return await asyncio.to_thread(locked)
+
+    # --- reads ------------------------------------------------------------------
+
+    @staticmethod
+    def _has_commit(repo: git.Repo, rev: str) -> bool:
+        try:
+            repo.git.rev_parse("--verify", "--quiet", f"{rev}^{{commit}}")
+            return True
+        except git.GitCommandError:
+            return False
+
+    async def has_commit(self, rev: str) -> bool:
+        return self.cloned and await self._run(self._has_commit, rev)
+
+    @staticmethod
+    def _tree(repo: git.Repo, ref: str, exts: Tuple[str, ...]) -> Dict[str, Any]:
+        files = []
+        # <mode> SP <type> SP <sha> SP <size> TAB <path>, NUL-terminated so any path survives
+        for entry in repo.git.ls_tree("-r", "-l", "-z", ref).split("\0"):
+            if not entry:
+                continue
+            meta, path = entry.split("\t", 1)
+            _, kind, sha, size = meta.split()
+            if kind == "blob" and path.endswith(exts):
+                files.append({"path": path, "sha": sha, "size": int(size)})
+        return {"sha": repo.git.rev_parse(f"{ref}^{{tree}}"), "files": files}
+
+    async def tree(self, ref: str, exts: Tuple[str, ...]) -> Dict[str, Any]:
+        """Same shape as fetch_repo_tree"""
+        return await self._run(self._tree, ref, exts)
+
+    @staticmethod
+    def _blobs(repo: git.Repo, items: List[Dict]) -> Dict[str, bytes]:
+        found = {}
+        for item in items:
+            try:
+                # The object database keeps one `git cat-file --batch` process open for all reads
+                found[item["sha"]] = repo.odb.stream(bytes.fromhex(item["sha"])).read()
+            except (ValueError, OSError):
+                continue
+        return found
+
+    async def blobs(self, items: List[Dict]) -> Dict[str, bytes]:
+        """Raw content by blob SHA for the items whose objects are in the mirror"""
+        if not self.cloned:
+            return {}
+        return await self._run(self._blobs, items)
+
+    @staticmethod
+    def _log(repo: git.Repo, ref: str, with_stats: bool) -> List[Dict[str, Any]]:
+        commits = []
+        for record in repo.git.log(f"--format={_LOG_FORMAT}", ref).split(_RECORD):
+            record = record.strip("\n")
+            if not record:
+                continue
+            sha, author, email, author_date, committer, committer_date, rest = record.split(_FIELD, 6)
+            commits.append({
+                "sha": sha,
+                "message": rest.rstrip("\n"),
+                "author": {"name": author, "email": email, "date": _utc(author_date)},
+                "committer": {"name": committer, "date": _utc(committer_date)},
+            })
+        if with_stats:
+            _attach_numstat(repo, commits, ref)
+        return commits
+
+    async def commits(self, ref: str = "HEAD", with_stats: bool = False) -> List[Dict[str, Any]]:
+        """History of `ref`, newest first, in get_all_commits' shape.
+
+        With `with_stats`, each commit also gets "files" (filename, additions,
+        deletions) and "stats" totals, as GitHub's single-commit endpoint has.
+        """
+        return await self._run(self._log, ref, with_stats)
+
+    @staticmethod
+    def _count_touching(repo: git.Repo, path: str, since_iso: str, ref: str) -> int:
+        return int(repo.git.rev_list("--count", f"--since={since_iso}", ref, "--", path) or 0)
+
+    async def count_commits_touching(self, path: str, since_iso: str, ref: str = "HEAD") -> int:
+        """Same as fetch_recent_commits_touching_file: commits reachable from `ref` since a date"""
+        return await self._run(self._count_touching, path, since_iso, ref)
+
+    @staticmethod
+    def _compare(repo: git.Repo, base: str, head: str) -> Dict[str, Any]:
+        merge_base = repo.git.merge_base(base, head)
+        head_sha = repo.git.rev_parse(f"{head}^{{commit}}")
+        files = _diff_files(repo, merge_base, head_sha)
+        ahead = int(repo.git.rev_list("--count", f"{merge_base}..{head_sha}"))
+        behind = int(repo.git.rev_list("--count", f"{head_sha}..{base}"))
+        commits = []
+        # %B, the full message, as GitHub's commit.message has it
+        log = repo.git.log("--reverse", f"--format=%H{_FIELD}%B{_RECORD}", f"{merge_base}..{head_sha}")
+        for record in log.split(_RECORD):
+            record = record.strip("\n")
+            if record:
+                sha, message = record.split(_FIELD, 1)
+                commits.append({"sha": sha, "commit": {"message": message.rstrip("\n")}})
+        return {
+            "base_commit": {"sha": repo.git.rev_parse(f"{base}^{{commit}}")},
+            "merge_base_commit": {"sha": merge_base},
+            "status": "identical" if not ahead and not behind else "ahead" if not behind else "behind" if not ahead else "diverged",
+            "ahead_by": ahead,
+            "behind_by": behind,
+            "total_commits": ahead,
+            "commits": commits,
+            "files": files,
+        }
+
+    async def merge_base(self, base: str, head: str) -> str:
+        return await self._run(lambda repo: repo.git.merge_base(base, head))
+
+    async def compare(self, base: str, head: str) -> Dict[str, Any]:
+        """Same shape as GitHub's compare endpoint (base...head): the diff from the merge base"""
+        return await self._run(self._compare, base, head)
+
+
+def _numstat_entries(output: str) -> List[Tuple[Optional[int], Optional[int]]]:
+    """(additions, deletions) per file from `--numstat -z`; binary files count as None"""
+    entries = []
+    fields = output.split("\0")
+    i = 0
+    while i < len(fields):
+        field = fields[i]
+        i += 1
+        if not field.strip():
+            continue
+        added, deleted, path = field.split("\t", 2)
+        if not path:
+            # Rename or copy: the old and new paths follow as separate fields
+            i += 2
+        entries.append((None if added == "-" else int(added), None if deleted == "-" else int(deleted)))
+    return entries
+
+
+def _diff_files(repo: git.Repo, base: str, head: str) -> List[Dict[str, Any]]:
+    names = repo.git.diff("-M", "--name-status", "-z", base, head).split("\0")
+    numstat = _numstat_entries(repo.git.diff("-M", "--numstat", "-z", base, head))
+    # Same order as the two listings above; the header lines up to the first hunk are dropped, as GitHub does
+    patches = []
+    for chunk in ("\n" + repo.git.diff("-M", base, head)).split("\ndiff --git ")[1:]:
+        hunk = chunk.find("\n@@")
+        patches.append(chunk[hunk + 1:] if hunk != -1 else None)
+
+    files = []
+    i = 0
+    while i < len(names) and names[i]:
+        code = names[i][0]
+        if code in "RC":
+            previous, filename = names[i + 1], names[i + 2]
+            i += 3
+        else:
+            previous, filename = None, names[i + 1]
+            i += 2
+        additions, deletions = numstat[len(files)] if len(files) < len(numstat) else (None, None)
+        entry = {
+            "filename": filename,
+            "status": _STATUS.get(code, "modified"),
+            "additions": additions or 0,
+            "deletions": deletions or 0,
+            "changes": (additions or 0) + (deletions or 0),
+        }
+        patch = patches[len(files)] if len(files) < len(patches) else None
+        if patch:
+            entry["patch"] = patch
+        if previous is not None:
+            entry["previous_filename"] = previous
+        files.append(entry)
+    return files
+
+
+def _attach_numstat(repo: git.Repo, commits: List[Dict[str, Any]], ref: str) -> None:
+    by_sha = {c["sha"]: c for c in commits}
+    for c in commits:
+        c["files"] = []
+    current = None
+    # One pass over the whole history: a commit line, then one numstat line per changed file
+    for line in repo.git.log("--numstat", "--format=%x00%H", "--no-renames", ref).splitlines():
+        if line.startswith("\0"):
+            current = by_sha.get(line[1:])
+        elif line and current is not None:
+            added, deleted, path = line.split("\t", 2)
+            current["files"].append({
+                "filename": path,
+                "additions": 0 if added == "-" else int(added),
+                "deletions": 0 if deleted == "-" else int(deleted),
+            })
+    for c in commits:
+        additions = sum(f["additions"] for f in c["files"])
+        deletions = sum(f["deletions"] for f in c["files"])
+        c["stats"] = {"additions": additions, "deletions": deletions, "total": additions + deletions}
+
+
+_mirrors: Dict[Tuple[str, str], GitMirror] = {}
+
+
+def mirror_for(owner: str, repo: str) -> GitMirror:
+    key = (owner, repo)
+    mirror = _mirrors.get(key)
+    if mirror is None:
+        mirror = _mirrors[key] = GitMirror(owner, repo)
+    return mirror
+
+
+async def synced_mirror(owner: str, repo: str, token: str, *revs: str) -> Optional[GitMirror]:
+    """The repository's mirror, brought up to date for `revs`, or None when mirroring is off or git failed.
+
+    A mirror up to GIT_MIRROR_FETCH_INTERVAL old is fine for commits named by
+    SHA, but a branch or HEAD read from it could be the one before the push
+    that triggered the run; those always fetch first. So does a SHA the mirror
+    doesn't have yet.
+    """
+    if not settings.GIT_MIRROR_ENABLED:
+        return None
+    mirror = mirror_for(owner, repo)
+    force = any(not _PINNED.match(rev.lower()) for rev in revs)
+    try:
+        await mirror.sync(token, force=force)
+        if not force:
+            for rev in revs:
+                if not await mirror.has_commit(rev):
+                    # Pushed since the last fetch
+                    await mirror.sync(token, force=True)
+                    break
+    except (git.GitCommandError, OSError) as e:
+        logger.warning(f"Git mirror of {owner}/{repo} unavailable, using the REST API: {str(e)}")
+        return None
+    return mirror
@@ -1,33 +1,255 @@
-from typing import Optional, List, Dict, Any
-import httpx, aiohttp
-from app.services.github_auth import _gh_headers
+from typing import AsyncIterator, Optional, List, Dict, Any
+import aiohttp
+from app.core.config import settings
+from app.services.github_auth import _gh_headers, installation_for_token
+from app.services.blob_store import BlobStore
+from app.services.github_governor import governor_for
+from app.services.git_mirror import mirror_for, synced_mirror
+from app.services.github_cache import github_cache
+from app.services.compare_cache import compare_cache
+from app.services.path_rules import PathClassifier, classifier_for
+from app.services.tracing import add_span_attributes, traced, tracer
+from app.services.metrics import BLOB_FETCH_BYTES, CACHE_LOOKUPS, GITHUB_RATE_LIMIT_RETRIES, GITHUB_REQUESTS, GITHUB_REQUEST_SECONDS, github_endpoint
 import base64
+import json
 import logging
 import asyncio
+import re
+import time
 
 logger = logging.getLogger(__name__)
 
-GITHUB_API = "https://api.github.com/"
+GITHUB_API = settings.GITHUB_API_URL.rstrip("/") + "/"
+# The compare endpoint lists at most this many files, however many changed
+COMPARE_FILES_LIMIT = 300
+COMPARE_COMMITS_PER_PAGE = 100
+
+
+class GitHubResponse:
+    """Fully read response of a governed GitHub request"""
+
+    def __init__(self, status: int, headers, body: bytes, from_cache: bool = False):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.from_cache = from_cache
+
+    def json(self):
+        return json.loads(self.body)
+
+    def text(self) -> str:
+        return self.body.decode("utf-8", errors="replace")
+
+
+async def _gh_request(session: aiohttp.ClientSession, url: str, token: str, *, method: str = "GET",
+                      params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None,
+                      json_body: Optional[Dict[str, Any]] = None, conditional: bool = False) -> GitHubResponse:
+    """Send a GitHub API request through the installation's rate-limit governor.
+
+    Primary and secondary rate limits (403/429) are retried after the delay GitHub
+    asks for; any other status is returned to the caller as-is. With `conditional`,
+    a GET is revalidated against the local ETag cache and a 304 is served from it
+    as a 200.
+    """
+    installation = installation_for_token(token)
+    governor = governor_for(installation)
+    endpoint = github_endpoint(url)
+    started = time.monotonic()
+    request_headers = {**_gh_headers(token), **(headers or {})}
+
+    cache_key = cached = None
+    if conditional and method == "GET":
+        cache_key = github_cache.key(installation, url, params)
+        cached = await github_cache.get(cache_key)
+        if cached is not None:
+            request_headers.update(github_cache.validators(cached))
+
+    with tracer.start_as_current_span(f"github {method}", attributes={"http.method": method, "github.endpoint": endpoint}) as span:
+        attempt = 0
+        while True:
+            async with governor:
+                async with session.request(method, url, headers=request_headers, params=params, json=json_body) as resp:
+                    body = await resp.read()
+                    status, resp_headers = resp.status, resp.headers
+            governor.update(resp_headers)
+
+            if status in (403, 429) and attempt < settings.GITHUB_MAX_RETRIES:
+                delay = governor.retry_delay(status, resp_headers, body.decode("utf-8", errors="ignore"), attempt)
+                if delay is not None:
+                    logger.warning(f"GitHub rate limit on {url} ({status}), retrying in {delay:.0f}s")
+                    GITHUB_RATE_LIMIT_RETRIES.labels(endpoint).inc()
+                    attempt += 1
+                    continue
+
+            GITHUB_REQUEST_SECONDS.labels(endpoint).observe(time.monotonic() - started)
+            GITHUB_REQUESTS.labels(endpoint, method, str(status)).inc()
+
+            if cache_key is not None:
+                if status == 304 and cached is not None:
+                    github_cache.hits += 1
+                    CACHE_LOOKUPS.labels("github_etag", "hit").inc()
+                    response = GitHubResponse(200, resp_headers, cached.body, from_cache=True)
+                    break
+                github_cache.misses += 1
+                CACHE_LOOKUPS.labels("github_etag", "miss").inc()
+                if status == 200:
+                    await github_cache.put(cache_key, resp_headers.get("ETag"), resp_headers.get("Last-Modified"), body)
+
+            response = GitHubResponse(status, resp_headers, body)
+            break
+
+        span.set_attributes({"http.status_code": response.status, "github.from_cache": response.from_cache, "github.retries": attempt})
+        return response
+
 
 async def fetch_commit_diff(owner: str, repo: str, base: str, head: str, token: str) -> Dict[str, Any]:
-    url = f"https://api.github.com/repos/{owner}/{repo}/compare/{base}...{head}"
-
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        r = await client.get(url, headers=_gh_headers(token))
-        r.raise_for_status()
-        return r.json() 
-    
-async def fetch_recent_commits_touching_file(owner: str, repo: str, path: str, since_iso: str, token: str) -> int:
-    url = f"https://api.github.com/repos/{owner}/{repo}/commits"
+    """GitHub's compare (base...head), complete past its 300-file limit.
+
+    SHA...SHA results come from compare_cache once fetched; refs are always
+    resolved afresh.
+    """
+    cached = compare_cache.get(owner, repo, base, head)
+    if cached is not None:
+        CACHE_LOOKUPS.labels("compare", "hit").inc()
+        return cached
+    if compare_cache.key(owner, repo, base, head) is not None:
+        CACHE_LOOKUPS.labels("compare", "miss").inc()
+
+    mirror = await synced_mirror(owner, repo, token, base, head)
+    if mirror is not None and await mirror.has_commit(base) and await mirror.has_commit(head):
+        result = await mirror.compare(base, head)
+    else:
+        result = await _fetch_compare(owner, repo, base, head, token)
+    compare_cache.put(owner, repo, base, head, result)
+    return result
+
+
+async def fetch_merge_base(owner: str, repo: str, base: str, head: str, token: str) -> str:
+    """The commit a base...head diff starts from, as GitHub's merge_base_commit"""
+    mirror = await synced_mirror(owner, repo, token, base, head)
+    if mirror is not None and await mirror.has_commit(base) and await mirror.has_commit(head):
+        return await mirror.merge_base(base, head)
+
+    url = f"{GITHUB_API}repos/{owner}/{repo}/compare/{base}...{head}"
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as session:
+        # One commit per page: only the merge base is wanted
+        r = await _gh_request(session, url, token, params={"per_page": 1})
+        if r.status != 200:
+            raise Exception(f"GitHub API error {r.status}: {r.text()}")
+        return r.json()["merge_base_commit"]["sha"]
+
+
+async def _fetch_compare(owner: str, repo: str, base: str, head: str, token: str) -> Dict[str, Any]:
+    url = f"{GITHUB_API}repos/{owner}/{repo}/compare/{base}...{head}"
+
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as session:
+        r = await _gh_request(session, url, token, params={"per_page": COMPARE_COMMITS_PER_PAGE})
+        if r.status != 200:
+            raise Exception(f"GitHub API error {r.status}: {r.text()}")
+        result = r.json()
+
+        # Later pages only carry more commits; files are listed on the first page
+        commits = result.get("commits") or []
+        page = 1
+        while len(commits) < result.get("total_commits", 0):
+            page += 1
+            r = await _gh_request(session, url, token, params={"per_page": COMPARE_COMMITS_PER_PAGE, "page": page})
+            if r.status != 200:
+                raise Exception(f"GitHub API error {r.status}: {r.text()}")
+            more = r.json().get("commits") or []
+            if not more:
+                break
+            commits += more
+        result["commits"] = commits
+
+        if len(result.get("files") or []) >= COMPARE_FILES_LIMIT:
+            await _complete_compare_files(session, owner, repo, result, token)
+    return result
+
+
+async def _complete_compare_files(session: aiohttp.ClientSession, owner: str, repo: str,
+                                  result: Dict[str, Any], token: str) -> None:
+    """Add the files a truncated compare left out, from each commit's own file list.
+
+    The commit endpoint pages through up to 3000 files. A file that only shows
+    up there gets its additions and deletions summed over the commits and the
+    status of the latest one (a file added in the range stays "added"); it has
+    no patch. Merge commits are skipped: the commits they bring in are in the
+    range too.
+    """
+    async def commit_files(sha: str) -> List[Dict[str, Any]]:
+        url = f"{GITHUB_API}repos/{owner}/{repo}/commits/{sha}"
+        files, page = [], 1
+        while True:
+            r = await _gh_request(session, url, token, params={"per_page": 100, "page": page})
+            if r.status != 200:
+                raise Exception(f"GitHub API error {r.status}: {r.text()}")
+            batch = r.json().get("files") or []
+            files += batch
+            if len(batch) < 100:
+                return files
+            page += 1
+
+    listed = {f["filename"] for f in result["files"]}
+    extra: Dict[str, Dict[str, Any]] = {}
+    # Oldest first, so the latest commit's status wins
+    per_commit = await asyncio.gather(*(
+        commit_files(c["sha"]) for c in result["commits"] if len(c.get("parents") or []) < 2
+    ))
+    for files in per_commit:
+        for f in files:
+            name = f["filename"]
+            if name in listed:
+                continue
+            entry = extra.get(name)
+            if entry is None:
+                extra[name] = {
+                    "filename": name,
+                    "status": f.get("status", "modified"),
+                    "additions": f.get("additions", 0),
+                    "deletions": f.get("deletions", 0),
+                    "changes": f.get("changes", 0),
+                }
+                if f.get("previous_filename"):
+                    extra[name]["previous_filename"] = f["previous_filename"]
+                continue
+            if entry["status"] == "added" and f.get("status") == "removed":
+                # Added and removed again within the range, so not part of the diff
+                del extra[name]
+                continue
+            entry["additions"] += f.get("additions", 0)
+            entry["deletions"] += f.get("deletions", 0)
+            entry["changes"] += f.get("changes", 0)
+            if entry["status"] != "added":
+                entry["status"] = f.get("status", "modified")
+
+    result["files"] += extra.values()
+    logger.info(f"Compare of {owner}/{repo} listed {len(listed)} files; {len(extra)} more from its commits")
+
+
+async def fetch_recent_commits_touching_file(owner: str, repo: str, path: str, since_iso: str, token: str,
+                                             ref: str = "HEAD") -> int:
+    """Commits reachable from `ref` (the default branch unless given) that touched `path` since a date.
+
+    Pass a commit SHA when there is one: a branch makes the mirror fetch first on every call.
+    """
+    mirror = await synced_mirror(owner, repo, token, ref)
+    if mirror is not None and await mirror.has_commit(ref):
+        return await mirror.count_commits_touching(path, since_iso, ref)
+
+    url = f"{GITHUB_API}repos/{owner}/{repo}/commits"
     params = {"path": path, "since": since_iso, "per_page": 100}
+    if ref != "HEAD":
+        params["sha"] = ref
     count = 0
-    async with httpx.AsyncClient(timeout=30.0) as client:
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as session:
         page = 1
         while True:
             rp = dict(params)
             rp["page"] = page
-            r = await client.get(url, headers=_gh_headers(token), params=rp)
-            r.raise_for_status()
+            r = await _gh_request(session, url, token, params=rp)
+            if r.status != 200:
+                raise Exception(f"GitHub API error {r.status}: {r.text()}")
             items = r.json()
             count += len(items)
             if len(items) < 100:
@@ -35,113 +257,169 @@ async def fetch_recent_commits_touching_file(owner: str, repo: str, path: str, s
             page += 1
     return count
 
-async def fetch_repo_code(owner:str, repo:str, branch:str, token:str, exts=(".py", ".js", ".ts", ".tsx", ".jsx")):
-    headers = _gh_headers(token)
-
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        url = f"https://api.github.com/repos/{owner}/{repo}/git/trees/{branch}?recursive=1"
-        r = await client.get(url, headers = headers)
-        r.raise_for_status()
-        tree = r.json()["tree"]
-
-        files = []
-        for item in tree:
-            if item["type"] == "blob" and item["path"].endswith(exts):
-                blob_url = f"https://api.github.com/repos/{owner}/{repo}/git/blobs/{item['sha']}"
-                rb = await client.get(blob_url, headers=headers)
-                rb.raise_for_status()
-                blob = rb.json()
-
-                content = base64.b64decode(blob["content"]).decode("utf-8", errors="ignore")
-                files.append({
-                    "path": item["path"],
-                    "content": content
-                })
+@traced("fetch_repo_tree")
+async def fetch_repo_tree(owner: str, repo: str, branch: str, token: str, exts=(".py", ".js", ".ts", ".tsx", ".jsx")) -> Dict[str, Any]:
+    """List the analyzable blobs of a branch without downloading their content"""
+    mirror = await synced_mirror(owner, repo, token, branch)
+    if mirror is not None and await mirror.has_commit(branch):
+        return await mirror.tree(branch, exts)
+
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as session:
+        url = f"{GITHUB_API}repos/{owner}/{repo}/git/trees/{branch}?recursive=1"
+        r = await _gh_request(session, url, token, conditional=True)
+        if r.status != 200:
+            raise Exception(f"GitHub API error {r.status}: {r.text()}")
+        data = r.json()
+
+    files = [
+        {"path": item["path"], "sha": item["sha"], "size": item.get("size", 0)}
+        for item in data["tree"]
+        if item["type"] == "blob" and item["path"].endswith(exts)
+    ]
+    return {"sha": data["sha"], "files": files}
+
+@traced("fetch_blobs")
+async def fetch_blobs(owner: str, repo: str, items: List[Dict], token: str,
+                      store: Optional[BlobStore] = None) -> List[Dict]:
+    """Download and decode the blobs listed by fetch_repo_tree.
+
+    With GIT_MIRROR_ENABLED, blobs already in the repository's mirror are read
+    from disk and only the rest (e.g. from a fork's PR head) are downloaded.
+    With a `store`, each blob is written to it as soon as it is decoded and
+    "content" is a BlobRef rather than a str.
+    """
+
+    def content(sha: str, raw: bytes):
+        if store is not None:
+            return store.put(sha, raw)
+        return raw.decode("utf-8", errors="ignore")
+
+    async def fetch_blob(session, item):
+        with tracer.start_as_current_span("fetch_blob", attributes={"code.filepath": item["path"]}) as span:
+            blob_url = f"{GITHUB_API}repos/{owner}/{repo}/git/blobs/{item['sha']}"
+            rb = await _gh_request(session, blob_url, token)
+            if rb.status != 200:
+                raise Exception(f"GitHub API error {rb.status} for {item['path']}: {rb.text()}")
+            blob = rb.json()
+
+            raw = base64.b64decode(blob["content"])
+            BLOB_FETCH_BYTES.observe(len(raw))
+            span.set_attribute("github.blob_bytes", len(raw))
+            return {
+                "path": item["path"],
+                "content": content(item["sha"], raw)
+            }
+
+    local = await mirror_for(owner, repo).blobs(items) if settings.GIT_MIRROR_ENABLED else {}
+    missing = [item for item in items if item["sha"] not in local]
+    add_span_attributes({"github.blob_count": len(missing), "git.mirror_blob_count": len(items) - len(missing)})
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=60)) as session:
+        fetched = iter(await asyncio.gather(*(fetch_blob(session, item) for item in missing)))
+
+    return [
+        {"path": item["path"], "content": content(item["sha"], local[item["sha"]])}
+        if item["sha"] in local else next(fetched)
+        for item in items
+    ]
+
+async def fetch_repo_code(owner:str, repo:str, branch:str, token:str, exts=(".py", ".js", ".ts", ".tsx", ".jsx"),
+                          store: Optional[BlobStore] = None):
+    """Content of every analyzable file on a branch, from the git mirror when enabled"""
+    tree = await fetch_repo_tree(owner, repo, branch, token, exts)
+    return await fetch_blobs(owner, repo, tree["files"], token, store)
+
+@traced("fetch_changed_files_code")
+async def fetch_changed_files_code(repoFullName: str, repoId: str, token: str, addedFiles: List, modifiedFiles: List,
+                                   session: Optional[aiohttp.ClientSession] = None):
+    """Content of the added and modified files; pass `session` to share one connection pool across calls"""
+
+    async def fetch_single_file(session, file_path):
+        try:
+            # Construct GitHub API URL to fetch raw file content
+            url = f"{GITHUB_API}repos/{repoFullName}/contents/{file_path}"
+            response = await _gh_request(session, url, token)
+
+            if response.status == 200:
+                data = response.json()
+
+                # GitHub returns base64 encoded content
+                if data.get('encoding') == 'base64' and 'content' in data:
+                    raw = base64.b64decode(data['content'])
+                    BLOB_FETCH_BYTES.observe(len(raw))
+                    content = raw.decode('utf-8')
+
+                    return {
+                        'path': file_path,
+                        'content': content,
+                        'size': data.get('size', 0),
+                        'sha': data.get('sha'),
+                        'status': 'added' if file_path in addedFiles else 'modified'
+                    }
+                print(f"Unexpected encoding for {file_path}: {data.get('encoding')}")
+
+            elif response.status == 404:
+                print(f"File not found: {file_path}")
+
+            else:
+                # Rate limits were already retried by the governor
+                logger.error(f"Failed to fetch {file_path}: status {response.status}: {response.text()}")
+
+        except Exception as file_error:
+            print(f"Error fetching {file_path}: {str(file_error)}")
+        return None
 
-        return files
-    
-async def fetch_changed_files_code(repoFullName: str, repoId: str, token: str, addedFiles: List, modifiedFiles: List):
-    headers = _gh_headers(token)
-    files = []
-    
     try:
         # Combine added and modified files (both need to be fetched)
         all_files_to_fetch = list(set(addedFiles) | set(modifiedFiles))
-        
+
+        # Check if file should be analyzed (skip binaries, large files, etc.)
+        paths = classifier_for(repoFullName)
+        analyzable = []
         for file_path in all_files_to_fetch:
-            try:
-                # Check if file should be analyzed (skip binaries, large files, etc.)
-                if not _should_analyze_file(file_path):
-                    print(f"Skipping {file_path} - not analyzable")
-                    continue
-                
-                # Construct GitHub API URL to fetch raw file content
-                url = f"https://api.github.com/repos/{repoFullName}/contents/{file_path}"
-                
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url, headers=headers) as response:
-                        if response.status == 200:
-                            data = await response.json()
-                            
-                            # GitHub returns base64 encoded content
-                            if data.get('encoding') == 'base64' and 'content' in data:
-                                import base64
-                                content = base64.b64decode(data['content']).decode('utf-8')
-                                
-                                files.append({
-                                    'path': file_path,
-                                    'content': content,
-                                    'size': data.get('size', 0),
-                                    'sha': data.get('sha'),
-                                    'status': 'added' if file_path in addedFiles else 'modified'
-                                })
-                            else:
-                                print(f"Unexpected encoding for {file_path}: {data.get('encoding')}")
-                        
-                        elif response.status == 404:
-                            print(f"File not found: {file_path}")
-                        
-                        elif response.status == 403:
-                            print(f"Rate limit or permission issue for {file_path}")
-                            # Optional: break or wait
-                        
-                        else:
-                            print(f"Failed to fetch {file_path}: status {response.status}")
-            
-            except Exception as file_error:
-                print(f"Error fetching {file_path}: {str(file_error)}")
+            if not _should_analyze_file(file_path, paths):
+                print(f"Skipping {file_path} - not analyzable")
                 continue
-        
+            analyzable.append(file_path)
+
+        if session is not None:
+            results = await asyncio.gather(*(fetch_single_file(session, p) for p in analyzable))
+        else:
+            async with aiohttp.ClientSession() as own_session:
+                results = await asyncio.gather(*(fetch_single_file(own_session, p) for p in analyzable))
+
+        files = [r for r in results if r is not None]
+        if len(files) < len(analyzable):
+            logger.warning(f"Fetched {len(files)}/{len(analyzable)} changed files for {repoFullName}")
         return files
-    
+
     except Exception as e:
         print(f"Error in fetch_changed_files_code: {str(e)}")
         return []
 
 
-def _should_analyze_file(file_path: str) -> bool:
+def _should_analyze_file(file_path: str, paths: Optional[PathClassifier] = None) -> bool:
     """Check if file should be analyzed based on extension and path"""
-    analyzable_extensions = {
+    analyzable_extensions = (
         '.js', '.jsx', '.ts', '.tsx',
         '.py'
-    }
-    
-    skip_patterns = [
-        'node_modules/', '.git/', 'dist/', 'build/',
-        'vendor/', '__pycache__/', '.min.js', '.bundle.js'
-    ]
-    
-    # Skip if matches any skip pattern
-    if any(pattern in file_path for pattern in skip_patterns):
+    )
+
+    # Skip vendored, generated and minified files
+    if (paths or classifier_for()).classify(file_path)["skip"]:
         return False
-    
+
     # Check if file has analyzable extension
-    return any(file_path.endswith(ext) for ext in analyzable_extensions)
+    return file_path.endswith(analyzable_extensions)
 
 
+@traced("get_all_commits")
 async def get_all_commits(owner: str, repo: str, token: str):
+    mirror = await synced_mirror(owner, repo, token, "HEAD")
+    if mirror is not None:
+        # An empty repository clones fine but has no HEAD commit
+        return await mirror.commits() if await mirror.has_commit("HEAD") else []
+
     url = f"{GITHUB_API}repos/{owner}/{repo}/commits"
-    headers = _gh_headers(token)
     commits = []
     page = 1
 
@@ -151,58 +429,56 @@ async def get_all_commits(owner: str, repo: str, token: str):
     async with aiohttp.ClientSession() as session:
         while True:
             params = {"per_page": 100, "page": page}
-            async with session.get(url, headers=headers, params=params) as resp:
-                logger.debug(f"Commits API response status: {resp.status}")
-                
-                if resp.status == 409:
-                    # Repository is empty (Git repository not initialized)
-                    logger.warning(f"Repository {owner}/{repo} is empty (409 Conflict)")
-                    text = await resp.text()
-                    logger.debug(f"Response body: {text}")
-                    return []
-                    
-                if resp.status == 404:
-                    # Repository not found or no commits
-                    logger.warning(f"Repository {owner}/{repo} not found or no access (404)")
-                    text = await resp.text()
-                    logger.debug(f"Response body: {text}")
-                    return []
-                    
-                if resp.status != 200:
-                    text = await resp.text()
-                    logger.error(f"GitHub API error {resp.status}: {text}")
-                    raise Exception(f"GitHub API error {resp.status}: {text}")
-                
-                data = await resp.json()
-                logger.info(f"Fetched {len(data)} commits on page {page}")
-                
-                if not data: 
-                    break
+            resp = await _gh_request(session, url, token, params=params)
+            logger.debug(f"Commits API response status: {resp.status}")
+
+            if resp.status == 409:
+                # Repository is empty (Git repository not initialized)
+                logger.warning(f"Repository {owner}/{repo} is empty (409 Conflict)")
+                logger.debug(f"Response body: {resp.text()}")
+                return []
+
+            if resp.status == 404:
+                # Repository not found or no commits
+                logger.warning(f"Repository {owner}/{repo} not found or no access (404)")
+                logger.debug(f"Response body: {resp.text()}")
+                return []
+
+            if resp.status != 200:
+                text = resp.text()
+                logger.error(f"GitHub API error {resp.status}: {text}")
+                raise Exception(f"GitHub API error {resp.status}: {text}")
+
+            data = resp.json()
+            logger.info(f"Fetched {len(data)} commits on page {page}")
 
-                # Extract only necessary commit data
-                for commit in data:
-                    commits.append({
-                        "sha": commit["sha"],
-                        "message": commit["commit"]["message"],
-                        "author": {
-                            "name": commit["commit"]["author"]["name"],
-                            "email": commit["commit"]["author"]["email"],
-                            "date": commit["commit"]["author"]["date"]
-                        },
-                        "committer": {
-                            "name": commit["commit"]["committer"]["name"],
-                            "date": commit["commit"]["committer"]["date"]
-                        }
-                    })
-                
-                page += 1
+            if not data:
+                break
+
+            # Extract only necessary commit data
+            for commit in data:
+                commits.append({
+                    "sha": commit["sha"],
+                    "message": commit["commit"]["message"],
+                    "author": {
+                        "name": commit["commit"]["author"]["name"],
+                        "email": commit["commit"]["author"]["email"],
+                        "date": commit["commit"]["author"]["date"]
+                    },
+                    "committer": {
+                        "name": commit["commit"]["committer"]["name"],
+                        "date": commit["commit"]["committer"]["date"]
+                    }
+                })
+
+            page += 1
 
     logger.info(f"Total commits fetched: {len(commits)}")
     return commits
 
+@traced("get_all_issues")
 async def get_all_issues(owner: str, repo: str, token: str):
     url = f"{GITHUB_API}repos/{owner}/{repo}/issues"
-    headers = _gh_headers(token)
     all_issues = []
     page = 1
 
@@ -211,32 +487,32 @@ async def get_all_issues(owner: str, repo: str, token: str):
     async with aiohttp.ClientSession() as session:
         while True:
             params = {"per_page": 100, "page": page, "state": "all"}
-            async with session.get(url, headers=headers, params=params) as resp:
-                logger.debug(f"Issues API response status: {resp.status}")
-                
-                if resp.status == 404:
-                    logger.warning(f"Issues endpoint returned 404 for {owner}/{repo}")
-                    return {"all": [], "open": [], "closed": []}
-                    
-                if resp.status == 410:
-                    # Issues are disabled for this repository
-                    logger.warning(f"Issues are disabled for {owner}/{repo}")
-                    return {"all": [], "open": [], "closed": []}
-                    
-                if resp.status != 200:
-                    text = await resp.text()
-                    logger.error(f"GitHub API error {resp.status}: {text}")
-                    raise Exception(f"GitHub API error {resp.status}: {text}")
-
-                data = await resp.json()
-                if not data:
-                    break
+            resp = await _gh_request(session, url, token, params=params)
+            logger.debug(f"Issues API response status: {resp.status}")
+
+            if resp.status == 404:
+                logger.warning(f"Issues endpoint returned 404 for {owner}/{repo}")
+                return {"all": [], "open": [], "closed": []}
 
-                # Filter out PRs
-                filtered = [issue for issue in data if "pull_request" not in issue]
-                all_issues.extend(filtered)
-                logger.info(f"Fetched {len(filtered)} issues on page {page}")
-                page += 1
+            if resp.status == 410:
+                # Issues are disabled for this repository
+                logger.warning(f"Issues are disabled for {owner}/{repo}")
+                return {"all": [], "open": [], "closed": []}
+
+            if resp.status != 200:
+                text = resp.text()
+                logger.error(f"GitHub API error {resp.status}: {text}")
+                raise Exception(f"GitHub API error {resp.status}: {text}")
+
+            data = resp.json()
+            if not data:
+                break
+
+            # Filter out PRs
+            filtered = [issue for issue in data if "pull_request" not in issue]
+            all_issues.extend(filtered)
+            logger.info(f"Fetched {len(filtered)} issues on page {page}")
+            page += 1
 
     open_issues = [i for i in all_issues if i["state"] == "open"]
     closed_issues = [i for i in all_issues if i["state"] == "closed"]
@@ -249,9 +525,9 @@ async def get_all_issues(owner: str, repo: str, token: str):
         "closed": closed_issues
     }
 
+@traced("get_all_pr")
 async def get_all_pr(owner:str, repo:str, token:str):
     url = f"{GITHUB_API}repos/{owner}/{repo}/pulls"
-    headers = _gh_headers(token)
     all_prs = []
     page = 1
 
@@ -260,25 +536,25 @@ async def get_all_pr(owner:str, repo:str, token:str):
     async with aiohttp.ClientSession() as session:
         while True:
             params = {"per_page": 100, "page": page, "state": "all"}
-            async with session.get(url, headers=headers, params=params) as resp:
-                logger.debug(f"PRs API response status: {resp.status}")
-                
-                if resp.status == 404:
-                    logger.warning(f"PRs endpoint returned 404 for {owner}/{repo}")
-                    return {"all": [], "open": [], "closed": [], "merged": []}
-                    
-                if resp.status != 200:
-                    text = await resp.text()
-                    logger.error(f"GitHub API error {resp.status}: {text}")
-                    raise Exception(f"GitHub API error {resp.status}: {text}")
-                
-                data = await resp.json()
-                if not data:
-                    break
+            resp = await _gh_request(session, url, token, params=params)
+            logger.debug(f"PRs API response status: {resp.status}")
+
+            if resp.status == 404:
+                logger.warning(f"PRs endpoint returned 404 for {owner}/{repo}")
+                return {"all": [], "open": [], "closed": [], "merged": []}
+
+            if resp.status != 200:
+                text = resp.text()
+                logger.error(f"GitHub API error {resp.status}: {text}")
+                raise Exception(f"GitHub API error {resp.status}: {text}")
 
-                all_prs.extend(data)
-                logger.info(f"Fetched {len(data)} PRs on page {page}")
-                page += 1
+            data = resp.json()
+            if not data:
+                break
+
+            all_prs.extend(data)
+            logger.info(f"Fetched {len(data)} PRs on page {page}")
+            page += 1
 
     # Separate by state
     open_prs = [pr for pr in all_prs if pr["state"] == "open"]
@@ -294,9 +570,9 @@ async def get_all_pr(owner:str, repo:str, token:str):
         "merged": merged_prs
     }
 
+@traced("get_all_contributors")
 async def get_all_contributors(owner: str, repo: str, token: str):
     url = f"{GITHUB_API}repos/{owner}/{repo}/contributors"
-    headers = _gh_headers(token)
     contributors_raw = []
     page = 1
 
@@ -306,37 +582,36 @@ async def get_all_contributors(owner: str, repo: str, token: str):
     async with aiohttp.ClientSession() as session:
         while True:
             params = {"per_page": 100, "page": page}
-            async with session.get(url, headers=headers, params=params) as resp:
-                logger.debug(f"Contributors API response status: {resp.status}")
-
-                if resp.status == 404:
-                    logger.warning(f"Contributors endpoint returned 404 for {owner}/{repo}")
-                    text = await resp.text()
-                    logger.debug(f"Response body: {text}")
-                    return {
-                        "contributors": [],
-                        "total_contributors": 0,
-                    }
-
-                if resp.status == 409:
-                    logger.warning(f"Repository {owner}/{repo} is empty (409 Conflict)")
-                    return {
-                        "contributors": [],
-                        "total_contributors": 0,
-                    }
+            resp = await _gh_request(session, url, token, params=params, conditional=True)
+            logger.debug(f"Contributors API response status: {resp.status}")
+
+            if resp.status == 404:
+                logger.warning(f"Contributors endpoint returned 404 for {owner}/{repo}")
+                logger.debug(f"Response body: {resp.text()}")
+                return {
+                    "contributors": [],
+                    "total_contributors": 0,
+                }
+
+            if resp.status == 409:
+                logger.warning(f"Repository {owner}/{repo} is empty (409 Conflict)")
+                return {
+                    "contributors": [],
+                    "total_contributors": 0,
+                }
 
-                if resp.status != 200:
-                    text = await resp.text()
-                    logger.error(f"GitHub API error {resp.status}: {text}")
-                    raise Exception(f"GitHub API error {resp.status}: {text}")
+            if resp.status != 200:
+                text = resp.text()
+                logger.error(f"GitHub API error {resp.status}: {text}")
+                raise Exception(f"GitHub API error {resp.status}: {text}")
 
-                data = await resp.json()
-                if not data:
-                    break
+            data = resp.json()
+            if not data:
+                break
 
-                contributors_raw.extend(data)
-                logger.info(f"Fetched {len(data)} contributors on page {page}")
-                page += 1
+            contributors_raw.extend(data)
+            logger.info(f"Fetched {len(data)} contributors on page {page}")
+            page += 1
 
     # Normalize each contributor’s essential details and contributions count
     contributors = []
@@ -359,9 +634,9 @@ async def get_all_contributors(owner: str, repo: str, token: str):
         "total_contributors": total_contributors,
     }
 
+@traced("get_all_releases")
 async def get_all_releases(owner: str, repo: str, token: str):
-    url = f"https://api.github.com/repos/{owner}/{repo}/releases"
-    headers = _gh_headers(token)
+    url = f"{GITHUB_API}repos/{owner}/{repo}/releases"
     releases = []
     page = 1
 
@@ -370,46 +645,46 @@ async def get_all_releases(owner: str, repo: str, token: str):
     async with aiohttp.ClientSession() as session:
         while True:
             params = {"per_page": 100, "page": page}
-            async with session.get(url, headers=headers, params=params) as resp:
-                logger.debug(f"Releases API response status: {resp.status}")
-                
-                if resp.status == 404:
-                    logger.warning(f"Releases endpoint returned 404 for {owner}/{repo}")
-                    return []
-                    
-                if resp.status != 200:
-                    text = await resp.text()
-                    logger.error(f"GitHub API error {resp.status}: {text}")
-                    raise Exception(f"GitHub API error {resp.status}: {text}")
-                    
-                data = await resp.json()
-                if not data:
-                    break
-                    
-                releases.extend(data)
-                logger.info(f"Fetched {len(data)} releases on page {page}")
-                page += 1
+            resp = await _gh_request(session, url, token, params=params, conditional=True)
+            logger.debug(f"Releases API response status: {resp.status}")
+
+            if resp.status == 404:
+                logger.warning(f"Releases endpoint returned 404 for {owner}/{repo}")
+                return []
+
+            if resp.status != 200:
+                text = resp.text()
+                logger.error(f"GitHub API error {resp.status}: {text}")
+                raise Exception(f"GitHub API error {resp.status}: {text}")
+
+            data = resp.json()
+            if not data:
+                break
+
+            releases.extend(data)
+            logger.info(f"Fetched {len(data)} releases on page {page}")
+            page += 1
 
     logger.info(f"Total releases: {len(releases)}")
     return releases
 
+@traced("get_repo_metadata")
 async def get_repo_metadata(owner: str, repo: str, token: str):
-    url = f"https://api.github.com/repos/{owner}/{repo}"
-    headers = _gh_headers(token)
+    url = f"{GITHUB_API}repos/{owner}/{repo}"
 
     logger.info(f"Fetching metadata for {owner}/{repo}")
     logger.debug(f"Request URL: {url}")
 
     async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=headers) as resp:
-            logger.debug(f"Metadata API response status: {resp.status}")
-            
-            if resp.status != 200:
-                text = await resp.text()
-                logger.error(f"GitHub API error {resp.status}: {text}")
-                raise Exception(f"GitHub API error {resp.status}: {text}")
+        resp = await _gh_request(session, url, token, conditional=True)
+        logger.debug(f"Metadata API response status: {resp.status}")
 
-            data = await resp.json()
+        if resp.status != 200:
+            text = resp.text()
+            logger.error(f"GitHub API error {resp.status}: {text}")
+            raise Exception(f"GitHub API error {resp.status}: {text}")
+
+        data = resp.json()
 
     metadata = {
         "stars": data.get("stargazers_count"),
@@ -419,87 +694,193 @@ async def get_repo_metadata(owner: str, repo: str, token: str):
         "default_branch": data.get("default_branch"),
         "visibility": "private" if data.get("private") else "public"
     }
-    
+
     logger.info(f"Metadata: {metadata}")
     return metadata
 
-async def fetch_pr_files(token: str, owner: str, repo: str, pull_number: int):
-    """Fetch detailed file information for a pull request"""
-    url = f"https://api.github.com/repos/{owner}/{repo}/pulls/{pull_number}/files"  # Fixed URL
-    header = _gh_headers(token)
-    files = []
+# GitHub lists at most 3,000 files for a pull request, 100 per page
+PR_FILES_PER_PAGE = 100
+PR_FILES_MAX_PAGES = 30
+
+_LAST_PAGE = re.compile(r'[?&]page=(\d+)[^>]*>;\s*rel="last"')
+
+
+def _pr_file(file_obj: Dict[str, Any], page: int) -> Dict[str, Any]:
+    """One entry of /pulls/{n}/files. Patches over PR_PATCH_INLINE_BYTES are left out; see PullPatches"""
+    patch = file_obj.get("patch", "")
+    omitted = len(patch) > settings.PR_PATCH_INLINE_BYTES
+    return {
+        "filename": file_obj["filename"],
+        "sha": file_obj["sha"],
+        "status": file_obj["status"],  # added, modified, removed, renamed
+        "additions": file_obj.get("additions", 0),
+        "deletions": file_obj.get("deletions", 0),
+        "changes": file_obj.get("changes", 0),
+        "patch": "" if omitted else patch,  # The actual diff
+        "patchOmitted": omitted,
+        "previous_filename": file_obj.get("previous_filename"),
+        "page": page,
+    }
 
+
+async def _fetch_pr_files_page(session: aiohttp.ClientSession, token: str, owner: str, repo: str,
+                               pull_number: int, page: int) -> GitHubResponse:
+    url = f"{GITHUB_API}repos/{owner}/{repo}/pulls/{pull_number}/files"
+    params = {"per_page": PR_FILES_PER_PAGE, "page": page}
+    # Not through the ETag cache: it would keep every page, patches and all
+    resp = await _gh_request(session, url, token, params=params)
+    if resp.status != 200:
+        raise Exception(f"GitHub API error {resp.status} for PR #{pull_number} files page {page}: {resp.text()}")
+    return resp
+
+
+async def iter_pr_files(token: str, owner: str, repo: str, pull_number: int) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Yield the files of a pull request one page at a time.
+
+    The first page tells how many pages there are (Link rel="last"); the rest
+    are requested concurrently and yielded as they arrive, so callers can start
+    on the first files while later pages are still in flight.
+    """
     logger.info(f"Fetching files for PR #{pull_number} in {owner}/{repo}")
-    logger.debug(f"Request URL: {url}")
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=header) as resp:
-            logger.debug(f"Status {resp.status}")
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=60)) as session:
+        first = await _fetch_pr_files_page(session, token, owner, repo, pull_number, 1)
+        files = [_pr_file(f, 1) for f in first.json()]
+        total = len(files)
+        yield files
 
-            if resp.status == 200:
-                data = await resp.json()
-
-                files = [
-                    {
-                        "filename": file_obj["filename"],
-                        "sha": file_obj["sha"],
-                        "status": file_obj["status"],  # added, modified, removed, renamed
-                        "additions": file_obj.get("additions", 0),
-                        "deletions": file_obj.get("deletions", 0),
-                        "changes": file_obj.get("changes", 0),
-                        "patch": file_obj.get("patch", ""),  # The actual diff
-                    }
-                    for file_obj in data
-                ]
+        match = _LAST_PAGE.search(first.headers.get("Link", ""))
+        last_page = min(int(match.group(1)), PR_FILES_MAX_PAGES) if match else 1
+
+        async def fetch_page(page: int):
+            resp = await _fetch_pr_files_page(session, token, owner, repo, pull_number, page)
+            return [_pr_file(f, page) for f in resp.json()]
+
+        tasks = [asyncio.ensure_future(fetch_page(page)) for page in range(2, last_page + 1)]
+        try:
+            for fetched in asyncio.as_completed(tasks):
+                files = await fetched
+                total += len(files)
+                yield files
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    logger.info(f"Found {total} files in {last_page} page(s)")
+
+
+@traced("fetch_pr_files")
+async def fetch_pr_files(token: str, owner: str, repo: str, pull_number: int) -> List[Dict[str, Any]]:
+    """Fetch detailed file information for a pull request (all pages)"""
+    files = []
+    try:
+        async for page in iter_pr_files(token, owner, repo, pull_number):
+            files.extend(page)
+    except Exception as e:
+        logger.error(f"Failed to fetch files: {str(e)}")
+    return files
 
-                logger.info(f"Found {len(files)} files")
-                logger.debug(f"Files: {files}")
-            
-            else:
-                logger.error(f"Failed to fetch files: {resp.status}")
-                error_text = await resp.text()
-                logger.error(f"Error response: {error_text}")
 
-    return files       
-            
-async def fetch_file_content(owner: str, repo: str, files: List[Dict], token: str):
+class PullPatches:
+    """Patches left out of a pull request's file list, read back on demand for one run.
+
+    Asking for an omitted patch reads its page once and keeps that page's other
+    omitted patches until they are asked for too; each is handed out once, so
+    at most about a page of large patches is held at a time.
+    """
+
+    def __init__(self, token: str, owner: str, repo: str, pull_number: int):
+        self.token = token
+        self.owner = owner
+        self.repo = repo
+        self.pull_number = pull_number
+        self._pages: Dict[int, Dict[str, str]] = {}
+
+    @traced("fetch_pr_patch")
+    async def get(self, file: Dict[str, Any]) -> str:
+        if not file.get("patchOmitted"):
+            return file.get("patch", "")
+
+        page = file.get("page", 1)
+        patches = self._pages.get(page)
+        if patches is None or file["filename"] not in patches:
+            patches = self._pages[page] = await self._load(page)
+        patch = patches.pop(file["filename"], "")
+        if not patches:
+            self._pages.pop(page, None)
+        return patch
+
+    async def _load(self, page: int) -> Dict[str, str]:
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=60)) as session:
+            resp = await _fetch_pr_files_page(session, self.token, self.owner, self.repo, self.pull_number, page)
+        return {
+            f["filename"]: f["patch"] for f in resp.json()
+            if len(f.get("patch", "")) > settings.PR_PATCH_INLINE_BYTES
+        }
+
+CODEOWNERS_LOCATIONS = (".github/CODEOWNERS", "CODEOWNERS", "docs/CODEOWNERS")
+
+
+@traced("fetch_codeowners")
+async def fetch_codeowners(owner: str, repo: str, ref: str, token: str) -> Optional[str]:
+    """The CODEOWNERS file GitHub would use at `ref`, or None if the repository has none"""
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as session:
+        for path in CODEOWNERS_LOCATIONS:
+            url = f"{GITHUB_API}repos/{owner}/{repo}/contents/{path}"
+            resp = await _gh_request(session, url, token, params={"ref": ref}, conditional=True)
+            if resp.status == 404:
+                continue
+            if resp.status != 200:
+                raise Exception(f"GitHub API error {resp.status} for {path}: {resp.text()}")
+            return base64.b64decode(resp.json()["content"]).decode("utf-8", errors="replace")
+    return None
+
+
+@traced("fetch_file_content")
+async def fetch_file_content(owner: str, repo: str, files: List[Dict], token: str, store: Optional[BlobStore] = None):
     """
     Fetch content for multiple files concurrently from GitHub API.
+    `sha` is the ref to read at; the returned `blobSha` identifies the content.
+    With a `store`, "content" is a BlobRef into it, as in fetch_blobs.
     """
-    header = _gh_headers(token)
-    
+
     async def fetch_single_file(session, file):
         path = file["path"]
         sha = file["sha"]
-        url = f"https://api.github.com/repos/{owner}/{repo}/contents/{path}?ref={sha}"
-        
+        url = f"{GITHUB_API}repos/{owner}/{repo}/contents/{path}?ref={sha}"
+
         try:
-            async with session.get(url, headers=header) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    content = base64.b64decode(data["content"]).decode("utf-8")
-                    
-                    logger.info(f"Fetched content for {path}")
-                    return {
-                        "path": path,
-                        "sha": sha,
-                        "content": content
-                    }
+            resp = await _gh_request(session, url, token)
+            if resp.status == 200:
+                data = resp.json()
+                raw = base64.b64decode(data["content"])
+                BLOB_FETCH_BYTES.observe(len(raw))
+                if store is not None:
+                    content = store.put(data.get("sha") or f"{path}@{sha}", raw)
                 else:
-                    logger.error(f"Failed to fetch {path}: {resp.status}")
-                    return None
-                    
+                    content = raw.decode("utf-8")
+
+                logger.info(f"Fetched content for {path}")
+                return {
+                    "path": path,
+                    "sha": sha,
+                    "blobSha": data.get("sha"),
+                    "content": content
+                }
+            else:
+                logger.error(f"Failed to fetch {path}: {resp.status}")
+                return None
+
         except Exception as e:
             logger.error(f"Error fetching {path}: {str(e)}")
             return None
-    
+
     async with aiohttp.ClientSession() as session:
         tasks = [fetch_single_file(session, file) for file in files]
         results = await asyncio.gather(*tasks)
-        
+
         files_with_content = [r for r in results if r is not None]
-    
+
     logger.info(f"Successfully fetched {len(files_with_content)}/{len(files)} files")
     return files_with_content
-    
 
@@ -1,7 +1,9 @@
 import jwt
 from typing import Optional, List, Dict, Any
 from app.schemas.githubSchema import GitHubSettings
+from app.core.config import settings
 import time
+from datetime import datetime
 import httpx
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.serialization import load_pem_private_key
@@ -12,6 +14,12 @@ GITHUB_API_VERSION = "2022-11-28"
 GITHUB_APP_ID = gs.github_app_id
 GITHUB_PRIVATE_KEY = gs.github_private_key
 
+# installationId -> (token, expiry epoch); tokens are valid for an hour
+_token_cache: Dict[str, tuple] = {}
+# token -> (installationId, expiry), so API helpers can account requests per installation
+_token_installations: Dict[str, tuple] = {}
+TOKEN_REFRESH_MARGIN = 5 * 60
+
 def _prepare_private_key(pem_content: str) -> str:
     try:
 
@@ -59,12 +67,16 @@ async def get_installation_token(installation_id: int, *, app_id: Optional[str]
         raise RuntimeError("Missing GitHub App ID")
     if not pem:
         raise RuntimeError("Missing GitHub Private Key")
+
+    cached = _token_cache.get(str(installation_id))
+    if cached and cached[1] - TOKEN_REFRESH_MARGIN > time.time():
+        return cached[0]
     
     try:
 
         jwt_token = _make_app_jwt(app_id, pem)
 
-        url = f"https://api.github.com/app/installations/{installation_id}/access_tokens"
+        url = f"{settings.GITHUB_API_URL.rstrip('/')}/app/installations/{installation_id}/access_tokens"
         headers = {
             "Authorization": f"Bearer {jwt_token}",
             "Accept": "application/vnd.github+json",
@@ -75,6 +87,7 @@ async def get_installation_token(installation_id: int, *, app_id: Optional[str]
             response = await client.post(url, headers=headers)
             response.raise_for_status()
             data = response.json()
+            _remember_token(str(installation_id), data["token"], data.get("expires_at"))
             return data["token"]
             
     except httpx.HTTPStatusError as e:
@@ -89,6 +102,24 @@ async def get_installation_token(installation_id: int, *, app_id: Optional[str]
     except Exception as e:
         raise RuntimeError(f"Failed to get installation token: {str(e)}")
 
+def _remember_token(installation_id: str, token: str, expires_at: Optional[str]) -> None:
+    try:
+        expiry = datetime.fromisoformat(expires_at.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, ValueError):
+        expiry = time.time() + 55 * 60
+
+    # Older tokens stay mapped until they expire, jobs may still be using them
+    now = time.time()
+    for stale in [t for t, (_, exp) in _token_installations.items() if exp <= now]:
+        del _token_installations[stale]
+
+    _token_cache[installation_id] = (token, expiry)
+    _token_installations[token] = (installation_id, expiry)
+
+def installation_for_token(token: str) -> Optional[str]:
+    entry = _token_installations.get(token)
+    return entry[0] if entry else None
+
 def _gh_headers(token: str) -> Dict[str, str]:
     return {
         "Authorization": f"Bearer {token}",
@@ -0,0 +1,196 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Disk usage is re-measured (and expired entries dropped) at least this often
+_SWEEP_INTERVAL = 3600
+# An eviction sweep goes this far below the disk budget, so it doesn't rerun on the next write
+_SWEEP_TARGET = 0.9
+
+
+class CachedResponse:
+    def __init__(self, etag: Optional[str], last_modified: Optional[str], body: bytes):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.body = body
+
+
+class ConditionalCache:
+    """ETag / Last-Modified store for GitHub GETs, keyed by installation and URL.
+
+    Recent entries are kept in memory, bounded by count and by total body size;
+    every entry is also written to disk so validators survive restarts. The
+    disk copy is bounded by total size and age, least recently used first. Disk
+    I/O runs in a thread, off the event loop. A 304 is answered from here and
+    costs no quota.
+    """
+
+    def __init__(self, directory: str, max_memory_entries: int, max_memory_bytes: int,
+                 max_disk_bytes: int, max_age_seconds: float):
+        self.directory = directory
+        self.max_memory_entries = max_memory_entries
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.max_age_seconds = max_age_seconds
+        self._memory: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_lock = threading.Lock()
+        self._disk_bytes: Optional[int] = None
+        self._last_sweep = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(installation: Optional[str], url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        query = "&".join(f"{k}={params[k]}" for k in sorted(params)) if params else ""
+        return hashlib.sha256(f"{installation}|{url}?{query}".encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.entry")
+
+    def _remember(self, key: str, entry: CachedResponse) -> None:
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous.body)
+        if len(entry.body) > self.max_memory_bytes:
+            # Would push out everything else; the disk copy serves it
+            return
+        self._memory[key] = entry
+        self._memory_bytes += len(entry.body)
+        while len(self._memory) > self.max_memory_entries or self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted.body)
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            return entry
+
+        entry = await asyncio.to_thread(self._read, key)
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    async def put(self, key: str, etag: Optional[str], last_modified: Optional[str], body: bytes) -> None:
+        if not etag and not last_modified:
+            return
+        self._remember(key, CachedResponse(etag, last_modified, body))
+        await asyncio.to_thread(self._write, key, etag, last_modified, body)
+
+    def _read(self, key: str) -> Optional[CachedResponse]:
+        """Runs in a thread. One file per entry: a JSON line of validators, then the body."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                meta = json.loads(f.readline())
+                body = f.read()
+            # The mtime orders eviction, so reading an entry keeps it
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return CachedResponse(meta.get("etag"), meta.get("lastModified"), body)
+
+    def _write(self, key: str, etag: Optional[str], last_modified: Optional[str], body: bytes) -> None:
+        """Runs in a thread"""
+        path = self._path(key)
+        # Replaced in one rename, so a reader never pairs a body with another response's ETag
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            with open(tmp, "wb") as f:
+                f.write(json.dumps({"etag": etag, "lastModified": last_modified}).encode() + b"\n")
+                f.write(body)
+                written = f.tell()
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Could not persist GitHub cache entry: {str(e)}")
+            return
+
+        with self._disk_lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes += written - replaced
+            if (self._disk_bytes is None or self._disk_bytes > self.max_disk_bytes
+                    or time.monotonic() - self._last_sweep > _SWEEP_INTERVAL):
+                self._sweep()
+
+    def _sweep(self) -> None:
+        """Drop expired entries, then the least recently used until under the disk budget"""
+        now = time.time()
+        entries = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                # Entries past their age; interrupted writes and the old two-file layout once stale
+                if not name.endswith(".entry") or now - st.st_mtime > self.max_age_seconds:
+                    if name.endswith(".entry") or now - st.st_mtime > 60:
+                        self._unlink(path)
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_disk_bytes:
+            entries.sort()
+            target = self.max_disk_bytes * _SWEEP_TARGET
+            evicted = 0
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                if self._unlink(path):
+                    total -= size
+                    evicted += 1
+            logger.info(f"GitHub cache over {self.max_disk_bytes} bytes on disk; evicted {evicted} entries")
+        self._disk_bytes = total
+        self._last_sweep = time.monotonic()
+
+    @staticmethod
+    def _unlink(path: str) -> bool:
+        try:
+            os.unlink(path)
+            return True
+        except OSError:
+            return False
+
+    def validators(self, entry: CachedResponse) -> Dict[str, str]:
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "memoryEntries": len(self._memory),
+            "memoryBytes": self._memory_bytes,
+            "diskBytes": self._disk_bytes or 0,
+        }
+
+
+github_cache = ConditionalCache(
+    settings.GITHUB_CACHE_DIR,
+    settings.GITHUB_CACHE_MEMORY_ENTRIES,
+    settings.GITHUB_CACHE_MEMORY_BYTES,
+    settings.GITHUB_CACHE_DISK_BYTES,
+    settings.GITHUB_CACHE_MAX_AGE_DAYS * 86400,
+)
@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, Mapping, Optional
+
+from app.core.config import settings
+from app.services.scheduler import Priority, current_priority
+
+logger = logging.getLogger(__name__)
+
+# GitHub asks clients to wait at least a minute after a secondary rate limit
+SECONDARY_LIMIT_BACKOFF = 60.0
+
+
+class InstallationGovernor:
+    """Tracks one installation's REST quota from response headers and paces requests.
+
+    - Concurrency is capped per installation (GitHub's secondary limits punish bursts);
+      waiting requests get a permit in priority order, PR before push before full-repo.
+    - Once the remaining quota drops below `pace_ratio` of the limit, requests are
+      spread evenly over the time left until the reset.
+    - Background (full-repo) work stops at `reserve_ratio` and waits for the reset,
+      leaving the rest of the budget for PR and push analysis. Requests wait out
+      their pacing delay before taking a permit, so a sleeping request never
+      holds one.
+    """
+
+    def __init__(self, installation: str, max_concurrency: int, reserve_ratio: float, pace_ratio: float):
+        self.installation = installation
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[float] = None
+        self.blocked_until = 0.0
+        self.reserve_ratio = reserve_ratio
+        self.pace_ratio = pace_ratio
+        self.requests = 0
+        self.throttled = 0
+        self._next_slot = 0.0
+        self.max_concurrency = max(1, max_concurrency)
+        self._in_use = 0
+        self._waiters: Dict[Priority, Deque[asyncio.Future]] = {p: deque() for p in Priority}
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        priority = current_priority()
+        await self._wait_turn(priority)
+        await self._acquire(priority)
+        return self
+
+    async def __aexit__(self, *exc):
+        self._release()
+
+    async def _acquire(self, priority: Priority) -> None:
+        # Only jump the line if nobody at this priority or above is already waiting
+        if self._in_use < self.max_concurrency and not any(self._waiters[p] for p in Priority if p <= priority):
+            self._in_use += 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append(fut)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # Granted just as we were cancelled: hand it on
+                self._release()
+            else:
+                self._waiters[priority].remove(fut)
+            raise
+
+    def _release(self) -> None:
+        self._in_use -= 1
+        for priority in Priority:
+            queue = self._waiters[priority]
+            while queue:
+                fut = queue.popleft()
+                if not fut.done():
+                    self._in_use += 1
+                    fut.set_result(None)
+                    return
+
+    def _seconds_to_reset(self, now: float) -> float:
+        if self.reset_at is None:
+            return 0.0
+        return max(0.0, self.reset_at - now)
+
+    async def _wait_turn(self, priority: Priority) -> None:
+        async with self._lock:
+            now = time.time()
+            delay = max(0.0, self.blocked_until - now)
+
+            if self.remaining is not None and self.limit:
+                to_reset = self._seconds_to_reset(now)
+                if self.remaining <= 0:
+                    delay = max(delay, to_reset)
+                elif priority == Priority.FULL_REPO and self.remaining <= self.limit * self.reserve_ratio:
+                    logger.info(
+                        f"Installation {self.installation}: {self.remaining} requests left, "
+                        f"holding background work for {to_reset:.0f}s"
+                    )
+                    delay = max(delay, to_reset)
+                elif self.remaining <= self.limit * self.pace_ratio:
+                    spacing = to_reset / self.remaining
+                    delay = max(delay, self._next_slot - now)
+                    self._next_slot = max(now, self._next_slot) + spacing
+
+            if delay > 0:
+                self.throttled += 1
+            self.requests += 1
+
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def update(self, headers: Mapping[str, str]) -> None:
+        remaining = headers.get("x-ratelimit-remaining")
+        if remaining is None:
+            return
+        if headers.get("x-ratelimit-resource", "core") != "core":
+            # GraphQL and search have their own budgets
+            return
+        try:
+            self.remaining = int(remaining)
+            self.limit = int(headers.get("x-ratelimit-limit", self.limit or 0)) or self.limit
+            reset = headers.get("x-ratelimit-reset")
+            if reset is not None:
+                reset_at = float(reset)
+                if self.reset_at is None or reset_at != self.reset_at:
+                    self._next_slot = 0.0
+                self.reset_at = reset_at
+        except ValueError:
+            logger.debug(f"Unparseable rate limit headers: {dict(headers)}")
+
+    def retry_delay(self, status: int, headers: Mapping[str, str], body: str, attempt: int) -> Optional[float]:
+        """How long to wait before retrying a 403/429, or None if it isn't a rate limit."""
+        if status not in (403, 429):
+            return None
+
+        retry_after = headers.get("retry-after")
+        if retry_after is not None:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                delay = SECONDARY_LIMIT_BACKOFF
+        elif headers.get("x-ratelimit-remaining") == "0":
+            try:
+                delay = max(0.0, float(headers.get("x-ratelimit-reset")) - time.time()) + 1
+            except (TypeError, ValueError):
+                delay = SECONDARY_LIMIT_BACKOFF
+        elif status == 429 or "rate limit" in body.lower():
+            delay = SECONDARY_LIMIT_BACKOFF * (2 ** attempt)
+        else:
+            # A plain permission error
+            return None
+
+        self.blocked_until = max(self.blocked_until, time.time() + delay)
+        return delay
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        return {
+            "limit": self.limit,
+            "remaining": self.remaining,
+            "resetAt": self.reset_at,
+            "blockedUntil": self.blocked_until or None,
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "inFlight": self._in_use,
+            "waiting": sum(len(q) for q in self._waiters.values()),
+        }
+
+
+_governors: Dict[str, InstallationGovernor] = {}
+
+
+def governor_for(installation: Optional[str]) -> InstallationGovernor:
+    key = str(installation) if installation is not None else "unknown"
+    gov = _governors.get(key)
+    if gov is None:
+        gov = InstallationGovernor(
+            key,
+            max_concurrency=settings.GITHUB_MAX_CONCURRENCY,
+            reserve_ratio=settings.GITHUB_BACKGROUND_RESERVE,
+            pace_ratio=settings.GITHUB_PACE_THRESHOLD,
+        )
+        _governors[key] = gov
+    return gov
+
+
+def quota_snapshot() -> Dict[str, Dict[str, Optional[float]]]:
+    return {key: gov.snapshot() for key, gov in _governors.items()}
@@ -0,0 +1,190 @@
+from typing import Any, Dict, List, Optional
+import aiohttp
+import logging
+
+from app.services import github_api
+from app.services.github_api import _gh_request
+from app.services.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+# Only the fields the analyzers and Express read; everything else stays on GitHub.
+_COMMIT_FIELDS = """
+oid
+message
+author { name email date user { login databaseId avatarUrl url } }
+committer { name date }
+"""
+
+REPO_CONTEXT_QUERY = """
+query($owner: String!, $name: String!, $withHistory: Boolean!) {
+  repository(owner: $owner, name: $name) {
+    stargazerCount
+    forkCount
+    watchers { totalCount }
+    licenseInfo { name }
+    isPrivate
+    openIssues: issues(states: OPEN) { totalCount }
+    closedIssues: issues(states: CLOSED) { totalCount }
+    openPRs: pullRequests(states: OPEN) { totalCount }
+    closedPRs: pullRequests(states: CLOSED) { totalCount }
+    mergedPRs: pullRequests(states: MERGED) { totalCount }
+    releases(first: 100, orderBy: {field: CREATED_AT, direction: DESC}) {
+      totalCount
+      nodes { tagName name createdAt publishedAt isDraft isPrerelease }
+    }
+    defaultBranchRef {
+      name
+      target {
+        ... on Commit {
+          history(first: 100) @include(if: $withHistory) {
+            pageInfo { hasNextPage endCursor }
+            nodes { %s }
+          }
+        }
+      }
+    }
+  }
+}
+""" % _COMMIT_FIELDS
+
+HISTORY_PAGE_QUERY = """
+query($owner: String!, $name: String!, $cursor: String!) {
+  repository(owner: $owner, name: $name) {
+    defaultBranchRef {
+      target {
+        ... on Commit {
+          history(first: 100, after: $cursor) {
+            pageInfo { hasNextPage endCursor }
+            nodes { %s }
+          }
+        }
+      }
+    }
+  }
+}
+""" % _COMMIT_FIELDS
+
+
+async def _graphql(session: aiohttp.ClientSession, token: str, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+    resp = await _gh_request(
+        session, f"{github_api.GITHUB_API}graphql", token,
+        method="POST", json_body={"query": query, "variables": variables}
+    )
+    if resp.status != 200:
+        raise Exception(f"GitHub GraphQL error {resp.status}: {resp.text()}")
+
+    data = resp.json()
+    if data.get("errors"):
+        raise Exception(f"GitHub GraphQL error: {data['errors']}")
+    return data["data"]
+
+
+def _commit_from_node(node: Dict[str, Any]) -> Dict[str, Any]:
+    """Same shape as get_all_commits"""
+    author = node.get("author") or {}
+    committer = node.get("committer") or {}
+    return {
+        "sha": node["oid"],
+        "message": node["message"],
+        "author": {
+            "name": author.get("name"),
+            "email": author.get("email"),
+            "date": author.get("date"),
+        },
+        "committer": {
+            "name": committer.get("name"),
+            "date": committer.get("date"),
+        },
+    }
+
+
+def _contributors_from_nodes(nodes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Approximate /contributors: commit counts on the default branch, by GitHub user or author name"""
+    by_key: Dict[str, Dict[str, Any]] = {}
+    for node in nodes:
+        author = node.get("author") or {}
+        user = author.get("user")
+        key = f"user:{user['login']}" if user else f"anon:{author.get('email') or author.get('name')}"
+
+        entry = by_key.get(key)
+        if entry is None:
+            entry = {
+                "login": user["login"] if user else author.get("name"),
+                "id": user.get("databaseId") if user else None,
+                "type": "User" if user else "Anonymous",
+                "avatar_url": user.get("avatarUrl") if user else None,
+                "html_url": user.get("url") if user else None,
+                "contributions": 0,
+            }
+            by_key[key] = entry
+        entry["contributions"] += 1
+
+    contributors = sorted(by_key.values(), key=lambda c: c["contributions"], reverse=True)
+    return {
+        "contributors": contributors,
+        "total_contributors": len(contributors),
+    }
+
+
+@traced("collect_repo_context")
+async def collect_repo_context(owner: str, repo: str, token: str, with_history: bool = True) -> Dict[str, Any]:
+    """Fetch metadata, commit history, contributors, PR/issue counts and releases via GraphQL.
+
+    One query covers everything except commit history beyond the first 100
+    commits, which is paged 100 commits per request. Without `with_history`
+    (the history is read elsewhere, e.g. from a git mirror) that one query is
+    all, and "commits" and "contributors" are None.
+    """
+    logger.info(f"Collecting repo context for {owner}/{repo} via GraphQL")
+
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=60)) as session:
+        data = await _graphql(session, token, REPO_CONTEXT_QUERY,
+                              {"owner": owner, "name": repo, "withHistory": with_history})
+        repository = data["repository"]
+
+        branch_ref = repository.get("defaultBranchRef")
+        history = (branch_ref or {}).get("target", {}).get("history") if branch_ref else None
+        nodes: List[Dict[str, Any]] = list(history["nodes"]) if history else []
+        page_info = history["pageInfo"] if history else {"hasNextPage": False}
+
+        while page_info["hasNextPage"]:
+            page = await _graphql(
+                session, token, HISTORY_PAGE_QUERY,
+                {"owner": owner, "name": repo, "cursor": page_info["endCursor"]}
+            )
+            history = page["repository"]["defaultBranchRef"]["target"]["history"]
+            nodes.extend(history["nodes"])
+            page_info = history["pageInfo"]
+
+    metadata = {
+        "stars": repository.get("stargazerCount"),
+        "forks": repository.get("forkCount"),
+        "watchers": repository["watchers"]["totalCount"],
+        "license": repository["licenseInfo"]["name"] if repository.get("licenseInfo") else None,
+        "default_branch": branch_ref["name"] if branch_ref else None,
+        "visibility": "private" if repository.get("isPrivate") else "public"
+    }
+
+    context = {
+        "metadata": metadata,
+        "commits": [_commit_from_node(n) for n in nodes] if with_history else None,
+        "contributors": _contributors_from_nodes(nodes) if with_history else None,
+        "issues": {
+            "open": repository["openIssues"]["totalCount"],
+            "closed": repository["closedIssues"]["totalCount"],
+        },
+        "pullRequests": {
+            "open": repository["openPRs"]["totalCount"],
+            "closed": repository["closedPRs"]["totalCount"],
+            "merged": repository["mergedPRs"]["totalCount"],
+        },
+        "releases": repository["releases"]["nodes"],
+    }
+
+    if with_history:
+        logger.info(
+            f"GraphQL context for {owner}/{repo}: {len(context['commits'])} commits, "
+            f"{context['contributors']['total_contributors']} contributors"
+        )
+    return context
@@ -3,6 +3,7 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
 from app.services.github_auth import get_installation_token, _gh_headers
 from app.services.github_api import fetch_commit_diff, fetch_recent_commits_touching_file
+from app.services.git_mirror import is_commit_sha
 
 def normalize(v: float, lo: float, hi: float) -> float:
     if hi <= lo:
@@ -25,19 +26,30 @@ def summarize_repo_score(file_scores: List[float]) -> float:
     topk = sorted(file_scores, reverse=True)[:k]
     return sum(topk) / len(topk)
 
-async def estimate_ownership_risk(owner: str, repo: str, path: str, token: str, window_days: int = 120) -> float:
+async def estimate_ownership_risk(owner: str, repo: str, path: str, token: str, window_days: int = 120,
+                                  ref: str = "HEAD") -> float:
     since = (datetime.utcnow() - timedelta(days=window_days)).isoformat() + "Z"
-    commits = await fetch_recent_commits_touching_file(owner, repo, path, since, token)
+    commits = await fetch_recent_commits_touching_file(owner, repo, path, since, token, ref)
     # If many recent commits, ownership likely diffuse; else low risk.
     # Map commit count 0..20+ -> 0..1
     return normalize(commits, 0, 20)
 
+def push_base(req: PushAnalyzeRequest) -> str:
+    """What the push is diffed against: its `before` SHA, so every commit in it counts.
+
+    A new branch has an all-zero `before`; then, like for senders that don't
+    pass one, the head's parent stands in.
+    """
+    if is_commit_sha(req.beforeSha) and req.beforeSha.strip("0"):
+        return req.beforeSha
+    return f"{req.headCommitSha or req.branch}~1"
+
 async def seed_impact(req: PushAnalyzeRequest) -> Dict[str, Any]:
     owner, repo = req.repo.split("/", 1)
     token = await get_installation_token(req.installationId or 0)
 
-    base = f"{req.branch}~1"    # simple heuristic; or use payload.before
     head = req.headCommitSha or req.branch
+    base = push_base(req)
     cmp = await fetch_commit_diff(owner, repo, base, head, token)
 
     files = cmp.get("files", [])
@@ -48,10 +60,11 @@ async def seed_impact(req: PushAnalyzeRequest) -> Dict[str, Any]:
         filename = f.get("filename")
         additions = f.get("additions", 0)
         deletions = f.get("deletions", 0)
+        # History as of the pushed head, which the mirror may have to fetch once, not per file
         churn = await fetch_recent_commits_touching_file(owner, repo, filename,
                                                          (datetime.utcnow()-timedelta(days=60)).isoformat()+"Z",
-                                                         token)
-        owner_risk = await estimate_ownership_risk(owner, repo, filename, token)
+                                                         token, head)
+        owner_risk = await estimate_ownership_risk(owner, repo, filename, token, ref=head)
         risk = calc_file_score(additions, deletions, churn, owner_risk)
         impacted.append({
             "filename": filename,
@@ -0,0 +1,369 @@
+import math
+import re
+from typing import Dict, List, Optional, Tuple
+
+from radon.complexity import cc_rank
+from radon.metrics import mi_compute
+
+from app.schemas.fullrepo_analyze import StaticAnalysisResponse, Halstead, Cyclomatic, Maintainability
+
+JS_EXTENSIONS = ('.js', '.jsx', '.ts', '.tsx', '.mjs', '.cjs')
+
+# Token kinds
+IDENT, KEYWORD, NUMBER, STRING, TEMPLATE, REGEX, PUNCT = "ident", "keyword", "number", "string", "template", "regex", "punct"
+
+KEYWORDS = frozenset("""
+break case catch class const continue debugger default delete do else export extends finally for
+function if import in instanceof let new return super switch throw try typeof var void while with
+yield async await of static get set enum implements interface package private protected public
+type namespace declare abstract readonly as satisfies keyof
+""".split())
+
+# Keywords that read as values and count as Halstead operands
+VALUE_KEYWORDS = frozenset(("true", "false", "null", "undefined", "this", "super"))
+
+# Control keywords that may be followed by `(` without starting a method
+NOT_METHODS = frozenset(("if", "for", "while", "switch", "catch", "with", "function", "return", "typeof", "await", "new"))
+
+# Same decision points as the Express AST worker: if / loops / case / && / || / ternary
+BRANCH_KEYWORDS = frozenset(("if", "for", "while", "case"))
+BRANCH_OPERATORS = frozenset(("&&", "||"))
+
+_PUNCTUATORS = sorted("""
+>>>= ... === !== **= <<= >>= >>> &&= ||= ??= => == != <= >= && || ?? ?. ++ -- += -= *= /= %= &= |= ^= ** << >>
+{ } ( ) [ ] ; , < > + - * / % & | ^ ! ~ ? : = . @ #
+""".split(), key=len, reverse=True)
+
+_TOKEN_RE = re.compile(r"""
+    (?P<newline>\r\n|\n|\r)
+  | (?P<space>[ \t\f\v\u00a0\ufeff]+)
+  | (?P<line_comment>//[^\r\n]*)
+  | (?P<block_comment>/\*.*?(?:\*/|\Z))
+  | (?P<string>"(?:[^"\\\r\n]|\\.)*"?|'(?:[^'\\\r\n]|\\.)*'?)
+  | (?P<number>0[xX][0-9a-fA-F_]+n?|0[oO][0-7_]+n?|0[bB][01_]+n?|(?:\d[\d_]*\.?[\d_]*|\.\d[\d_]*)(?:[eE][+-]?\d+)?n?)
+  | (?P<ident>[A-Za-z_$\u0080-\uffff][\w$\u0080-\uffff]*)
+  | (?P<punct>""" + "|".join(re.escape(p) for p in _PUNCTUATORS) + r""")
+""", re.VERBOSE | re.DOTALL)
+
+_REGEX_RE = re.compile(r"/(?:[^/\\\[\r\n]|\\.|\[(?:[^\]\\\r\n]|\\.)*\])+/[a-z]*")
+
+# After these a `/` starts a regex literal rather than a division
+_REGEX_PREFIX_KEYWORDS = frozenset(("return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw", "yield", "await"))
+
+
+def _regex_allowed(prev: Optional[Tuple[str, str]]) -> bool:
+    if prev is None:
+        return True
+    kind, value = prev
+    if kind == PUNCT:
+        return value not in (")", "]", "}", "++", "--")
+    if kind == KEYWORD:
+        return value in _REGEX_PREFIX_KEYWORDS
+    return False
+
+
+def tokenize(source: str) -> Tuple[List[Tuple[str, str, int]], Dict[int, str]]:
+    """Split JS/TS source into (kind, value, line) tokens.
+
+    Returns the code tokens and a map of line number -> "comment" / "multi" for
+    lines covered by comments. Template literal text is one token; the code in
+    its `${...}` placeholders is tokenized as usual. Unknown characters are skipped,
+    so malformed input degrades instead of failing.
+    """
+    tokens: List[Tuple[str, str, int]] = []
+    comment_lines: Dict[int, str] = {}
+    pos, line, length = 0, 1, len(source)
+    prev: Optional[Tuple[str, str]] = None
+    # Brace depth at which each open template `${` resumes its string
+    template_stack: List[int] = []
+    brace_depth = 0
+
+    def scan_template(start: int, line: int) -> Tuple[int, int, bool]:
+        """Scan template text from `start` to the closing backtick or the next `${`"""
+        i = start
+        while i < length:
+            ch = source[i]
+            if ch == "\\":
+                i += 2
+                continue
+            if ch == "`":
+                return i + 1, line, False
+            if ch == "$" and i + 1 < length and source[i + 1] == "{":
+                return i + 2, line, True
+            if ch == "\n":
+                line += 1
+            i += 1
+        return length, line, False
+
+    while pos < length:
+        ch = source[pos]
+
+        if ch == "`" or (ch == "}" and template_stack and template_stack[-1] == brace_depth):
+            if ch == "}":
+                template_stack.pop()
+            end, new_line, opens_expr = scan_template(pos + 1, line)
+            if ch == "`":
+                tokens.append((TEMPLATE, source[pos:end], line))
+                prev = (TEMPLATE, "")
+            if opens_expr:
+                template_stack.append(brace_depth)
+            line = new_line
+            pos = end
+            continue
+
+        if ch == "/" and _regex_allowed(prev):
+            m = _REGEX_RE.match(source, pos)
+            if m and not source.startswith(("//", "/*"), pos):
+                tokens.append((REGEX, m.group(), line))
+                prev = (REGEX, "")
+                pos = m.end()
+                continue
+
+        m = _TOKEN_RE.match(source, pos)
+        if m is None:
+            pos += 1
+            continue
+
+        kind = m.lastgroup
+        value = m.group()
+        pos = m.end()
+
+        if kind == "newline":
+            line += 1
+        elif kind == "space":
+            pass
+        elif kind == "line_comment":
+            comment_lines.setdefault(line, "comment")
+        elif kind == "block_comment":
+            extra = value.count("\n")
+            for n in range(line, line + extra + 1):
+                comment_lines[n] = "multi" if extra else comment_lines.get(n, "comment")
+            line += extra
+        else:
+            if kind == "ident" and value in KEYWORDS:
+                kind = KEYWORD
+            elif kind == "punct":
+                if value == "{":
+                    brace_depth += 1
+                elif value == "}":
+                    brace_depth -= 1
+            tokens.append((kind, value, line))
+            prev = (kind, value)
+
+    return tokens, comment_lines
+
+
+def _match_brackets(tokens: List[Tuple[str, str, int]]) -> Dict[int, int]:
+    pairs = {"(": ")", "[": "]", "{": "}"}
+    closers = {v: k for k, v in pairs.items()}
+    stack: List[int] = []
+    matches: Dict[int, int] = {}
+    for i, (kind, value, _) in enumerate(tokens):
+        if kind != PUNCT:
+            continue
+        if value in pairs:
+            stack.append(i)
+        elif value in closers:
+            # Skip unbalanced closers rather than mis-pairing everything after them
+            if stack and tokens[stack[-1]][1] == closers[value]:
+                matches[stack.pop()] = i
+    return matches
+
+
+# Return type annotations longer than this are assumed not to be one
+_MAX_RETURN_TYPE_TOKENS = 64
+
+
+def _body_after_params(tokens, close: int) -> Optional[int]:
+    """Index of the `{` opening a function body after its `)`, skipping a TS return type"""
+    j = close + 1
+    if j < len(tokens) and tokens[j][1] == ":":
+        depth = 0
+        limit = min(len(tokens), j + _MAX_RETURN_TYPE_TOKENS)
+        while j < limit:
+            value = tokens[j][1]
+            if value in ("(", "[", "<"):
+                depth += 1
+            elif value in (")", "]", ">"):
+                depth -= 1
+            elif value == "{" and depth <= 0 and tokens[j - 1][1] not in (":", "|", "&", "<", ","):
+                break
+            elif value in (";", "=>") and depth <= 0:
+                return None
+            j += 1
+        else:
+            return None
+    if j < len(tokens) and tokens[j][1] == "{":
+        return j
+    return None
+
+
+def _function_starts(tokens, matches) -> Dict[int, str]:
+    """Map each function body's opening token index to the function's name.
+
+    Covers `function` declarations and expressions, class and object methods,
+    and arrow functions (brace bodies and expression bodies).
+    """
+    starts: Dict[int, str] = {}
+    n = len(tokens)
+    for i, (kind, value, _) in enumerate(tokens):
+        if kind == KEYWORD and value == "function":
+            j = i + 1
+            if j < n and tokens[j][1] == "*":
+                j += 1
+            name = tokens[j][1] if j < n and tokens[j][0] == IDENT else "<anonymous>"
+            while j < n and tokens[j][1] != "(":
+                j += 1
+            if j < n and j in matches:
+                body = _body_after_params(tokens, matches[j])
+                if body is not None:
+                    starts[body] = name
+
+        elif kind in (IDENT, KEYWORD) and value not in NOT_METHODS and i + 1 < n and tokens[i + 1][1] == "(":
+            prev = tokens[i - 1][1] if i else None
+            if prev in (".", "function", "new") or (i + 1) not in matches:
+                continue
+            body = _body_after_params(tokens, matches[i + 1])
+            if body is not None:
+                starts[body] = value
+
+        elif kind == PUNCT and value == "=>":
+            # Name from `name = (...) =>`, `name: (...) =>` or `name = async x =>`
+            j = i - 1
+            if j >= 0 and tokens[j][1] == ")":
+                depth = 0
+                while j >= 0:
+                    if tokens[j][1] == ")":
+                        depth += 1
+                    elif tokens[j][1] == "(":
+                        depth -= 1
+                        if depth == 0:
+                            break
+                    j -= 1
+            j -= 1
+            if j >= 0 and tokens[j][1] == "async":
+                j -= 1
+            name = "<arrow>"
+            if j >= 1 and tokens[j][1] in ("=", ":") and tokens[j - 1][0] == IDENT:
+                name = tokens[j - 1][1]
+            starts[i + 1 if i + 1 < n and tokens[i + 1][1] == "{" else -(i + 1)] = name
+    return starts
+
+
+def _function_blocks(tokens, matches) -> Tuple[List[Tuple[str, int]], int]:
+    """Cyclomatic complexity per function, plus decisions made at module level.
+
+    Each decision point counts toward the innermost enclosing function only,
+    like radon does for Python closures.
+    """
+    starts = _function_starts(tokens, matches)
+    blocks: List[Tuple[str, int]] = []
+    # Open functions: [name, complexity, closing index or None, depth for expression bodies]
+    stack: List[list] = []
+    module_complexity = 1
+    depth = 0
+
+    def close_expression_bodies(at_depth: int):
+        while stack and stack[-1][2] is None and stack[-1][3] >= at_depth:
+            name, complexity, _, _ = stack.pop()
+            blocks.append((name, complexity))
+
+    for i, (kind, value, _) in enumerate(tokens):
+        if kind == PUNCT:
+            if value in (")", "]", "}"):
+                close_expression_bodies(depth)
+                depth -= 1
+            elif value in (",", ";"):
+                close_expression_bodies(depth)
+
+        while stack and stack[-1][2] == i:
+            name, complexity, _, _ = stack.pop()
+            blocks.append((name, complexity))
+
+        if i in starts and i in matches:
+            stack.append([starts[i], 1, matches[i], depth])
+        elif -i in starts:
+            stack.append([starts[-i], 1, None, depth])
+
+        decision = (kind == KEYWORD and value in BRANCH_KEYWORDS) or (kind == PUNCT and value in BRANCH_OPERATORS)
+        if kind == PUNCT and value == "?":
+            # `a ? b : c`, but not TS optional members like `x?: T` or `f(x?)`
+            decision = i + 1 < len(tokens) and tokens[i + 1][1] not in (":", ")", ",", "=", ";")
+        if decision:
+            if stack:
+                stack[-1][1] += 1
+            else:
+                module_complexity += 1
+
+        if kind == PUNCT and value in ("(", "[", "{"):
+            depth += 1
+
+    while stack:
+        name, complexity, _, _ = stack.pop()
+        blocks.append((name, complexity))
+    return blocks, module_complexity
+
+
+def _halstead(tokens) -> Halstead:
+    operators: Dict[str, int] = {}
+    operands: Dict[str, int] = {}
+    for kind, value, _ in tokens:
+        if kind in (IDENT, NUMBER, STRING, TEMPLATE, REGEX) or value in VALUE_KEYWORDS:
+            operands[value] = operands.get(value, 0) + 1
+        elif value not in (")", "]", "}"):
+            # Bracket pairs count once, as their opening token
+            operators[value] = operators.get(value, 0) + 1
+
+    h1, h2 = len(operators), len(operands)
+    N1, N2 = sum(operators.values()), sum(operands.values())
+    vocabulary = h1 + h2
+    length = N1 + N2
+    volume = length * math.log2(vocabulary) if vocabulary else 0.0
+    difficulty = (h1 * N2) / (2 * h2) if h2 else 0.0
+    effort = difficulty * volume
+    return Halstead(
+        h1=h1, h2=h2, N1=N1, N2=N2,
+        vocabulary=vocabulary, length=length, volume=volume,
+        difficulty=difficulty, effort=effort, time=effort / 18.0, bugs=volume / 3000.0,
+    )
+
+
+def analyze_js_source(path: str, content: str) -> StaticAnalysisResponse:
+    """Static metrics for one JS/TS file, in the same shape radon produces for Python"""
+    tokens, comment_lines = tokenize(content)
+
+    lines = content.split("\n")
+    code_lines = {line for _, _, line in tokens}
+    blank = sum(1 for n, text in enumerate(lines, 1) if not text.strip() and n not in comment_lines)
+    multi = sum(1 for kind in comment_lines.values() if kind == "multi")
+    comments = sum(1 for n, kind in comment_lines.items() if kind == "comment")
+    sloc = len(code_lines)
+    # Logical lines: statements ended by `;` or a closing brace
+    lloc = max(sum(1 for kind, value, _ in tokens if kind == PUNCT and value in (";", "}")), 1 if sloc else 0)
+
+    matches = _match_brackets(tokens)
+    blocks, module_complexity = _function_blocks(tokens, matches)
+    cyclo = [
+        Cyclomatic(name=name, complexity=complexity, rank=cc_rank(complexity))
+        for name, complexity in blocks
+    ]
+
+    halstead = _halstead(tokens)
+    total_complexity = module_complexity + sum(complexity for _, complexity in blocks)
+    # Same inputs radon's mi_visit(multi=True) uses: logical lines and comment percentage
+    comments_percent = (comments + multi) / float(sloc) * 100 if sloc else 0
+    mi_score = mi_compute(halstead.volume, total_complexity, lloc, comments_percent)
+    mi_rank = "A" if mi_score >= 20 else "B" if mi_score >= 10 else "C"
+
+    return StaticAnalysisResponse(
+        path=path,
+        loc=len(lines),
+        lloc=lloc,
+        sloc=sloc,
+        comments=comments,
+        multi=multi,
+        blank=blank,
+        cyclomatic=cyclo,
+        halstead=halstead,
+        maintainability=Maintainability(mi=mi_score, rank=mi_rank),
+    )
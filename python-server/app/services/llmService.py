@@ -4,7 +4,10 @@ from typing import List, Dict, Any, Optional
 import os
 from openai import OpenAI
 from ..schemas.llmSchema import LLMSettings
+from .metrics import LLM_ERRORS, LLM_REQUEST_SECONDS, LLM_TOKENS
+from .tracing import add_span_attributes, traced
 import httpx
+import time
 from fastapi import HTTPException
 
 llm = LLMSettings()
@@ -13,8 +16,8 @@ gemini_api_key = llm.gemini_api_key
 gemini_api_key2 = llm.gemini_api_key2 
 GEMINI_MODEL = "gemini-2.5-flash-lite"
 GEMINI_MODEL2 = "gemini-2.5-flash"
-GEMINI_API_URL = f"https://generativelanguage.googleapis.com/v1/models/{GEMINI_MODEL}:generateContent"
-GEMINI_API_URL2 = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL2}:generateContent"
+GEMINI_API_URL = f"{llm.gemini_api_base}/v1/models/{GEMINI_MODEL}:generateContent"
+GEMINI_API_URL2 = f"{llm.gemini_api_base}/v1beta/models/{GEMINI_MODEL2}:generateContent"
 # anthropic_client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
 # openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
@@ -75,7 +78,20 @@ async def parse_llm_response(response: str) -> Dict[str, Any]:
         return {"rawResponse": response}
 
     
-async def call_llm_claude(prompt: str, max_tokens: int = 4000) -> str:
+def _record_usage(insight: str, model: str, data: Dict[str, Any]) -> None:
+    usage = data.get("usageMetadata") or {}
+    LLM_TOKENS.labels(insight, model, "prompt").inc(usage.get("promptTokenCount") or 0)
+    LLM_TOKENS.labels(insight, model, "completion").inc(usage.get("candidatesTokenCount") or 0)
+    add_span_attributes({
+        "llm.model": model,
+        "llm.insight": insight,
+        "llm.prompt_tokens": usage.get("promptTokenCount"),
+        "llm.completion_tokens": usage.get("candidatesTokenCount"),
+    })
+
+
+@traced("llm.generate")
+async def call_llm_claude(prompt: str, max_tokens: int = 4000, insight: str = "other") -> str:
     
     headers = {
         "Content-Type": "application/json"
@@ -88,6 +104,7 @@ async def call_llm_claude(prompt: str, max_tokens: int = 4000) -> str:
         }
     }
 
+    started = time.monotonic()
     try:
         async with httpx.AsyncClient(timeout=60.0) as client:
             response = await client.post(
@@ -96,6 +113,7 @@ async def call_llm_claude(prompt: str, max_tokens: int = 4000) -> str:
                 json=payload
             )
             data = response.json()
+            _record_usage(insight, GEMINI_MODEL, data)
 
             if "error" in data:
                 err = data["error"]
@@ -106,11 +124,16 @@ async def call_llm_claude(prompt: str, max_tokens: int = 4000) -> str:
 
             return data["candidates"][0]["content"]["parts"][0].get("text", "").strip()
     except HTTPException:
+        LLM_ERRORS.labels(insight, GEMINI_MODEL).inc()
         raise
     except Exception as e:
+        LLM_ERRORS.labels(insight, GEMINI_MODEL).inc()
         raise HTTPException(status_code=500, detail=f"Gemini API error: {str(e)}")
+    finally:
+        LLM_REQUEST_SECONDS.labels(insight, GEMINI_MODEL).observe(time.monotonic() - started)
     
-async def call_llm_claude2(prompt: str, max_tokens: int = 4000) -> str:
+@traced("llm.generate")
+async def call_llm_claude2(prompt: str, max_tokens: int = 4000, insight: str = "other") -> str:
     
     headers = {
         "Content-Type": "application/json"
@@ -123,6 +146,7 @@ async def call_llm_claude2(prompt: str, max_tokens: int = 4000) -> str:
         }
     }
 
+    started = time.monotonic()
     try:
         async with httpx.AsyncClient(timeout=60.0) as client:
             response = await client.post(
@@ -131,6 +155,7 @@ async def call_llm_claude2(prompt: str, max_tokens: int = 4000) -> str:
                 json=payload
             )
             data = response.json()
+            _record_usage(insight, GEMINI_MODEL2, data)
 
             if "error" in data:
                 err = data["error"]
@@ -141,6 +166,10 @@ async def call_llm_claude2(prompt: str, max_tokens: int = 4000) -> str:
 
             return data["candidates"][0]["content"]["parts"][0].get("text", "").strip()
     except HTTPException:
+        LLM_ERRORS.labels(insight, GEMINI_MODEL2).inc()
         raise
     except Exception as e:
+        LLM_ERRORS.labels(insight, GEMINI_MODEL2).inc()
         raise HTTPException(status_code=500, detail=f"Gemini API error: {str(e)}")
+    finally:
+        LLM_REQUEST_SECONDS.labels(insight, GEMINI_MODEL2).observe(time.monotonic() - started)
@@ -0,0 +1,138 @@
+import re
+from typing import Iterator
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from app.services.github_governor import quota_snapshot
+from app.services.scheduler import scheduler
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+_BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+GITHUB_REQUESTS = Counter(
+    "codehealth_github_requests_total", "GitHub API responses", ["endpoint", "method", "status"]
+)
+GITHUB_REQUEST_SECONDS = Histogram(
+    "codehealth_github_request_seconds", "GitHub API request latency, retries included",
+    ["endpoint"], buckets=_LATENCY_BUCKETS,
+)
+GITHUB_RATE_LIMIT_RETRIES = Counter(
+    "codehealth_github_rate_limit_retries_total", "Requests retried after a 403/429 rate limit", ["endpoint"]
+)
+BLOB_FETCH_BYTES = Histogram(
+    "codehealth_blob_fetch_bytes", "Decoded size of fetched file contents", buckets=_BYTES_BUCKETS
+)
+
+FILE_ANALYSIS_SECONDS = Histogram(
+    "codehealth_file_analysis_seconds", "Static analysis time per file, measured in the worker",
+    ["language"], buckets=_LATENCY_BUCKETS,
+)
+FILE_ANALYSIS_FAILURES = Counter(
+    "codehealth_file_analysis_failures_total", "Files whose analysis raised", ["language"]
+)
+FILE_ANALYSIS_DEGRADED = Counter(
+    "codehealth_file_analysis_degraded_total", "Files that only got raw line counts", ["language", "reason"]
+)
+ANALYSIS_FILES_IN_FLIGHT = Gauge(
+    "codehealth_analysis_files_in_flight", "Files submitted to the analysis pool and not finished"
+)
+PUSH_EVENTS = Counter(
+    "codehealth_push_events_total", "Push events by outcome (analyzed/coalesced/duplicate)", ["kind", "outcome"]
+)
+
+EXPRESS_REQUEST_SECONDS = Histogram(
+    "codehealth_express_request_seconds", "Express POST latency", ["path"], buckets=_LATENCY_BUCKETS
+)
+EXPRESS_REQUESTS = Counter(
+    "codehealth_express_requests_total", "Express POST responses", ["path", "status"]
+)
+EXPRESS_BODY_BYTES = Histogram(
+    "codehealth_express_body_bytes", "Bytes sent per Express POST, after compression",
+    ["path"], buckets=_BYTES_BUCKETS,
+)
+UPLOADS_IN_FLIGHT = Gauge(
+    "codehealth_uploads_in_flight", "Full-repo batch uploads running in the background"
+)
+
+LLM_REQUEST_SECONDS = Histogram(
+    "codehealth_llm_request_seconds", "LLM call latency", ["insight", "model"],
+    buckets=(0.5, 1, 2.5, 5, 10, 20, 30, 60, 120),
+)
+LLM_TOKENS = Counter(
+    "codehealth_llm_tokens_total", "Tokens reported by the LLM API", ["insight", "model", "kind"]
+)
+LLM_ERRORS = Counter(
+    "codehealth_llm_errors_total", "Failed LLM calls", ["insight", "model"]
+)
+
+CACHE_LOOKUPS = Counter(
+    "codehealth_cache_lookups_total", "Cache lookups by cache and result (hit/miss)", ["cache", "result"]
+)
+
+# GitHub paths keep these segments; everything else (owners, repos, SHAs, numbers) becomes {}
+_ENDPOINT_WORDS = {
+    "repos", "git", "blobs", "trees", "commits", "pulls", "files", "contents", "compare", "contributors",
+    "releases", "issues", "graphql", "app", "installations", "access_tokens",
+}
+_GITHUB_HOST = re.compile(r"^https?://[^/]+/")
+
+
+def github_endpoint(url: str) -> str:
+    """Low-cardinality label for a GitHub API URL, e.g. repos/{}/{}/git/blobs/{}"""
+    parts = []
+    for segment in _GITHUB_HOST.sub("", url).split("?", 1)[0].strip("/").split("/"):
+        if segment in _ENDPOINT_WORDS:
+            parts.append(segment)
+            if segment == "contents":
+                break
+        else:
+            parts.append("{}")
+    return "/".join(parts)
+
+
+class _QueueCollector(Collector):
+    """Scheduler queue depths, read when /metrics is scraped"""
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        running = GaugeMetricFamily("codehealth_jobs_running", "Jobs holding a scheduler slot", labels=["priority"])
+        queued = GaugeMetricFamily("codehealth_jobs_queued", "Jobs waiting for a scheduler slot", labels=["priority"])
+        for priority, counts in scheduler.snapshot().items():
+            running.add_metric([priority], counts["running"])
+            queued.add_metric([priority], counts["queued"])
+        yield running
+        yield queued
+
+
+class _GitHubQuotaCollector(Collector):
+    """Per-installation REST quota and throttling, read from the governors when /metrics is scraped"""
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        labels = ["installation"]
+        remaining = GaugeMetricFamily("codehealth_github_quota_remaining", "REST requests left until the reset", labels=labels)
+        limit = GaugeMetricFamily("codehealth_github_quota_limit", "REST requests allowed per window", labels=labels)
+        reset = GaugeMetricFamily("codehealth_github_quota_reset_timestamp_seconds", "When the REST quota resets", labels=labels)
+        waiting = GaugeMetricFamily("codehealth_github_requests_waiting", "Requests queued for a concurrency permit", labels=labels)
+        requests = CounterMetricFamily("codehealth_github_governed_requests", "Requests admitted by the governor", labels=labels)
+        throttled = CounterMetricFamily("codehealth_github_throttled_requests", "Requests delayed for quota", labels=labels)
+        for installation, quota in quota_snapshot().items():
+            if quota["remaining"] is not None:
+                remaining.add_metric([installation], quota["remaining"])
+            if quota["limit"] is not None:
+                limit.add_metric([installation], quota["limit"])
+            if quota["resetAt"] is not None:
+                reset.add_metric([installation], quota["resetAt"])
+            waiting.add_metric([installation], quota["waiting"])
+            requests.add_metric([installation], quota["requests"])
+            throttled.add_metric([installation], quota["throttled"])
+        yield from (remaining, limit, reset, waiting, requests, throttled)
+
+
+REGISTRY.register(_QueueCollector())
+REGISTRY.register(_GitHubQuotaCollector())
+
+
+def render() -> tuple:
+    """Body and content type for the /metrics endpoint"""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,201 @@
+import logging
+import os
+import re
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# One rule per line: a CODEOWNERS-style glob followed by the tags it sets.
+#   critical=<n>  risk points for touching the path (the highest matching value counts)
+#   sensitive | test | docs | migration | model | code | skip
+#   @team         owner; as in CODEOWNERS, the last matching rule with owners wins
+# Globs match case-insensitively. `*` stays within one path segment, `**` spans
+# segments, a leading `/` (or a `/` in the middle) anchors the pattern at the
+# repository root, and a pattern that matches a directory matches everything in it.
+DEFAULT_RULES = """
+*auth*              critical=20
+*security*          critical=20 @security-team
+*config*            critical=15
+*database*          critical=15 @database-team
+*migration*         critical=15 migration
+*.env*              critical=25 sensitive
+*dockerfile*        critical=10
+*package.json*      critical=10
+*requirements.txt*  critical=10
+
+*secret*            sensitive
+*password*          sensitive
+*private_key*       sensitive
+*api_key*           sensitive
+*credentials*       sensitive
+*token*             sensitive
+*.pem               sensitive
+*.key               sensitive
+*id_rsa*            sensitive
+
+*test*              test
+*readme*            docs
+*doc*               docs
+*.md                docs
+*model*             model
+*schema*            model
+
+*.py                code
+*.js                code
+*.jsx               code
+*.ts                code
+*.tsx               code
+*.java              code
+*.go                code
+
+node_modules/       skip
+.git/               skip
+dist/               skip
+build/              skip
+vendor/             skip
+__pycache__/        skip
+*.min.js            skip
+*.bundle.js         skip
+
+*backend*           @backend-team
+*frontend*          @frontend-team
+*api*               @api-team
+*infrastructure*    @devops-team
+"""
+
+_FLAGS = ("sensitive", "test", "docs", "migration", "model", "code", "skip")
+
+
+def glob_to_regex(pattern: str) -> str:
+    """Regex source matching a whole path against a CODEOWNERS / gitignore style glob"""
+    directory_only = pattern.endswith("/")
+    anchored = "/" in pattern.rstrip("/")
+    pattern = pattern.strip("/")
+
+    out = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+
+    prefix = "" if anchored else "(?:.*/)?"
+    suffix = "/.*" if directory_only else "(?:/.*)?"
+    return f"{prefix}{''.join(out)}{suffix}$"
+
+
+def parse_rules(text: str) -> List[Tuple[str, Dict[str, Any]]]:
+    """(glob, tags) pairs from the rule format above; unknown tags are logged and ignored"""
+    rules = []
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        glob, *tokens = line.split()
+        tags: Dict[str, Any] = {}
+        for token in tokens:
+            if token.startswith("@"):
+                tags.setdefault("owners", []).append(token[1:])
+            elif token.startswith("critical="):
+                tags["critical"] = int(token.split("=", 1)[1])
+            elif token in _FLAGS:
+                tags[token] = True
+            else:
+                logger.warning(f"Unknown path rule tag {token!r} on line {number}")
+        rules.append((glob, tags))
+    return rules
+
+
+class PathClassifier:
+    """Classifies paths with every rule compiled into a single regex.
+
+    Each rule becomes an optional lookahead with an empty marker group, so one
+    `match` call per path reports every rule that applies. Results are kept in
+    a small LRU, since the same paths come back push after push.
+    """
+
+    def __init__(self, rules: List[Tuple[str, Dict[str, Any]]], cache_entries: int = 10000):
+        self.rules = rules
+        self._pattern = re.compile(
+            "^" + "".join(f"(?:(?={glob_to_regex(glob)})()|)" for glob, _ in rules),
+            re.IGNORECASE | re.DOTALL,
+        )
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.cache_entries = cache_entries
+
+    def classify(self, path: str) -> Dict[str, Any]:
+        """Categories of one path. The returned dict is shared; don't modify it."""
+        result = self._cache.get(path)
+        if result is not None:
+            self._cache.move_to_end(path)
+            return result
+
+        result = {"critical": 0, "owners": [], **{flag: False for flag in _FLAGS}}
+        for marker, (_, tags) in zip(self._pattern.match(path).groups(), self.rules):
+            if marker is None:
+                continue
+            for tag, value in tags.items():
+                if tag == "critical":
+                    result["critical"] = max(result["critical"], value)
+                elif tag == "owners":
+                    result["owners"] = value
+                else:
+                    result[tag] = True
+
+        self._cache[path] = result
+        while len(self._cache) > self.cache_entries:
+            self._cache.popitem(last=False)
+        return result
+
+
+_classifiers: Dict[str, Tuple[Optional[float], PathClassifier]] = {}
+
+
+def _repo_rules_path(repo_full_name: str) -> str:
+    return os.path.join(settings.PATH_RULES_DIR, f"{repo_full_name}.rules")
+
+
+def classifier_for(repo_full_name: Optional[str] = None) -> PathClassifier:
+    """The default rules plus the repository's own, from PATH_RULES_DIR/<owner>/<repo>.rules.
+
+    Repository rules come after the defaults, so their owners take precedence.
+    The compiled classifier is rebuilt only when that file changes.
+    """
+    path = _repo_rules_path(repo_full_name) if repo_full_name and settings.PATH_RULES_DIR else None
+    try:
+        mtime = os.path.getmtime(path) if path else None
+    except OSError:
+        mtime = None
+
+    # Repositories without their own rules share the default classifier
+    key = repo_full_name if mtime is not None else ""
+    cached = _classifiers.get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    text = DEFAULT_RULES
+    if mtime is not None:
+        try:
+            with open(path) as f:
+                text += "\n" + f.read()
+        except OSError as e:
+            logger.warning(f"Could not read path rules for {repo_full_name}: {str(e)}")
+
+    classifier = PathClassifier(parse_rules(text))
+    _classifiers[key] = (mtime, classifier)
+    return classifier
@@ -0,0 +1,207 @@
+import asyncio
+import logging
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.schemas.fullrepo_analyze import StaticAnalysisResponse
+from app.services.analysis_pool import analyze_each
+from app.services.blob_store import BlobStore, temporary_store
+from app.services.git_mirror import is_commit_sha
+from app.services.github_api import fetch_blobs, fetch_file_content, fetch_merge_base
+from app.services.js_metrics import JS_EXTENSIONS
+from app.services.metrics import CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+ANALYZABLE_EXTENSIONS = (".py",) + JS_EXTENSIONS
+
+
+class _LRU(OrderedDict):
+    def __init__(self, max_entries: int):
+        super().__init__()
+        self.max_entries = max_entries
+
+    def get(self, key, default=None):
+        if key in self:
+            self.move_to_end(key)
+            return self[key]
+        return default
+
+    def put(self, key, value) -> None:
+        self[key] = value
+        self.move_to_end(key)
+        while len(self) > self.max_entries:
+            self.popitem(last=False)
+
+
+# Blob SHA -> metrics. A blob's content never changes, so entries never go stale.
+_analysis_by_blob = _LRU(settings.PR_ANALYSIS_CACHE_ENTRIES)
+# (repo, commit SHA, path) -> blob SHA, so unchanged base files need no request at all.
+# Only commit SHAs are keys: a branch name's entries would go stale when it moves.
+_blob_at_commit = _LRU(settings.PR_ANALYSIS_CACHE_ENTRIES)
+# (repo, base SHA, head SHA) -> merge base SHA
+_merge_bases = _LRU(settings.PR_ANALYSIS_CACHE_ENTRIES)
+
+
+def _function_deltas(path: str, before: Optional[StaticAnalysisResponse],
+                     after: Optional[StaticAnalysisResponse]) -> List[Dict[str, Any]]:
+    """Complexity changes per function, matching blocks by name (then by order for repeated names)"""
+    old: Dict[str, List[int]] = defaultdict(list)
+    new: Dict[str, List[int]] = defaultdict(list)
+    for block in (before.cyclomatic if before else []):
+        old[block.name].append(block.complexity)
+    for block in (after.cyclomatic if after else []):
+        new[block.name].append(block.complexity)
+
+    deltas = []
+    for name in list(new) + [n for n in old if n not in new]:
+        old_values, new_values = old.get(name, []), new.get(name, [])
+        for i in range(max(len(old_values), len(new_values))):
+            b = old_values[i] if i < len(old_values) else None
+            a = new_values[i] if i < len(new_values) else None
+            if a != b:
+                deltas.append({
+                    "path": path,
+                    "name": name,
+                    "before": b,
+                    "after": a,
+                    "delta": (a or 0) - (b or 0),
+                })
+    return deltas
+
+
+async def comparison_base(owner: str, repo: str, token: str, base: Optional[str], head: Optional[str]) -> Optional[str]:
+    """The commit a PR's deltas are measured from: the merge base of base and head,
+    as in the PR's own diff, so changes that landed on the base branch since the
+    PR branched off don't count as the PR's. Falls back to `base` if it can't be found."""
+    if not base or not head:
+        return base
+    pinned = is_commit_sha(base) and is_commit_sha(head)
+    key = (owner, repo, base, head)
+    if pinned and _merge_bases.get(key) is not None:
+        return _merge_bases.get(key)
+    try:
+        merge_base = await fetch_merge_base(owner, repo, base, head, token)
+    except Exception as e:
+        logger.warning(f"Could not find the merge base of {base}...{head} in {owner}/{repo}: {str(e)}")
+        return base
+    if pinned:
+        _merge_bases.put(key, merge_base)
+    return merge_base
+
+
+async def _analyze_revisions(owner: str, repo: str, token: str, head: List[Dict[str, str]],
+                             base: List[Dict[str, str]], base_ref: str, blobs: Optional[BlobStore]) -> Dict[str, str]:
+    """Fetch and analyze the head blobs and base files that aren't cached yet.
+
+    Returns the blob SHA of each base file found, by path.
+    """
+    pinned = is_commit_sha(base_ref or "")
+    base_blobs: Dict[str, str] = {}
+    if pinned:
+        for f in base:
+            blob_sha = _blob_at_commit.get((owner, repo, base_ref, f["path"]))
+            if blob_sha is not None:
+                base_blobs[f["path"]] = blob_sha
+    head_missing = [f for f in head if _analysis_by_blob.get(f["sha"]) is None]
+    base_missing = [f for f in base if f["path"] not in base_blobs]
+    CACHE_LOOKUPS.labels("pr_head_analysis", "hit").inc(len(head) - len(head_missing))
+    CACHE_LOOKUPS.labels("pr_head_analysis", "miss").inc(len(head_missing))
+    CACHE_LOOKUPS.labels("pr_base_blob", "hit").inc(len(base) - len(base_missing))
+    CACHE_LOOKUPS.labels("pr_base_blob", "miss").inc(len(base_missing))
+
+    async def fetch_head():
+        if not head_missing:
+            return []
+        try:
+            fetched = await fetch_blobs(owner, repo, head_missing, token, blobs)
+        except Exception as e:
+            logger.warning(f"Could not fetch PR head blobs for {owner}/{repo}: {str(e)}")
+            return []
+        sha_by_path = {f["path"]: f["sha"] for f in head_missing}
+        return [{**f, "blobSha": sha_by_path[f["path"]]} for f in fetched]
+
+    async def fetch_base():
+        if not base_missing:
+            return []
+        fetched = await fetch_file_content(owner, repo, [{"path": f["path"], "sha": base_ref} for f in base_missing], token, blobs)
+        for f in fetched:
+            base_blobs[f["path"]] = f["blobSha"]
+            if pinned:
+                _blob_at_commit.put((owner, repo, base_ref, f["path"]), f["blobSha"])
+        return [f for f in fetched if _analysis_by_blob.get(f["blobSha"]) is None]
+
+    head_files, base_files = await asyncio.gather(fetch_head(), fetch_base())
+
+    # The same blob can appear on both sides (renames, reverted files); analyze it once
+    to_analyze: Dict[str, Dict[str, str]] = {}
+    for f in head_files + base_files:
+        to_analyze.setdefault(f["blobSha"], f)
+    if not to_analyze:
+        return base_blobs
+
+    shas = list(to_analyze)
+    results = await analyze_each([{"path": to_analyze[sha]["path"], "content": to_analyze[sha]["content"]} for sha in shas])
+    for sha, result in zip(shas, results):
+        if result is not None:
+            _analysis_by_blob.put(sha, result)
+    return base_blobs
+
+
+async def analyze_pr_structure(owner: str, repo: str, token: str, files: List[Dict[str, Any]],
+                               base_ref: Optional[str]) -> Dict[str, Any]:
+    """Per-function complexity and per-file maintainability deltas for the files a PR touches.
+
+    Only Python and JS/TS files are read, head and base concurrently. Metrics are
+    cached by blob SHA, so a re-push only analyzes files whose content changed.
+    `base_ref` should be the merge base (see comparison_base).
+    """
+    touched = [f for f in files if f.get("filename", "").endswith(ANALYZABLE_EXTENSIONS)]
+    if not touched:
+        return {"functionDeltas": [], "fileDeltas": []}
+
+    head = [
+        {"path": f["filename"], "sha": f["sha"]}
+        for f in touched
+        if f.get("status") != "removed" and f.get("sha")
+    ]
+    base = [
+        {"path": f.get("previous_filename") or f["filename"]}
+        for f in touched
+        if f.get("status") != "added" and base_ref
+    ]
+
+    with temporary_store("pr-") as blobs:
+        base_blobs = await _analyze_revisions(owner, repo, token, head, base, base_ref, blobs)
+
+    function_deltas, file_deltas = [], []
+    for f in touched:
+        path = f["filename"]
+        after = _analysis_by_blob.get(f["sha"]) if f.get("status") != "removed" else None
+        before = None
+        if f.get("status") != "added" and base_ref:
+            base_blob = base_blobs.get(f.get("previous_filename") or path)
+            before = _analysis_by_blob.get(base_blob) if base_blob else None
+        if before is None and after is None:
+            continue
+        if any(r is not None and r.analysisMode != "full" for r in (before, after)):
+            # One side only has line counts; its functions would all look added or removed
+            continue
+
+        function_deltas.extend(_function_deltas(path, before, after))
+        mi_before = before.maintainability.mi if before else None
+        mi_after = after.maintainability.mi if after else None
+        if mi_before != mi_after:
+            file_deltas.append({
+                "path": path,
+                "before": round(mi_before, 2) if mi_before is not None else None,
+                "after": round(mi_after, 2) if mi_after is not None else None,
+                "delta": round((mi_after or 0) - (mi_before or 0), 2),
+            })
+
+    logger.info(
+        f"PR structure for {owner}/{repo}: {len(function_deltas)} function deltas, "
+        f"{len(file_deltas)} file MI deltas"
+    )
+    return {"functionDeltas": function_deltas, "fileDeltas": file_deltas}
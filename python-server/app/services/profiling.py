@@ -0,0 +1,296 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.tracing import current_run_id
+
+logger = logging.getLogger(__name__)
+
+# Prefix for stacks sampled in the analysis pool's worker processes
+WORKER_FRAME = "analysis-worker"
+
+_code_labels: Dict[Any, str] = {}
+
+
+def _short_path(filename: str) -> str:
+    for marker in ("/site-packages/", "/app/"):
+        i = filename.rfind(marker)
+        if i != -1:
+            return filename[i + len(marker):] if marker == "/site-packages/" else filename[i + 1:]
+    return os.path.basename(filename)
+
+
+def _frame_label(code) -> str:
+    label = _code_labels.get(code)
+    if label is None:
+        label = _code_labels[code] = f"{code.co_qualname} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+    return label
+
+
+def fold_stack(frame) -> str:
+    """One stack in the collapsed format read by flamegraph.pl, speedscope and inferno: root;...;leaf"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return ";".join(labels)
+
+
+class StackSampler:
+    """Samples one thread's Python stack from a background thread.
+
+    Every sample is added to each registered Counter, so overlapping profiles
+    share one sampling thread. The thread only runs while a Counter is registered.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.lock = threading.Lock()
+        self._targets: Tuple[Counter, ...] = ()
+        self._stop: Optional[threading.Event] = None
+
+    def add(self, counts: Counter) -> None:
+        with self.lock:
+            self._targets += (counts,)
+            if self._stop is None:
+                self._stop = threading.Event()
+                threading.Thread(target=self._run, args=(self._stop,), name="stack-sampler", daemon=True).start()
+
+    def remove(self, counts: Counter) -> None:
+        with self.lock:
+            self._targets = tuple(c for c in self._targets if c is not counts)
+            if not self._targets and self._stop is not None:
+                self._stop.set()
+                self._stop = None
+
+    def _run(self, stop: threading.Event) -> None:
+        while not stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = fold_stack(frame)
+            del frame
+            with self.lock:
+                for counts in self._targets:
+                    counts[stack] += 1
+
+
+def sample_interval() -> float:
+    return settings.PROFILE_SAMPLE_INTERVAL_MS / 1000
+
+
+_memory_users = 0
+
+
+def _start_tracemalloc() -> tracemalloc.Snapshot:
+    global _memory_users
+    if _memory_users == 0 and not tracemalloc.is_tracing():
+        tracemalloc.start(settings.PROFILE_TRACEMALLOC_FRAMES)
+    _memory_users += 1
+    return tracemalloc.take_snapshot()
+
+
+def _stop_tracemalloc(baseline: tracemalloc.Snapshot) -> Counter:
+    """Bytes allocated since `baseline` and still alive, folded by allocation stack"""
+    global _memory_users
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    current = tracemalloc.take_snapshot().filter_traces(ignore)
+    _memory_users -= 1
+    if _memory_users == 0:
+        tracemalloc.stop()
+
+    stacks: Counter = Counter()
+    for stat in current.compare_to(baseline.filter_traces(ignore), "traceback"):
+        if stat.size_diff > 0:
+            # Traceback frames run from the oldest call to the allocation
+            stacks[";".join(f"{_short_path(f.filename)}:{f.lineno}" for f in stat.traceback)] += stat.size_diff
+    return stacks
+
+
+class Profile:
+    """CPU samples, and optionally live allocations, for a time window or one job"""
+
+    def __init__(self, name: str, reason: str, memory: bool = False):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.reason = reason  # window | job | slow
+        self.memory_requested = memory
+        self.status = "armed"
+        self.started: Optional[float] = None
+        self.ended: Optional[float] = None
+        self.cpu: Counter = Counter()
+        self.memory: Optional[Counter] = None
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def begin(self, memory: bool) -> None:
+        self.status = "running"
+        self.started = time.time()
+        if memory:
+            self._baseline = _start_tracemalloc()
+        _main_sampler().add(self.cpu)
+
+    def finish(self) -> None:
+        _main_sampler().remove(self.cpu)
+        if self._baseline is not None:
+            self.memory = _stop_tracemalloc(self._baseline)
+            self._baseline = None
+        if self._timer is not None:
+            self._timer.cancel()
+        self.ended = time.time()
+        self.status = "done"
+
+    def adopt(self, other: "Profile") -> None:
+        """Take over what `other` collected, keeping this profile's ID"""
+        self.name, self.started, self.ended = other.name, other.started, other.ended
+        self.cpu, self.memory, self.status = other.cpu, other.memory, other.status
+
+    def folded(self, kind: str) -> Optional[str]:
+        """Collapsed stacks weighted by samples (cpu) or bytes (memory)"""
+        stacks = self.cpu if kind == "cpu" else self.memory
+        if stacks is None:
+            return None
+        with _main_sampler().lock:
+            lines = [f"{stack} {count}" for stack, count in stacks.items()]
+        return "\n".join(sorted(lines)) + "\n"
+
+    def summary(self) -> Dict[str, Any]:
+        end = self.ended or time.time()
+        return {
+            "id": self.id,
+            "name": self.name,
+            "reason": self.reason,
+            "status": self.status,
+            "startedAt": self.started,
+            "seconds": round(end - self.started, 3) if self.started else None,
+            "samples": sum(self.cpu.values()),
+            "intervalMs": settings.PROFILE_SAMPLE_INTERVAL_MS,
+            "memory": self.memory is not None or self._baseline is not None,
+        }
+
+
+_sampler: Optional[StackSampler] = None
+_profiles: "OrderedDict[str, Profile]" = OrderedDict()
+_windows: Dict[str, Profile] = {}
+# Job ID (a repoId or run ID) -> profile waiting for that job's next run
+_armed: Dict[str, Profile] = {}
+# Profile of the job running in the current task, if it is being collected
+_current: contextvars.ContextVar[Optional[Profile]] = contextvars.ContextVar("current_profile", default=None)
+
+
+def _main_sampler() -> StackSampler:
+    """Sampler for the event loop thread; created from it on first use"""
+    global _sampler
+    if _sampler is None:
+        _sampler = StackSampler(threading.get_ident(), sample_interval())
+    return _sampler
+
+
+def _keep(profile: Profile) -> None:
+    _profiles[profile.id] = profile
+    finished = [p for p in _profiles.values() if p.status == "done"]
+    for old in finished[:max(0, len(finished) - settings.PROFILE_KEEP)]:
+        del _profiles[old.id]
+
+
+def start_window(seconds: Optional[float], memory: bool) -> Profile:
+    """Profile the whole process until stopped, or for `seconds`"""
+    seconds = min(seconds or settings.PROFILE_MAX_WINDOW_SECONDS, settings.PROFILE_MAX_WINDOW_SECONDS)
+    profile = Profile(f"window {seconds:g}s", "window", memory)
+    profile.begin(memory)
+    profile._timer = asyncio.get_running_loop().call_later(seconds, stop, profile.id)
+    _windows[profile.id] = profile
+    _keep(profile)
+    return profile
+
+
+def arm_job(job_id: str, memory: bool) -> Profile:
+    """Profile the next run whose repoId or run ID is `job_id`"""
+    profile = Profile(f"job {job_id}", "job", memory)
+    _armed[job_id] = profile
+    _keep(profile)
+    return profile
+
+
+def stop(profile_id: str) -> Optional[Profile]:
+    profile = _profiles.get(profile_id)
+    if profile is None:
+        return None
+    if _windows.pop(profile_id, None) is not None:
+        profile.finish()
+    elif profile.status == "armed":
+        for job_id, armed in list(_armed.items()):
+            if armed is profile:
+                del _armed[job_id]
+        profile.status = "cancelled"
+    return profile
+
+
+def get(profile_id: str) -> Optional[Profile]:
+    return _profiles.get(profile_id)
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    return [p.summary() for p in reversed(_profiles.values())]
+
+
+def worker_sample_interval() -> Optional[float]:
+    """Interval for the analysis workers to sample at, if anything is collecting now"""
+    return sample_interval() if _windows or _current.get() is not None else None
+
+
+def add_worker_samples(counts: Counter) -> None:
+    """Merge stacks sampled in an analysis worker into the profiles collecting right now"""
+    targets = list(_windows.values())
+    job = _current.get()
+    if job is not None:
+        targets.append(job)
+    if not counts or not targets:
+        return
+    with _main_sampler().lock:
+        for profile in targets:
+            for stack, count in counts.items():
+                profile.cpu[f"{WORKER_FRAME};{stack}"] += count
+
+
+def profiled_run(func):
+    """Collect a profile of each pipeline run while one is wanted.
+
+    A run is kept if its repoId or run ID was armed with `arm_job`, or if it
+    took longer than PROFILE_SLOW_SECONDS. The event loop is shared, so the
+    profile also holds samples of whatever else ran at the same time.
+    """
+    @functools.wraps(func)
+    async def wrapper(payload, *args, **kwargs):
+        threshold = settings.PROFILE_SLOW_SECONDS
+        if not _armed and threshold <= 0:
+            return await func(payload, *args, **kwargs)
+
+        repo_id = str(getattr(payload, "repoId", None) or "")
+        profile = Profile(f"{func.__name__} repo {repo_id}", "slow")
+        profile.begin(memory=any(p.memory_requested for p in _armed.values()))
+        reset = _current.set(profile)
+        try:
+            return await func(payload, *args, **kwargs)
+        finally:
+            _current.reset(reset)
+            profile.finish()
+            armed = next((_armed.pop(job_id) for job_id in (repo_id, current_run_id()) if job_id in _armed), None)
+            if armed is not None:
+                armed.adopt(profile)
+            elif threshold > 0 and profile.ended - profile.started >= threshold:
+                logger.info(f"Kept a profile of {profile.name}: {profile.ended - profile.started:.1f}s")
+                _keep(profile)
+    return wrapper
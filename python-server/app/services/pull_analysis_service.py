@@ -1,5 +1,14 @@
-async def analyze_pr_opened(files: list[dict]) -> dict:
+from app.services.path_rules import PathClassifier, classifier_for
+from app.services.secret_scanner import scan_patch
+
+
+async def analyze_pr_opened(files: list[dict], structure: dict | None = None, load_patch=None,
+                            paths: PathClassifier | None = None) -> dict:
     
+    # Classify every path once
+    paths = paths or classifier_for()
+    classes = [paths.classify(f.get("filename", "")) for f in files]
+
     # Basic metrics
     total_add = sum(f.get("additions", 0) for f in files)
     total_del = sum(f.get("deletions", 0) for f in files)
@@ -11,8 +20,19 @@ async def analyze_pr_opened(files: list[dict]) -> dict:
     removed_files = [f for f in files if f.get("status") == "removed"]
     renamed_files = [f for f in files if f.get("status") == "renamed"]
 
+    # Structural changes from the head/base comparison of touched files
+    structure = structure or {}
+    function_deltas = structure.get("functionDeltas", [])
+    file_deltas = structure.get("fileDeltas", [])
+    added_complexity = sum(d["delta"] for d in function_deltas if d["delta"] > 0)
+    maintainability_drop = sum(-d["delta"] for d in file_deltas if d["delta"] < 0)
+
     # Calculate complexity score (0-100)
-    complexity = min(100, (file_count * 5) + (total_add / 2) + (total_del / 3))
+    complexity = min(
+        100,
+        (file_count * 5) + (total_add / 2) + (total_del / 3)
+        + (added_complexity * 2) + (maintainability_drop / 2)
+    )
 
     # Calculate risk score (0-100)
     risk = 0
@@ -30,24 +50,7 @@ async def analyze_pr_opened(files: list[dict]) -> dict:
         risk += 30
     
     # Critical file patterns
-    critical_patterns = {
-        "auth": 20,
-        "security": 20,
-        "config": 15,
-        "database": 15,
-        "migration": 15,
-        ".env": 25,
-        "dockerfile": 10,
-        "package.json": 10,
-        "requirements.txt": 10,
-    }
-    
-    for f in files:
-        filename = f.get("filename", "").lower()
-        for pattern, score in critical_patterns.items():
-            if pattern in filename:
-                risk += score
-                break
+    risk += sum(c["critical"] for c in classes)
     
     risk = min(100, risk + complexity * 0.3)
 
@@ -66,47 +69,43 @@ async def analyze_pr_opened(files: list[dict]) -> dict:
         if "." in f.get("filename", "")
     })
 
-    has_tests = any("test" in f.get("filename", "").lower() for f in files)
+    has_tests = any(c["test"] for c in classes)
     has_code_changes = any(
-        f.get("filename", "").endswith((".js", ".py", ".ts", ".jsx", ".tsx", ".java", ".go"))
-        for f in files
+        c["code"] for f, c in zip(files, classes)
         if f.get("status") in ["added", "modified"]
     )
     missingTests = has_code_changes and not has_tests
 
     # Check for missing documentation
-    has_docs = any(
-        any(keyword in f.get("filename", "").lower() for keyword in ["readme", "doc", ".md"])
-        for f in files
-    )
+    has_docs = any(c["docs"] for c in classes)
     missingDocs = file_count > 5 and not has_docs
 
     # Security warnings
     securityWarnings = []
     
     # Check for sensitive files
-    sensitive_patterns = ["secret", "password", "private_key", "api_key", ".env", "credentials", "token"]
-    for f in files:
-        filename = f.get("filename", "").lower()
-        for pattern in sensitive_patterns:
-            if pattern in filename:
-                securityWarnings.append(f"⚠️ Sensitive file: {f.get('filename')}")
-                break
-    
-    # Check for hardcoded secrets in patches (if available)
-    secret_keywords = ["password", "api_key", "secret", "token", "private_key"]
+    for f, c in zip(files, classes):
+        if c["sensitive"]:
+            securityWarnings.append(f"⚠️ Sensitive file: {f.get('filename')}")
+    
+    # Check for hardcoded secrets on the added lines of each patch
+    secretFindings = []
     for f in files:
         patch = f.get("patch", "")
-        if patch:
-            patch_lower = patch.lower()
-            for keyword in secret_keywords:
-                if keyword in patch_lower and "=" in patch:
-                    securityWarnings.append(f"🔒 Potential hardcoded secret in: {f.get('filename')}")
-                    break
+        if f.get("patchOmitted") and load_patch is not None:
+            # Large patches aren't kept with the file list; read them one at a time
+            patch = await load_patch(f)
+        findings = scan_patch(patch)
+        if findings:
+            lines = ", ".join(str(finding["line"]) for finding in findings if finding["line"])
+            securityWarnings.append(
+                f"🔒 Potential hardcoded secret in: {f.get('filename')}" + (f" (line {lines})" if lines else "")
+            )
+            secretFindings.extend({"path": f.get("filename"), **finding} for finding in findings)
     
     # Check for database changes without migrations
-    has_db_changes = any("model" in f.get("filename", "").lower() or "schema" in f.get("filename", "").lower() for f in files)
-    has_migrations = any("migration" in f.get("filename", "").lower() for f in files)
+    has_db_changes = any(c["model"] for c in classes)
+    has_migrations = any(c["migration"] for c in classes)
     if has_db_changes and not has_migrations:
         securityWarnings.append("⚠️ Database schema changes detected without migrations")
 
@@ -139,23 +138,18 @@ async def analyze_pr_opened(files: list[dict]) -> dict:
     if securityWarnings:
         suggestions.append("Security review recommended due to sensitive file changes")
 
+    complex_functions = sorted(
+        (d for d in function_deltas if d["delta"] > 0 and (d["after"] or 0) > 10),
+        key=lambda d: d["delta"],
+        reverse=True,
+    )
+    for d in complex_functions[:5]:
+        suggestions.append(
+            f"Complexity of {d['name']} in {d['path']} rose from {d['before'] or 0} to {d['after']} - consider splitting it"
+        )
+
     # Recommend reviewers based on impact areas
-    recommendedReviewers = []
-    reviewer_map = {
-        "backend": ["backend-team"],
-        "frontend": ["frontend-team"],
-        "api": ["api-team"],
-        "database": ["database-team"],
-        "security": ["security-team"],
-        "infrastructure": ["devops-team"],
-    }
-    
-    for area in impact_dirs:
-        for key, reviewers in reviewer_map.items():
-            if key in area.lower():
-                recommendedReviewers.extend(reviewers)
-    
-    recommendedReviewers = list(set(recommendedReviewers)) 
+    recommendedReviewers = list({owner for c in classes for owner in c["owners"]})
 
     return {
         "riskScore": round(risk, 2),
@@ -173,6 +167,9 @@ async def analyze_pr_opened(files: list[dict]) -> dict:
         "missingTests": missingTests,
         "missingDocs": missingDocs,
         "securityWarnings": securityWarnings,
+        "secretFindings": secretFindings,
         "recommendedReviewers": recommendedReviewers,
         "suggestions": suggestions,
+        "functionDeltas": function_deltas,
+        "fileDeltas": file_deltas,
     }
\ No newline at end of file
@@ -1,12 +1,89 @@
-from app.schemas.pushScan_model import PushScanPayload, PushScanResponse
+from app.schemas.pushScan_model import PushScanPayload, PushScanResponse, PushScanBatchResponse
+from app.schemas.fullrepo_analyze import StaticAnalysisResponse
 from app.services.github_auth import get_installation_token
 from app.services.github_api import fetch_changed_files_code
-from app.services.scanning import analysisClass
+from app.services.analysis_pool import analyze_each, analyze_files, can_analyze
+from app.services.express_transport import post_items
+from typing import Any, Dict, List, Tuple
+import asyncio
 import aiohttp
-import os
-from dotenv import load_dotenv
-load_dotenv()
-BACKEND_URL=os.getenv('EXPRESS_URL')
+
+
+def merge_push_scans(pending: PushScanPayload, newer: PushScanPayload) -> PushScanPayload:
+    """One payload covering both pushes; files are read at the newer head, so each is scanned once"""
+    added = list(dict.fromkeys(pending.filesAdded + newer.filesAdded))
+    added_set = set(added)
+    modified = [f for f in dict.fromkeys(pending.filesModified + newer.filesModified) if f not in added_set]
+    return newer.model_copy(update={"filesAdded": added, "filesModified": modified})
+
+
+def _scannable(files: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """(all scannable files, Python files, JS/TS files)"""
+    exts = {'.py', '.js', '.ts', '.jsx', '.tsx'}
+
+    filtered_files = [
+        file for file in files
+        if any(file['path'].endswith(ext) for ext in exts)
+    ]
+
+    python_files = [f for f in filtered_files if f['path'].endswith('.py')]
+    js_files = [f for f in filtered_files if f['path'].endswith(('.js', '.ts', '.tsx', '.jsx'))]
+    return filtered_files, python_files, js_files
+
+
+def _queued(js_files: List[Dict[str, Any]], failed: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Metrics are computed in the worker pool; JS/TS only goes to the Express
+    # queue when in-process analysis is off or the file failed to tokenize
+    queued_files = [f for f in js_files if not can_analyze(f['path'])]
+    queued_files += [f for f in failed if not f['path'].endswith('.py')]
+    return queued_files
+
+
+async def _post_scan_results(session: aiohttp.ClientSession, req: PushScanPayload,
+                             analysis: List[StaticAnalysisResponse], queued_files: List[Dict[str, Any]]) -> None:
+    if analysis:
+        for analysis_result in analysis:
+            print(f"Analyzed file: {analysis_result.path}")
+            print("=" * 100)
+            print(f"Analysis result: {analysis_result}")
+            print("=" * 100)
+
+        try:
+            results = await post_items(
+                session,
+                "/scanning/python-batch",
+                "Metrics",
+                analysis,
+                {
+                    "repoId": req.repoId,
+                    "branch": req.branch
+                }
+            )
+            print(f"Metrics batch result: {[r for _, r in results]}")
+            print(f"Successfully sent metrics for {len(analysis)} files to batch API")
+        
+        except Exception as e:
+            print(f"Error sending metrics batch: {str(e)}")
+
+    # Queue JS/TS files for the Express worker
+    if queued_files:
+        try:
+            results = await post_items(
+                session,
+                "/scanning/enqueue-batch",
+                "files",
+                queued_files,
+                {
+                    "repoId": req.repoId,
+                    "isPushEvent":True,
+                    "branch":req.branch
+                }
+            )
+            print(f"JS/TS batch result: {[r for _, r in results]}")
+            print(f"Successfully enqueued {len(queued_files)} JS/TS files")
+        
+        except Exception as e:
+            print(f"Error processing JS/TS files: {str(e)}")
 
 
 async def ScanFiles(req: PushScanPayload) -> PushScanResponse:
@@ -22,80 +99,15 @@ async def ScanFiles(req: PushScanPayload) -> PushScanResponse:
 
         print("Files you modified and added in the repo are ==============", files)
 
-        exts = {'.py', '.js', '.ts', '.jsx', '.tsx'}
-
-        filtered_files = [
-            file for file in files
-            if any(file['path'].endswith(ext) for ext in exts)
-        ]
-
-        python_files = [f for f in filtered_files if f['path'].endswith('.py')]
-        js_files = [f for f in filtered_files if f['path'].endswith(('.js', '.ts', '.tsx', '.jsx'))]
-
+        filtered_files, python_files, js_files = _scannable(files)
         print(f"Found {len(python_files)} Python files and {len(js_files)} JS/TS files")
 
+        local_files = [f for f in filtered_files if can_analyze(f['path'])]
+        analysis, failed = await analyze_files(local_files)
+        queued_files = _queued(js_files, failed)
+
         async with aiohttp.ClientSession() as session:
-            # Process Python files
-            if python_files:
-                analysis = []
-                for py_file in python_files:
-                    path = py_file["path"]
-                    content = py_file["content"]
-                    
-                    try:
-                        analysis_result = await analysisClass.analyze_py_code(path, content)
-                        analysis.append(analysis_result)
-                        
-                        print(f"Analyzed Python file: {path}")
-                        print("=" * 100)
-                        print(f"Analysis result: {analysis_result}")
-                        print("=" * 100)
-                        
-                    except Exception as e:
-                        print(f"Error analyzing {path}: {str(e)}")
-                        continue
-
-                if analysis:
-                    try:
-                        # Convert Pydantic models to dicts for JSON serialization
-                        serialized_analysis = [
-                            a.model_dump() if hasattr(a, 'model_dump') else a.dict()
-                            for a in analysis
-                        ]
-                        
-                        async with session.post(
-                            f"{BACKEND_URL}/scanning/python-batch",
-                            json={
-                                "Metrics": serialized_analysis,
-                                "repoId": req.repoId,
-                                "branch": "main"  
-                            }
-                        ) as resp:
-                            result = await resp.json()
-                            print(f"Python batch result: {result}")
-                            print(f"Successfully sent {len(analysis)} Python files to batch API")
-                    
-                    except Exception as e:
-                        print(f"Error sending Python batch: {str(e)}")
-
-            # Process JS/TS files
-            if js_files:
-                try:
-                    async with session.post(
-                        f"{BACKEND_URL}/scanning/enqueue-batch",
-                        json={
-                            "files": js_files,
-                            "repoId": req.repoId,
-                            "isPushEvent":True,
-                            "branch":req.branch
-                        }
-                    ) as resp:
-                        result = await resp.json()
-                        print(f"JS/TS batch result: {result}")
-                        print(f"Successfully enqueued {len(js_files)} JS/TS files")
-                
-                except Exception as e:
-                    print(f"Error processing JS/TS files: {str(e)}")
+            await _post_scan_results(session, req, analysis, queued_files)
 
         return PushScanResponse(
             ok=True,
@@ -107,4 +119,81 @@ async def ScanFiles(req: PushScanPayload) -> PushScanResponse:
         print(f"Error in ScanFiles: {str(e)}")
         import traceback
         traceback.print_exc()
-        return PushScanResponse(ok=False, filesScanned=0, message=f"Error: {str(e)}")
\ No newline at end of file
+        return PushScanResponse(ok=False, filesScanned=0, message=f"Error: {str(e)}")
+
+
+async def ScanFilesBatch(reqs: List[PushScanPayload]) -> PushScanBatchResponse:
+    """Scan many pushes at once: one token per installation, one GitHub session
+    for every fetch, one analysis pool batch for every file, and the per-repo
+    Express posts sent concurrently.
+
+    Pushes to the same repo and branch are merged first (see merge_push_scans).
+    Results line up with `reqs`; merged pushes share theirs.
+    """
+    merged: Dict[Tuple[int, str], PushScanPayload] = {}
+    for req in reqs:
+        key = (req.repoId, req.branch)
+        merged[key] = merge_push_scans(merged[key], req) if key in merged else req
+    pushes = list(merged.values())
+
+    installations = list(dict.fromkeys(p.installationId for p in pushes))
+    tokens = dict(zip(installations, await asyncio.gather(
+        *(get_installation_token(i) for i in installations), return_exceptions=True
+    )))
+
+    async def fetch(session: aiohttp.ClientSession, req: PushScanPayload) -> List[Dict[str, Any]]:
+        token = tokens[req.installationId]
+        if isinstance(token, BaseException):
+            raise token
+        return await fetch_changed_files_code(
+            repoFullName=req.repoName,
+            repoId=req.repoId,
+            token=token,
+            addedFiles=req.filesAdded,
+            modifiedFiles=req.filesModified,
+            session=session,
+        )
+
+    async with aiohttp.ClientSession() as session:
+        fetched = await asyncio.gather(*(fetch(session, p) for p in pushes), return_exceptions=True)
+
+    scanned = [None if isinstance(files, BaseException) else _scannable(files) for files in fetched]
+    local = [
+        (i, f) for i, split in enumerate(scanned) if split is not None
+        for f in split[0] if can_analyze(f['path'])
+    ]
+    print(f"Batch of {len(reqs)} pushes ({len(pushes)} after merging): analyzing {len(local)} files")
+    results = await analyze_each([f for _, f in local])
+
+    analysis: List[List[StaticAnalysisResponse]] = [[] for _ in pushes]
+    failed: List[List[Dict[str, Any]]] = [[] for _ in pushes]
+    for (i, f), result in zip(local, results):
+        if result is None:
+            failed[i].append(f)
+        else:
+            analysis[i].append(result)
+
+    responses: Dict[Tuple[int, str], PushScanResponse] = {}
+    posts = []
+    async with aiohttp.ClientSession() as session:
+        for i, req in enumerate(pushes):
+            key = (req.repoId, req.branch)
+            if scanned[i] is None:
+                print(f"Error scanning push to {req.repoName}@{req.branch}: {str(fetched[i])}")
+                responses[key] = PushScanResponse(ok=False, filesScanned=0, message=f"Error: {str(fetched[i])}")
+                continue
+            filtered_files, python_files, js_files = scanned[i]
+            posts.append(_post_scan_results(session, req, analysis[i], _queued(js_files, failed[i])))
+            responses[key] = PushScanResponse(
+                ok=True,
+                filesScanned=len(filtered_files),
+                message=f"Processed {len(python_files)} Python and {len(js_files)} JS/TS files"
+            )
+        await asyncio.gather(*posts)
+
+    per_push = [responses[(req.repoId, req.branch)] for req in reqs]
+    return PushScanBatchResponse(
+        ok=all(r.ok for r in responses.values()),
+        filesScanned=sum(r.filesScanned for r in responses.values()),
+        results=per_push,
+    )
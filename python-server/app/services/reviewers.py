@@ -0,0 +1,215 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+from collections import OrderedDict, defaultdict, deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.github_api import fetch_codeowners
+from app.services.path_rules import glob_to_regex
+
+logger = logging.getLogger(__name__)
+
+OWNER_WEIGHT = 2.0
+# Each older change by the same author counts a bit less than the one after it
+AUTHOR_DECAY = 0.8
+_CODEOWNERS_CACHE_ENTRIES = 256
+
+
+class CodeOwners:
+    """A CODEOWNERS file compiled into one regex.
+
+    Rules are tried last to first as alternatives, each a lookahead followed by
+    an empty marker group, so the group that matched is the rule GitHub would
+    apply (the last matching one) and a lookup is a single `match` call.
+    """
+
+    def __init__(self, text: str):
+        self.rules: List[Tuple[str, List[str]]] = []
+        for line in text.splitlines():
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            pattern, *owners = line.split()
+            self.rules.append((pattern, [owner.lstrip("@") for owner in owners]))
+
+        alternatives = "|".join(f"(?={glob_to_regex(pattern)})()" for pattern, _ in reversed(self.rules))
+        self._pattern = re.compile(f"^(?:{alternatives})?", re.DOTALL) if self.rules else None
+
+    def owners_of(self, path: str) -> List[str]:
+        if self._pattern is None:
+            return []
+        match = self._pattern.match(path)
+        if match is None or match.lastindex is None:
+            return []
+        # Rules without owners explicitly leave a path unowned
+        return self.rules[len(self.rules) - match.lastindex][1]
+
+
+class AuthorHistory:
+    """Who changed each file most recently, per repository.
+
+    Fed from push events, so recommending reviewers needs no GitHub requests.
+    Only GitHub usernames are recorded (commits whose author email isn't linked
+    to an account are skipped), since they're what a review request takes.
+    Each repository keeps at most REVIEWER_HISTORY_FILES paths (least recently
+    changed are dropped first) and the last REVIEWER_HISTORY_PER_FILE authors of
+    each, backed by SQLite so the history survives restarts.
+    """
+
+    def __init__(self, path: str, max_files: int, per_file: int):
+        self.path = path
+        self.max_files = max_files
+        self.per_file = per_file
+        self._repos: Dict[str, "OrderedDict[str, deque]"] = {}
+        # Last write sequence per repository; orders the rows by recency
+        self._seq: Dict[str, int] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        if not self.path:
+            return None
+        if self._conn is None:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS authors (repo TEXT NOT NULL, path TEXT NOT NULL, "
+                    "logins TEXT NOT NULL, seq INTEGER NOT NULL, PRIMARY KEY (repo, path))"
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS authors_seq ON authors (repo, seq)")
+            except sqlite3.Error as e:
+                logger.warning(f"Reviewer history store unavailable: {str(e)}")
+                self.path = ""
+                return None
+        return self._conn
+
+    def _paths(self, repo_full_name: str) -> "OrderedDict[str, deque]":
+        """The repository's history, loaded from the store on first use"""
+        key = repo_full_name.lower()
+        paths = self._repos.get(key)
+        if paths is not None:
+            return paths
+
+        paths = self._repos[key] = OrderedDict()
+        self._seq[key] = 0
+        db = self._db()
+        if db is not None:
+            try:
+                rows = db.execute(
+                    "SELECT path, logins, seq FROM authors WHERE repo = ? ORDER BY seq DESC LIMIT ?",
+                    (key, self.max_files),
+                ).fetchall()
+                for path, logins, _ in reversed(rows):
+                    paths[path] = deque(json.loads(logins), maxlen=self.per_file)
+                if rows:
+                    self._seq[key] = rows[0][2]
+            except (sqlite3.Error, ValueError) as e:
+                logger.warning(f"Reviewer history load failed for {repo_full_name}: {str(e)}")
+        return paths
+
+    def record(self, repo_full_name: str, commits: Iterable[Any]) -> None:
+        paths = self._paths(repo_full_name)
+        changed: Dict[str, deque] = {}
+        removed = set()
+        for commit in commits:
+            login = getattr(commit, "authorLogin", None)
+            if not login:
+                continue
+            for path in (commit.added or []) + (commit.modified or []):
+                authors = paths.get(path)
+                if authors is None:
+                    authors = paths[path] = deque(maxlen=self.per_file)
+                authors.append(login)
+                paths.move_to_end(path)
+                changed[path] = authors
+                removed.discard(path)
+            for path in commit.removed or []:
+                paths.pop(path, None)
+                changed.pop(path, None)
+                removed.add(path)
+        while len(paths) > self.max_files:
+            paths.popitem(last=False)
+        if changed or removed:
+            self._store(repo_full_name.lower(), changed, removed)
+
+    def _store(self, key: str, changed: Dict[str, deque], removed: Iterable[str]) -> None:
+        db = self._db()
+        if db is None:
+            return
+        rows = []
+        for path, authors in changed.items():
+            self._seq[key] += 1
+            rows.append((key, path, json.dumps(list(authors)), self._seq[key]))
+        try:
+            with db:
+                db.execute("BEGIN")
+                db.executemany("DELETE FROM authors WHERE repo = ? AND path = ?", [(key, p) for p in removed])
+                db.executemany("INSERT OR REPLACE INTO authors (repo, path, logins, seq) VALUES (?, ?, ?, ?)", rows)
+                db.execute(
+                    "DELETE FROM authors WHERE repo = ? AND seq <= "
+                    "(SELECT seq FROM authors WHERE repo = ? ORDER BY seq DESC LIMIT 1 OFFSET ?)",
+                    (key, key, self.max_files),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Reviewer history write failed: {str(e)}")
+
+    def recent_authors(self, repo_full_name: str, path: str) -> Dict[str, float]:
+        """Authors of a path weighted by recency, newest change = 1.0"""
+        authors = self._paths(repo_full_name).get(path)
+        weights: Dict[str, float] = defaultdict(float)
+        weight = 1.0
+        for author in reversed(authors or ()):
+            weights[author] += weight
+            weight *= AUTHOR_DECAY
+        return weights
+
+
+author_history = AuthorHistory(
+    settings.REVIEWER_HISTORY_PATH, settings.REVIEWER_HISTORY_FILES, settings.REVIEWER_HISTORY_PER_FILE
+)
+
+_codeowners_by_commit: "OrderedDict[Tuple[str, str, str], Optional[CodeOwners]]" = OrderedDict()
+
+
+async def load_codeowners(owner: str, repo: str, ref: Optional[str], token: str) -> Optional[CodeOwners]:
+    """CODEOWNERS at `ref`, fetched and compiled once per commit"""
+    if not ref:
+        return None
+    key = (owner, repo, ref)
+    if key in _codeowners_by_commit:
+        _codeowners_by_commit.move_to_end(key)
+        return _codeowners_by_commit[key]
+
+    text = await fetch_codeowners(owner, repo, ref, token)
+    codeowners = CodeOwners(text) if text else None
+    _codeowners_by_commit[key] = codeowners
+    while len(_codeowners_by_commit) > _CODEOWNERS_CACHE_ENTRIES:
+        _codeowners_by_commit.popitem(last=False)
+    return codeowners
+
+
+def recommend_reviewers(repo_full_name: str, paths: List[str], codeowners: Optional[CodeOwners],
+                        exclude: Iterable[str] = (), fallback: Iterable[str] = ()) -> List[str]:
+    """Reviewers ranked by how much of the change they own or recently worked on.
+
+    Every file adds OWNER_WEIGHT for each of its code owners and the recency
+    weight of its recent authors. `fallback` (e.g. teams from the path rules)
+    fills the remaining places when there aren't enough candidates.
+    """
+    excluded = {name.lower() for name in exclude if name}
+    scores: Dict[str, float] = defaultdict(float)
+    for path in paths:
+        for name in (codeowners.owners_of(path) if codeowners else []):
+            scores[name] += OWNER_WEIGHT
+        for name, weight in author_history.recent_authors(repo_full_name, path).items():
+            scores[name] += weight
+
+    ranked = sorted((name for name in scores if name.lower() not in excluded), key=lambda n: (-scores[n], n))
+    for name in fallback:
+        if name not in ranked and name.lower() not in excluded:
+            ranked.append(name)
+    return ranked[:settings.MAX_RECOMMENDED_REVIEWERS]
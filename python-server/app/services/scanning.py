@@ -4,68 +4,76 @@ from app.schemas.fullrepo_analyze import StaticAnalysisResponse, Halstead, Cyclo
 from radon.complexity import cc_visit, cc_rank
 from radon.metrics import mi_visit, h_visit
 from radon.raw import analyze
+from app.services.analysis_guards import analyze_guarded
+from app.services.tracing import traced
 
-class analysisClass:
+def analyze_py_source(path: str, content: str) -> StaticAnalysisResponse:
+    """Radon metrics for one Python file; synchronous so it can run in a worker process"""
+    raw = analyze(content)
 
-    async def analyze_py_code(path: str, content: str) -> StaticAnalysisResponse:
-        raw = analyze(content)
+    # --- Cyclomatic complexity
+    cc_results = cc_visit(content)
+    cyclo = [
+        Cyclomatic(
+            name=block.name,
+            complexity=block.complexity,
+            rank=cc_rank(block.complexity)
+        )
+        for block in cc_results
+    ]
+
+    # --- Halstead metrics
+    hal = h_visit(content)
+    
+    # Check if hal is not empty and has the total attribute
+    if hal and hasattr(hal, 'total'):
+        hal_metrics = hal.total
+        halstead = Halstead(
+            h1=hal_metrics.h1,
+            h2=hal_metrics.h2,
+            N1=hal_metrics.N1,
+            N2=hal_metrics.N2,
+            vocabulary=hal_metrics.vocabulary,
+            length=hal_metrics.length,
+            volume=hal_metrics.volume,
+            difficulty=hal_metrics.difficulty,
+            effort=hal_metrics.effort,
+            time=hal_metrics.time,
+            bugs=hal_metrics.bugs
+        )
+    else:
+        # Provide default values if Halstead analysis fails
+        halstead = Halstead(
+            h1=0, h2=0, N1=0, N2=0,
+            vocabulary=0, length=0, volume=0,
+            difficulty=0, effort=0, time=0, bugs=0
+        )
 
-        # --- Cyclomatic complexity
-        cc_results = cc_visit(content)
-        cyclo = [
-            Cyclomatic(
-                name=block.name,
-                complexity=block.complexity,
-                rank=cc_rank(block.complexity)
-            )
-            for block in cc_results
-        ]
+    # --- Maintainability index
+    mi_score = mi_visit(content, True)  # returns numeric score
+    mi_rank = "A" if mi_score >= 20 else "B" if mi_score >= 10 else "C"
 
-        # --- Halstead metrics
-        hal = h_visit(content)
-        
-        # Check if hal is not empty and has the total attribute
-        if hal and hasattr(hal, 'total'):
-            hal_metrics = hal.total
-            halstead = Halstead(
-                h1=hal_metrics.h1,
-                h2=hal_metrics.h2,
-                N1=hal_metrics.N1,
-                N2=hal_metrics.N2,
-                vocabulary=hal_metrics.vocabulary,
-                length=hal_metrics.length,
-                volume=hal_metrics.volume,
-                difficulty=hal_metrics.difficulty,
-                effort=hal_metrics.effort,
-                time=hal_metrics.time,
-                bugs=hal_metrics.bugs
-            )
-        else:
-            # Provide default values if Halstead analysis fails
-            halstead = Halstead(
-                h1=0, h2=0, N1=0, N2=0,
-                vocabulary=0, length=0, volume=0,
-                difficulty=0, effort=0, time=0, bugs=0
-            )
+    maintainability = Maintainability(mi=mi_score, rank=mi_rank)
 
-        # --- Maintainability index
-        mi_score = mi_visit(content, True)  # returns numeric score
-        mi_rank = "A" if mi_score >= 20 else "B" if mi_score >= 10 else "C"
+    return StaticAnalysisResponse(
+        path=path,
+        loc=raw.loc,
+        lloc=raw.lloc,
+        sloc=raw.sloc,
+        comments=raw.comments,
+        multi=raw.multi,
+        blank=raw.blank,
+        cyclomatic=cyclo,
+        halstead=halstead,
+        maintainability=maintainability,
+    )
 
-        maintainability = Maintainability(mi=mi_score, rank=mi_rank)
 
-        return StaticAnalysisResponse(
-            path=path,
-            loc=raw.loc,
-            lloc=raw.lloc,
-            sloc=raw.sloc,
-            comments=raw.comments,
-            multi=raw.multi,
-            blank=raw.blank,
-            cyclomatic=cyclo,
-            halstead=halstead,
-            maintainability=maintainability,
-        )
+class analysisClass:
+
+    @traced("analyze_py_code")
+    async def analyze_py_code(path: str, content: str) -> StaticAnalysisResponse:
+        return analyze_guarded(path, content, analyze_py_source)
 
 
     async def analyze_commits(commits: list):
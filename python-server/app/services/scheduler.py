@@ -0,0 +1,162 @@
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, Deque, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Lower value runs first"""
+    PR = 0
+    PUSH = 1
+    FULL_REPO = 2
+
+
+class _Job:
+    """A job inside `Scheduler.slot`; `held` is False while it is re-queued by checkpoint()"""
+
+    __slots__ = ("priority", "installation", "held")
+
+    def __init__(self, priority: Priority, installation: str):
+        self.priority = priority
+        self.installation = installation
+        self.held = True
+
+
+# The job running in the current task, if any
+current_job: ContextVar[Optional[_Job]] = ContextVar("current_job", default=None)
+
+
+def current_priority() -> Priority:
+    job = current_job.get()
+    return job.priority if job else Priority.PUSH
+
+
+class Scheduler:
+    """Admission control shared by PR analysis, push scans and full-repo scans.
+
+    At most `max_concurrency` jobs run at once and at most `background_limit` of
+    them may be full-repo scans. Waiting jobs are served by priority class, and
+    round-robin across installations within a class so one busy org can't starve
+    the others. Full-repo scans call `checkpoint()` between batches and give up
+    their slot whenever more urgent work is queued.
+    """
+
+    def __init__(self, max_concurrency: int, background_limit: int):
+        self.max_concurrency = max(1, max_concurrency)
+        self.background_limit = max(1, min(background_limit, self.max_concurrency))
+        self._running: Dict[Priority, int] = {p: 0 for p in Priority}
+        self._waiting: Dict[Priority, "OrderedDict[str, Deque[asyncio.Future]]"] = {
+            p: OrderedDict() for p in Priority
+        }
+
+    def _total_running(self) -> int:
+        return sum(self._running.values())
+
+    def _has_capacity(self, priority: Priority) -> bool:
+        if self._total_running() >= self.max_concurrency:
+            return False
+        if priority == Priority.FULL_REPO and self._running[priority] >= self.background_limit:
+            return False
+        return True
+
+    def _pop_waiter(self, priority: Priority) -> Optional[asyncio.Future]:
+        queues = self._waiting[priority]
+        while queues:
+            installation, queue = next(iter(queues.items()))
+            fut = queue.popleft()
+            if queue:
+                # Round-robin: this installation goes to the back of the line
+                queues.move_to_end(installation)
+            else:
+                del queues[installation]
+            if not fut.done():
+                return fut
+        return None
+
+    def _dispatch(self) -> None:
+        for priority in Priority:
+            while self._waiting[priority] and self._has_capacity(priority):
+                fut = self._pop_waiter(priority)
+                if fut is None:
+                    break
+                self._running[priority] += 1
+                fut.set_result(None)
+
+    def _queued(self, priority: Priority) -> int:
+        return sum(1 for q in self._waiting[priority].values() for f in q if not f.done())
+
+    def _waiting_ahead_of(self, priority: Priority, inclusive: bool = False) -> bool:
+        return any(
+            self._queued(p)
+            for p in Priority
+            if p < priority or (inclusive and p == priority)
+        )
+
+    async def _acquire(self, priority: Priority, installation: str) -> None:
+        if self._has_capacity(priority) and not self._waiting_ahead_of(priority, inclusive=True):
+            self._running[priority] += 1
+            return
+
+        fut = asyncio.get_running_loop().create_future()
+        self._waiting[priority].setdefault(installation, deque()).append(fut)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # Granted right as we were cancelled; hand the slot back
+                self._release(priority)
+            raise
+
+    def _release(self, priority: Priority) -> None:
+        self._running[priority] -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority, installation_id: Any):
+        installation = str(installation_id)
+        await self._acquire(priority, installation)
+        job = _Job(priority, installation)
+        token = current_job.set(job)
+        try:
+            yield
+        finally:
+            current_job.reset(token)
+            # Not held if cancelled while checkpoint() was waiting to get it back
+            if job.held:
+                self._release(priority)
+
+    async def checkpoint(self) -> None:
+        """Yield the current slot if more urgent work is waiting, then re-queue for it."""
+        job = current_job.get()
+        if job is None:
+            await asyncio.sleep(0)
+            return
+
+        if not self._waiting_ahead_of(job.priority):
+            await asyncio.sleep(0)
+            return
+
+        logger.info(f"Preempting {job.priority.name} job for installation {job.installation}")
+        job.held = False
+        self._release(job.priority)
+        await self._acquire(job.priority, job.installation)
+        job.held = True
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        return {
+            p.name: {
+                "running": self._running[p],
+                "queued": self._queued(p),
+            }
+            for p in Priority
+        }
+
+
+scheduler = Scheduler(settings.SCHEDULER_MAX_CONCURRENCY, settings.SCHEDULER_BACKGROUND_LIMIT)
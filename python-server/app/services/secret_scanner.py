@@ -0,0 +1,188 @@
+import math
+import re
+from bisect import bisect_right
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+# Names that make a quoted value on their right a likely credential
+_SECRET_NAMES = ["password", "passwd", "pwd", "secret", "token"] + [
+    f"{prefix}{sep}key" for prefix in ("api", "access", "private") for sep in ("_", "-", "")
+]
+
+# Known token formats; the high-entropy rule comes last so a recognised format wins
+_TOKEN_RULES = {
+    "private_key": r"-----BEGIN (?:RSA |EC |DSA |OPENSSH |PGP |ENCRYPTED )?PRIVATE KEY-----",
+    "aws_access_key": r"\b(?:AKIA|ASIA)[0-9A-Z]{16}\b",
+    "github_token": r"\b(?:gh[pousr]_[A-Za-z0-9]{36,}|github_pat_[A-Za-z0-9_]{22,})",
+    "slack_token": r"\bxox[abposr]-[A-Za-z0-9-]{10,}",
+    "google_api_key": r"\bAIza[0-9A-Za-z_\-]{35}",
+    "stripe_key": r"\b[rs]k_live_[0-9A-Za-z]{24,}",
+    "jwt": r"\beyJ[A-Za-z0-9_-]{10,}\.eyJ[A-Za-z0-9_-]{10,}\.[A-Za-z0-9_-]{10,}",
+    "high_entropy_string": r"(?P<entropy_value>[A-Za-z0-9+/=_\-]{20,})(?=[\"'])",
+}
+_TOKEN_PATTERN = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in _TOKEN_RULES.items()))
+
+# `= "`, `: '`, `=> "` ... between a secret name and its quoted value
+_ASSIGNMENT = r"[\"']?\s*(?:=>|:=|=|:)\s*[\"']"
+_ASSIGNED_VALUE = re.compile(r"(?P<assigned_value>[^\"'\n]{4,})[\"']")
+
+# Single pass over the lowercased patch. Every alternative starts with a literal
+# character (the opening quote, for long token-like strings), which lets the regex
+# engine skip ahead to offsets that can start a match instead of trying each
+# alternative everywhere. The few hits are then confirmed with the exact rules above.
+_TRIGGER_SOURCE = "|".join(
+    [re.escape(name) + _ASSIGNMENT for name in sorted(_SECRET_NAMES, key=len, reverse=True)]
+    + [re.escape(prefix) for prefix in (
+        "-----begin", "akia", "asia", "ghp_", "gho_", "ghu_", "ghs_", "ghr_", "github_pat_",
+        "xox", "aiza", "sk_live_", "rk_live_", "eyj",
+    )]
+    + [r"\"[a-z0-9+/=_\-]{20}", r"'[a-z0-9+/=_\-]{20}"]
+)
+_TRIGGER = re.compile(_TRIGGER_SOURCE)
+# For the rare patch whose length changes when lowercased
+_TRIGGER_IGNORECASE = re.compile(_TRIGGER_SOURCE, re.IGNORECASE)
+
+_MESSAGES = {
+    "assigned_secret": "Hardcoded credential assigned to a secret-looking name",
+    "private_key": "Private key added",
+    "aws_access_key": "AWS access key ID added",
+    "github_token": "GitHub token added",
+    "slack_token": "Slack token added",
+    "google_api_key": "Google API key added",
+    "stripe_key": "Stripe live key added",
+    "jwt": "JSON Web Token added",
+    "high_entropy_string": "High-entropy string added (possible secret)",
+}
+
+_HUNK_HEADER = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,\d+)? @@", re.MULTILINE)
+
+# Entropy alone is a hint, not proof; every other rule matches a known format or a secret name
+_WARNING_RULES = {"high_entropy_string"}
+
+# Values that are clearly not real credentials
+_PLACEHOLDER = re.compile(r"^(?:\$|\{\{|<|%\(|process\.env|os\.environ)|^(?:x+|\*+|changeme|password|secret|test|dummy|example)$",
+                          re.IGNORECASE)
+
+ENTROPY_THRESHOLD = 4.0
+MAX_FINDINGS_PER_FILE = 20
+
+
+def shannon_entropy(value: str) -> float:
+    """Bits per character of `value`"""
+    if not value:
+        return 0.0
+    length = len(value)
+    return -sum(count / length * math.log2(count / length) for count in Counter(value).values())
+
+
+def _is_high_entropy(value: str) -> bool:
+    # Hex alone is far more often a digest, commit SHA or lockfile integrity hash
+    # than a secret; hex credentials are caught when assigned to a secret name
+    if all(c in "0123456789abcdefABCDEF" for c in value):
+        return False
+    # Identifiers and paths score high too; real tokens mix digits with letters
+    if not any(c.isdigit() for c in value) or not any(c.isalpha() for c in value):
+        return False
+    return shannon_entropy(value) >= ENTROPY_THRESHOLD
+
+
+class _LineMapper:
+    """Maps offsets on added lines of a unified diff to line numbers in the new file.
+
+    Lines are counted with str.count between hunk headers, so the cost stays
+    proportional to the patch size however many findings there are.
+    """
+
+    def __init__(self, patch: str):
+        self.patch = patch
+        self.hunks = [(self._next_line(m.end()), int(m.group(1))) for m in _HUNK_HEADER.finditer(patch)]
+        self.starts = [start for start, _ in self.hunks]
+
+    def _next_line(self, offset: int) -> int:
+        end = self.patch.find("\n", offset)
+        return len(self.patch) if end == -1 else end + 1
+
+    def line_of(self, line_start: int) -> Optional[int]:
+        i = bisect_right(self.starts, line_start) - 1
+        if i < 0:
+            return None
+        start, first_line = self.hunks[i]
+        patch = self.patch
+        # New-file lines before this one: every line in the hunk except removals and "\ No newline" markers
+        lines = patch.count("\n", start, line_start)
+        if lines:
+            skipped = (patch[start] in "-\\") + patch.count("\n-", start, line_start - 1) + patch.count("\n\\", start, line_start - 1)
+            lines -= skipped
+        return first_line + lines
+
+
+def _confirm(patch: str, trigger: str, start: int) -> Optional[Tuple[str, int]]:
+    """The rule a trigger hit really matches and where the match ends, if any"""
+    if trigger[0] in "\"'":
+        start += 1
+    elif trigger[-1] in "\"'":
+        # A secret name already followed by `= "`; check the value itself
+        match = _ASSIGNED_VALUE.match(patch, start + len(trigger))
+        if match is None or _PLACEHOLDER.match(match.group("assigned_value")):
+            return None
+        return "assigned_secret", match.end()
+
+    match = _TOKEN_PATTERN.match(patch, start)
+    if match is None:
+        return None
+    rule = match.lastgroup
+    if rule == "high_entropy_string" and not _is_high_entropy(match.group("entropy_value")):
+        return None
+    return rule, match.end()
+
+
+def scan_patch(patch: str) -> List[Dict[str, Any]]:
+    """Secrets on the added lines of a unified diff, with their line numbers in the new file"""
+    if not patch:
+        return []
+
+    lowered = patch.lower()
+    if len(lowered) == len(patch):
+        hits = _TRIGGER.finditer(lowered)
+    else:
+        hits = _TRIGGER_IGNORECASE.finditer(patch)
+
+    mapper = None
+    findings = []
+    seen = set()
+    line_start = line_end = -1
+    added = False
+    consumed = 0
+    for hit in hits:
+        pos = hit.start()
+        if pos < consumed:
+            continue
+        if pos >= line_end:
+            line_start = patch.rfind("\n", 0, pos) + 1
+            line_end = patch.find("\n", pos)
+            if line_end == -1:
+                line_end = len(patch)
+            added = patch[line_start] == "+"
+        if not added:
+            continue
+
+        confirmed = _confirm(patch, hit.group(), pos)
+        if confirmed is None:
+            continue
+        rule, consumed = confirmed
+
+        if mapper is None:
+            mapper = _LineMapper(patch)
+        line = mapper.line_of(line_start)
+        if (rule, line) in seen:
+            continue
+        seen.add((rule, line))
+        findings.append({
+            "rule": rule,
+            "line": line,
+            "message": _MESSAGES[rule],
+            "severity": "warning" if rule in _WARNING_RULES else "error",
+        })
+        if len(findings) >= MAX_FINDINGS_PER_FILE:
+            break
+    return findings
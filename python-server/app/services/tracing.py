@@ -0,0 +1,156 @@
+import contextvars
+import functools
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional, Sequence
+
+from opentelemetry import propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SpanExporter, SpanExportResult
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Until setup_tracing installs a provider this is a no-op tracer
+tracer = trace.get_tracer("codehealth")
+
+# repoId / installation / run ID of the pipeline run in progress, copied onto every span it starts
+_run_attributes: contextvars.ContextVar[Optional[Dict[str, str]]] = contextvars.ContextVar("run_attributes", default=None)
+
+_provider: Optional[TracerProvider] = None
+
+
+class _RunAttributes(SpanProcessor):
+    def on_start(self, span, parent_context=None) -> None:
+        attributes = _run_attributes.get()
+        if attributes:
+            span.set_attributes(attributes)
+
+
+class JsonLinesSpanExporter(SpanExporter):
+    """Appends finished spans to a file, one JSON object per line, for offline analysis"""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = "".join(span.to_json(indent=None) + "\n" for span in spans)
+        with self._lock:
+            self._file.write(lines)
+            self._file.flush()
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def _exporter() -> Optional[SpanExporter]:
+    kind = settings.TRACING_EXPORTER
+    if kind == "otlp":
+        # Endpoint, headers and TLS come from the standard OTEL_EXPORTER_OTLP_* variables
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+    if kind == "file":
+        return JsonLinesSpanExporter(settings.TRACING_FILE)
+    if kind == "console":
+        return ConsoleSpanExporter()
+    if kind != "none":
+        logger.warning(f"Unknown TRACING_EXPORTER {kind!r}, tracing stays off")
+    return None
+
+
+def setup_tracing() -> None:
+    """Install the tracer provider chosen by TRACING_EXPORTER (none | otlp | file | console)"""
+    global _provider
+    if _provider is not None:
+        return
+    exporter = _exporter()
+    if exporter is None:
+        return
+
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": os.environ.get("OTEL_SERVICE_NAME", "codehealth-python")}),
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATIO)),
+    )
+    _provider.add_span_processor(_RunAttributes())
+    # A full-repo run starts a few spans per file; keep them all until the next export
+    _provider.add_span_processor(BatchSpanProcessor(exporter, max_queue_size=settings.TRACING_QUEUE_SIZE))
+    trace.set_tracer_provider(_provider)
+    logger.info(f"Tracing enabled, exporting to {settings.TRACING_EXPORTER}")
+
+
+def shutdown_tracing() -> None:
+    """Flush spans still queued for export"""
+    if _provider is not None:
+        _provider.shutdown()
+
+
+def traced(name: str):
+    """Run the decorated coroutine function inside a span called `name`"""
+    def decorate(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with tracer.start_as_current_span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def traced_run(name: str):
+    """Root span for one pipeline run.
+
+    The decorated coroutine function takes the request payload first; its
+    repoId and installationId are set on the root span and on every span
+    started while the run is in progress, including in tasks it spawns.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        async def wrapper(payload, *args, **kwargs):
+            attributes = {
+                "codehealth.repo_id": str(getattr(payload, "repoId", None) or ""),
+                "codehealth.installation_id": str(getattr(payload, "installationId", None) or ""),
+            }
+            reset = _run_attributes.set(attributes)
+            try:
+                with tracer.start_as_current_span(name):
+                    return await func(payload, *args, **kwargs)
+            finally:
+                _run_attributes.reset(reset)
+        return wrapper
+    return decorate
+
+
+def bind_run_id(run_id: str) -> None:
+    """Tag the current run's spans, and the Express requests it makes, with its run ID"""
+    attributes = _run_attributes.get()
+    if attributes is not None:
+        attributes["codehealth.run_id"] = run_id
+    trace.get_current_span().set_attribute("codehealth.run_id", run_id)
+
+
+def current_run_id() -> Optional[str]:
+    return (_run_attributes.get() or {}).get("codehealth.run_id")
+
+
+def propagation_headers() -> Dict[str, str]:
+    """W3C trace context and X-Run-Id for a request to Express"""
+    headers: Dict[str, str] = {}
+    propagate.inject(headers)
+    run_id = current_run_id()
+    if run_id:
+        headers["X-Run-Id"] = run_id
+    return headers
+
+
+def add_span_attributes(attributes: Dict[str, Any]) -> None:
+    """Set attributes on the current span; values that are None are skipped"""
+    span = trace.get_current_span()
+    if span.is_recording():
+        span.set_attributes({key: value for key, value in attributes.items() if value is not None})
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Dict, List, Set
+
+from app.core.config import settings
+from app.services.metrics import UPLOADS_IN_FLIGHT
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveBatcher:
+    """Sizes full-repo batches from what the last uploads looked like.
+
+    Keeps a moving average of bytes sent and upload seconds per file and picks
+    the file count that lands near BATCH_TARGET_BYTES and BATCH_TARGET_SECONDS,
+    whichever is hit first. Small uploads make for big batches, slow backends
+    for small ones. Bytes are what went to Express, not source sizes: a Python
+    file uploads as compact metrics, other files as their content.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int, target_bytes: int, target_seconds: float):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.target_bytes = target_bytes
+        self.target_seconds = target_seconds
+        self.batch_files = min(self.maximum, max(self.minimum, initial))
+        self._bytes_per_file = None
+        self._seconds_per_file = None
+        # Bytes sent per byte of source, to estimate a batch before it's uploaded
+        self._sent_per_source_byte = None
+
+    def next_batch(self, files: List[Dict[str, Any]], start: int) -> int:
+        """End index for the batch starting at `start`; stops early once the byte budget is spent"""
+        ratio = self._sent_per_source_byte or 1.0
+        end = start
+        total = 0
+        while end < len(files) and end - start < self.batch_files:
+            total += (files[end].get("size") or 0) * ratio
+            end += 1
+            if total >= self.target_bytes:
+                break
+        return end
+
+    @staticmethod
+    def _average(current, sample: float) -> float:
+        return sample if current is None else 0.5 * current + 0.5 * sample
+
+    def observe(self, files: int, payload_bytes: int, seconds: float, source_bytes: int = 0) -> None:
+        """Record an upload of `files` files: `payload_bytes` sent to Express, from `source_bytes` of source"""
+        if files <= 0:
+            return
+        self._bytes_per_file = self._average(self._bytes_per_file, payload_bytes / files)
+        self._seconds_per_file = self._average(self._seconds_per_file, seconds / files)
+        if source_bytes > 0:
+            self._sent_per_source_byte = self._average(self._sent_per_source_byte, payload_bytes / source_bytes)
+
+        limits = []
+        if self._bytes_per_file:
+            limits.append(self.target_bytes / self._bytes_per_file)
+        if self._seconds_per_file:
+            limits.append(self.target_seconds / self._seconds_per_file)
+        if not limits:
+            return
+
+        # Move halfway toward the target so one slow response doesn't collapse the batch size
+        desired = (self.batch_files + min(limits)) / 2
+        resized = int(min(self.maximum, max(self.minimum, desired)))
+        if resized != self.batch_files:
+            logger.debug(f"Batch size {self.batch_files} -> {resized}")
+        self.batch_files = resized
+
+
+def default_batcher() -> AdaptiveBatcher:
+    return AdaptiveBatcher(
+        initial=settings.BATCH_INITIAL_FILES,
+        minimum=settings.BATCH_MIN_FILES,
+        maximum=settings.BATCH_MAX_FILES,
+        target_bytes=settings.BATCH_TARGET_BYTES,
+        target_seconds=settings.BATCH_TARGET_SECONDS,
+    )
+
+
+class UploadWindow:
+    """Runs uploads in the background, at most `max_in_flight` at a time.
+
+    `submit` returns as soon as the upload is scheduled, so the caller can fetch
+    and analyze the next batch; it only waits when the window is full. An
+    upload that raises is logged and counted in `failed`.
+    """
+
+    def __init__(self, max_in_flight: int):
+        self.max_in_flight = max(1, max_in_flight)
+        self.failed = 0
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, upload: Awaitable[Any]) -> None:
+        while len(self._tasks) >= self.max_in_flight:
+            done, self._tasks = await asyncio.wait(self._tasks, return_when=asyncio.FIRST_COMPLETED)
+            self._collect(done)
+        UPLOADS_IN_FLIGHT.inc()
+        task = asyncio.ensure_future(upload)
+        task.add_done_callback(lambda _: UPLOADS_IN_FLIGHT.dec())
+        self._tasks.add(task)
+
+    def _collect(self, done: Set[asyncio.Task]) -> None:
+        for task in done:
+            if task.cancelled():
+                continue
+            error = task.exception()
+            if error is not None:
+                self.failed += 1
+                logger.error(f"Upload failed: {error!r}")
+
+    async def drain(self) -> None:
+        """Wait for every upload still in flight"""
+        if self._tasks:
+            done, _ = await asyncio.wait(self._tasks)
+            self._tasks.clear()
+            self._collect(done)
+
+    async def cancel(self) -> None:
+        """Stop the uploads still in flight and wait until they have; for callers bailing out"""
+        if not self._tasks:
+            return
+        for task in self._tasks:
+            task.cancel()
+        done, _ = await asyncio.wait(self._tasks)
+        self._tasks.clear()
+        self._collect(done)
@@ -0,0 +1,240 @@
+"""Speed, memory and correctness of the Python analysis engine on a pinned corpus.
+
+    python -m benchmarks.analysis_engine [--repeat 5] [--workers 1 2 4] [--copies 10]
+        [--json results.json] [--update-golden]
+
+Run from python-server/. The corpus in benchmarks/corpus/python (listed, with
+provenance and SHA-256, in benchmarks/corpus/manifest.json) covers tiny,
+typical, huge, generated and deeply nested real-world files.
+
+Everything goes through analysis_pool._analyze_many, the function the pool's
+workers run: analyze_guarded around analyze_py_incremental, as in production.
+The block metrics cache is kept in memory only (BLOCK_METRICS_PATH is unset
+here), so no run reads results left on disk by the service.
+
+Every file is first checked against benchmarks/corpus/golden.json: metrics
+must match exactly, floats included, so a faster engine is only a win if this
+passes (the script exits non-zero otherwise). Then, per file: best and median
+time over --repeat runs with an empty block cache (a first scan), best time
+with every chunk cached (a rescan of an unchanged file), MiB/s cold, and peak
+allocation under tracemalloc. Finally, cold throughput in files/s and MiB/s
+for the corpus repeated --copies times, split across 1..N spawned worker
+processes one batch per worker, the way analysis_pool does it.
+
+--update-golden rewrites golden.json from the current engine; do that only
+for an intended change in results, and say why in the commit.
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import radon
+
+# Before the app is imported: workers inherit it, and nothing touches the service's on-disk cache
+os.environ["BLOCK_METRICS_PATH"] = ""
+
+from app.services.analysis_pool import _analyze_many
+from app.services.block_metrics import block_store
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "corpus")
+SOURCES_DIR = os.path.join(CORPUS_DIR, "python")
+MANIFEST = os.path.join(CORPUS_DIR, "manifest.json")
+GOLDEN = os.path.join(CORPUS_DIR, "golden.json")
+
+
+def load_corpus() -> List[Dict[str, Any]]:
+    """Manifest entries with their content; refuses files that drifted from their pin"""
+    with open(MANIFEST) as f:
+        entries = json.load(f)
+    for entry in entries:
+        with open(os.path.join(SOURCES_DIR, entry["file"]), "rb") as f:
+            data = f.read()
+        if hashlib.sha256(data).hexdigest() != entry["sha256"]:
+            raise SystemExit(f"{entry['file']} does not match its SHA-256 in {MANIFEST}")
+        entry["content"] = data.decode("utf-8")
+        entry["bytes"] = len(data)
+    return entries
+
+
+def _analyze(path: str, content: str):
+    (_, result, error, _, _), = _analyze_many([(path, content)])[0]
+    if error is not None:
+        raise RuntimeError(f"{path}: {error}")
+    return result
+
+
+def _analyze_cold(path: str, content: str):
+    block_store._memory.clear()
+    return _analyze(path, content)
+
+
+def _metrics(entry: Dict[str, Any]) -> Dict[str, Any]:
+    return _analyze_cold(entry["file"], entry["content"]).model_dump()
+
+
+def _first_difference(expected: Any, actual: Any, where: str = "") -> Optional[str]:
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        for key in sorted(set(expected) | set(actual)):
+            diff = _first_difference(expected.get(key), actual.get(key), f"{where}.{key}")
+            if diff:
+                return diff
+        return None
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return f"{where}: {len(expected)} entries expected, got {len(actual)}"
+        for i, (e, a) in enumerate(zip(expected, actual)):
+            diff = _first_difference(e, a, f"{where}[{i}]")
+            if diff:
+                return diff
+        return None
+    if expected != actual or type(expected) is not type(actual):
+        return f"{where}: expected {expected!r}, got {actual!r}"
+    return None
+
+
+def _environment() -> Dict[str, str]:
+    return {"python": platform.python_version(), "radon": radon.__version__}
+
+
+def update_golden(corpus: List[Dict[str, Any]]) -> None:
+    golden = {"environment": _environment(), "files": {e["file"]: _metrics(e) for e in corpus}}
+    with open(GOLDEN, "w") as f:
+        json.dump(golden, f, indent=1, sort_keys=True)
+        f.write("\n")
+    print(f"Wrote {len(corpus)} golden results to {GOLDEN}")
+
+
+def check_golden(corpus: List[Dict[str, Any]]) -> List[str]:
+    with open(GOLDEN) as f:
+        golden = json.load(f)
+    if golden["environment"] != _environment():
+        # ast and radon output can shift between versions; a mismatch below may be that, not the engine
+        print(f"Note: golden results were recorded with {golden['environment']}, running {_environment()}")
+    failures = []
+    for entry in corpus:
+        expected = golden["files"].get(entry["file"])
+        if expected is None:
+            failures.append(f"{entry['file']}: no golden result")
+            continue
+        # Round-trip through JSON so the comparison sees what golden.json can represent
+        diff = _first_difference(expected, json.loads(json.dumps(_metrics(entry))))
+        if diff:
+            failures.append(f"{entry['file']}{diff}")
+    return failures
+
+
+def per_file(corpus: List[Dict[str, Any]], repeat: int) -> List[Dict[str, Any]]:
+    rows = []
+    for entry in corpus:
+        times, warm = [], []
+        for _ in range(repeat):
+            block_store._memory.clear()
+            start = time.perf_counter()
+            _analyze(entry["file"], entry["content"])
+            times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            _analyze(entry["file"], entry["content"])
+            warm.append(time.perf_counter() - start)
+        # A separate run: tracemalloc slows allocation-heavy code down several times
+        block_store._memory.clear()
+        tracemalloc.start()
+        _analyze(entry["file"], entry["content"])
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        best = min(times)
+        rows.append({
+            "file": entry["file"],
+            "category": entry["category"],
+            "bytes": entry["bytes"],
+            "lines": entry["content"].count("\n"),
+            "bestSeconds": best,
+            "medianSeconds": statistics.median(times),
+            "warmBestSeconds": min(warm),
+            "mibPerSecond": entry["bytes"] / 1024 ** 2 / best if best else None,
+            "peakAllocBytes": peak,
+        })
+    return rows
+
+
+def _analyze_batch(files: List[Tuple[str, str]]) -> int:
+    """Runs in a worker process"""
+    return len(_analyze_many(files)[0])
+
+
+def throughput(corpus: List[Dict[str, Any]], workers: int, copies: int) -> Dict[str, Any]:
+    files = [(e["file"], e["content"]) for e in corpus] * copies
+    total_bytes = sum(e["bytes"] for e in corpus) * copies
+    # Interleave so each batch gets a similar mix of huge and tiny files
+    batches = [files[i::workers] for i in range(workers)]
+    # Workers keep no block cache, or every copy after the first would be a cache hit
+    os.environ["BLOCK_METRICS_MEMORY_ENTRIES"] = "0"
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        # Start every worker and import the engine before the clock starts
+        list(executor.map(_analyze_batch, [[("warmup.py", "x = 1\n")]] * workers))
+        start = time.perf_counter()
+        analyzed = sum(executor.map(_analyze_batch, batches))
+        elapsed = time.perf_counter() - start
+    return {
+        "workers": workers,
+        "files": analyzed,
+        "seconds": elapsed,
+        "filesPerSecond": analyzed / elapsed,
+        "mibPerSecond": total_bytes / 1024 ** 2 / elapsed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, os.cpu_count() or 1}))
+    parser.add_argument("--copies", type=int, default=10, help="times the corpus is repeated for throughput")
+    parser.add_argument("--json", help="write the results here as well")
+    parser.add_argument("--update-golden", action="store_true")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    if args.update_golden:
+        update_golden(corpus)
+        return
+
+    failures = check_golden(corpus)
+    for failure in failures:
+        print(f"MISMATCH {failure}")
+    print(f"Golden check: {len(corpus) - len(failures)}/{len(corpus)} files identical\n")
+
+    rows = per_file(corpus, args.repeat)
+    print(f"{'file':<20} {'category':<10} {'KiB':>7} {'lines':>6} {'best ms':>9} {'median ms':>10} "
+          f"{'warm ms':>8} {'MiB/s':>7} {'peak KiB':>9}")
+    for row in rows:
+        print(f"{row['file']:<20} {row['category']:<10} {row['bytes'] / 1024:>7.1f} {row['lines']:>6} "
+              f"{row['bestSeconds'] * 1000:>9.2f} {row['medianSeconds'] * 1000:>10.2f} "
+              f"{row['warmBestSeconds'] * 1000:>8.2f} {row['mibPerSecond'] or 0:>7.2f} "
+              f"{row['peakAllocBytes'] / 1024:>9.0f}")
+
+    print(f"\n{'workers':>7} {'files':>7} {'seconds':>8} {'files/s':>9} {'MiB/s':>7}")
+    scaling = []
+    for workers in args.workers:
+        result = throughput(corpus, workers, args.copies)
+        scaling.append(result)
+        print(f"{workers:>7} {result['files']:>7} {result['seconds']:>8.2f} "
+              f"{result['filesPerSecond']:>9.1f} {result['mibPerSecond']:>7.2f}", flush=True)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"environment": _environment(), "golden": failures, "files": rows, "throughput": scaling},
+                      f, indent=2)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Deeply nested control flow and literals (generated once, then pinned)."""
+
+
+def validate(config, rules, strict=False):
+    if config.get('k0') is not None and rules.get('r0', 0) > 0:
+        for item1 in config.get('items1', ()):
+            if item1 and (strict or item1 != 2):
+                while rules.get('loop3', 0) > 3:
+                    rules['loop3'] -= 1
+                    if rules['loop3'] % 3 == 0:
+                        continue
+                    elif rules['loop3'] % 5 == 0:
+                        break
+                    if config.get('k4') is not None and rules.get('r4', 4) > 4:
+                        for item5 in config.get('items5', ()):
+                            if item5 and (strict or item5 != 6):
+                                while rules.get('loop7', 0) > 7:
+                                    rules['loop7'] -= 1
+                                    if rules['loop7'] % 3 == 0:
+                                        continue
+                                    elif rules['loop7'] % 5 == 0:
+                                        break
+                                    if config.get('k8') is not None and rules.get('r8', 8) > 8:
+                                        for item9 in config.get('items9', ()):
+                                            if item9 and (strict or item9 != 10):
+                                                while rules.get('loop11', 0) > 11:
+                                                    rules['loop11'] -= 1
+                                                    if rules['loop11'] % 3 == 0:
+                                                        continue
+                                                    elif rules['loop11'] % 5 == 0:
+                                                        break
+                                                    if config.get('k12') is not None and rules.get('r12', 12) > 12:
+                                                        for item13 in config.get('items13', ()):
+                                                            if item13 and (strict or item13 != 14):
+                                                                while rules.get('loop15', 0) > 15:
+                                                                    rules['loop15'] -= 1
+                                                                    if rules['loop15'] % 3 == 0:
+                                                                        continue
+                                                                    elif rules['loop15'] % 5 == 0:
+                                                                        break
+                                                                    if config.get('k16') is not None and rules.get('r16', 16) > 16:
+                                                                        for item17 in config.get('items17', ()):
+                                                                            if item17 and (strict or item17 != 18):
+                                                                                while rules.get('loop19', 0) > 19:
+                                                                                    rules['loop19'] -= 1
+                                                                                    if rules['loop19'] % 3 == 0:
+                                                                                        continue
+                                                                                    elif rules['loop19'] % 5 == 0:
+                                                                                        break
+                                                                                    if config.get('k20') is not None and rules.get('r20', 20) > 20:
+                                                                                        for item21 in config.get('items21', ()):
+                                                                                            if item21 and (strict or item21 != 22):
+                                                                                                while rules.get('loop23', 0) > 23:
+                                                                                                    rules['loop23'] -= 1
+                                                                                                    if rules['loop23'] % 3 == 0:
+                                                                                                        continue
+                                                                                                    elif rules['loop23'] % 5 == 0:
+                                                                                                        break
+                                                                                                    if config.get('k24') is not None and rules.get('r24', 24) > 24:
+                                                                                                        for item25 in config.get('items25', ()):
+                                                                                                            if item25 and (strict or item25 != 26):
+                                                                                                                while rules.get('loop27', 0) > 27:
+                                                                                                                    rules['loop27'] -= 1
+                                                                                                                    if rules['loop27'] % 3 == 0:
+                                                                                                                        continue
+                                                                                                                    elif rules['loop27'] % 5 == 0:
+                                                                                                                        break
+                                                                                                                    if config.get('k28') is not None and rules.get('r28', 28) > 28:
+                                                                                                                        for item29 in config.get('items29', ()):
+                                                                                                                            if item29 and (strict or item29 != 30):
+                                                                                                                                while rules.get('loop31', 0) > 31:
+                                                                                                                                    rules['loop31'] -= 1
+                                                                                                                                    if rules['loop31'] % 3 == 0:
+                                                                                                                                        continue
+                                                                                                                                    elif rules['loop31'] % 5 == 0:
+                                                                                                                                        break
+                                                                                                                                    if config.get('k32') is not None and rules.get('r32', 32) > 32:
+                                                                                                                                        for item33 in config.get('items33', ()):
+                                                                                                                                            if item33 and (strict or item33 != 34):
+                                                                                                                                                while rules.get('loop35', 0) > 35:
+                                                                                                                                                    rules['loop35'] -= 1
+                                                                                                                                                    if rules['loop35'] % 3 == 0:
+                                                                                                                                                        continue
+                                                                                                                                                    elif rules['loop35'] % 5 == 0:
+                                                                                                                                                        break
+                                                                                                                                                    return {'ok': True, 'depth': 37}
+                                                                                                                                                strict = not strict
+                                                                                                                                    strict = not strict
+                                                                                                                        strict = not strict
+                                                                                                            strict = not strict
+                                                                                                strict = not strict
+                                                                                    strict = not strict
+                                                                        strict = not strict
+                                                            strict = not strict
+                                                strict = not strict
+                                    strict = not strict
+                        strict = not strict
+            strict = not strict
+    return {'ok': False}
+
+
+SCHEMA = {'level': 60, 'child': {'level': 59, 'child': {'level': 58, 'child': {'level': 57, 'child': {'level': 56, 'child': {'level': 55, 'child': {'level': 54, 'child': {'level': 53, 'child': {'level': 52, 'child': {'level': 51, 'child': {'level': 50, 'child': {'level': 49, 'child': {'level': 48, 'child': {'level': 47, 'child': {'level': 46, 'child': {'level': 45, 'child': {'level': 44, 'child': {'level': 43, 'child': {'level': 42, 'child': {'level': 41, 'child': {'level': 40, 'child': {'level': 39, 'child': {'level': 38, 'child': {'level': 37, 'child': {'level': 36, 'child': {'level': 35, 'child': {'level': 34, 'child': {'level': 33, 'child': {'level': 32, 'child': {'level': 31, 'child': {'level': 30, 'child': {'level': 29, 'child': {'level': 28, 'child': {'level': 27, 'child': {'level': 26, 'child': {'level': 25, 'child': {'level': 24, 'child': {'level': 23, 'child': {'level': 22, 'child': {'level': 21, 'child': {'level': 20, 'child': {'level': 19, 'child': {'level': 18, 'child': {'level': 17, 'child': {'level': 16, 'child': {'level': 15, 'child': {'level': 14, 'child': {'level': 13, 'child': {'level': 12, 'child': {'level': 11, 'child': {'level': 10, 'child': {'level': 9, 'child': {'level': 8, 'child': {'level': 7, 'child': {'level': 6, 'child': {'level': 5, 'child': {'level': 4, 'child': {'level': 3, 'child': {'level': 2, 'child': {'level': 1, 'child': {'v': 0}, 'alt': [1, (1, {1})]}, 'alt': [2, (2, {2})]}, 'alt': [3, (3, {3})]}, 'alt': [4, (4, {4})]}, 'alt': [5, (5, {5})]}, 'alt': [6, (6, {6})]}, 'alt': [7, (7, {7})]}, 'alt': [8, (8, {8})]}, 'alt': [9, (9, {9})]}, 'alt': [10, (10, {10})]}, 'alt': [11, (11, {11})]}, 'alt': [12, (12, {12})]}, 'alt': [13, (13, {13})]}, 'alt': [14, (14, {14})]}, 'alt': [15, (15, {15})]}, 'alt': [16, (16, {16})]}, 'alt': [17, (17, {17})]}, 'alt': [18, (18, {18})]}, 'alt': [19, (19, {19})]}, 'alt': [20, (20, {20})]}, 'alt': [21, (21, {21})]}, 'alt': [22, (22, {22})]}, 'alt': [23, (23, {23})]}, 'alt': [24, (24, {24})]}, 'alt': [25, (25, {25})]}, 'alt': [26, (26, {26})]}, 'alt': [27, (27, {27})]}, 'alt': [28, (28, {28})]}, 'alt': [29, (29, {29})]}, 'alt': [30, (30, {30})]}, 'alt': [31, (31, {31})]}, 'alt': [32, (32, {32})]}, 'alt': [33, (33, {33})]}, 'alt': [34, (34, {34})]}, 'alt': [35, (35, {35})]}, 'alt': [36, (36, {36})]}, 'alt': [37, (37, {37})]}, 'alt': [38, (38, {38})]}, 'alt': [39, (39, {39})]}, 'alt': [40, (40, {40})]}, 'alt': [41, (41, {41})]}, 'alt': [42, (42, {42})]}, 'alt': [43, (43, {43})]}, 'alt': [44, (44, {44})]}, 'alt': [45, (45, {45})]}, 'alt': [46, (46, {46})]}, 'alt': [47, (47, {47})]}, 'alt': [48, (48, {48})]}, 'alt': [49, (49, {49})]}, 'alt': [50, (50, {50})]}, 'alt': [51, (51, {51})]}, 'alt': [52, (52, {52})]}, 'alt': [53, (53, {53})]}, 'alt': [54, (54, {54})]}, 'alt': [55, (55, {55})]}, 'alt': [56, (56, {56})]}, 'alt': [57, (57, {57})]}, 'alt': [58, (58, {58})]}, 'alt': [59, (59, {59})]}, 'alt': [60, (60, {60})]}
+
+
+def compose(x):
+    return (lambda v39: v39 + 39 if v39 % 2 else (lambda v38: v38 + 38 if v38 % 2 else (lambda v37: v37 + 37 if v37 % 2 else (lambda v36: v36 + 36 if v36 % 2 else (lambda v35: v35 + 35 if v35 % 2 else (lambda v34: v34 + 34 if v34 % 2 else (lambda v33: v33 + 33 if v33 % 2 else (lambda v32: v32 + 32 if v32 % 2 else (lambda v31: v31 + 31 if v31 % 2 else (lambda v30: v30 + 30 if v30 % 2 else (lambda v29: v29 + 29 if v29 % 2 else (lambda v28: v28 + 28 if v28 % 2 else (lambda v27: v27 + 27 if v27 % 2 else (lambda v26: v26 + 26 if v26 % 2 else (lambda v25: v25 + 25 if v25 % 2 else (lambda v24: v24 + 24 if v24 % 2 else (lambda v23: v23 + 23 if v23 % 2 else (lambda v22: v22 + 22 if v22 % 2 else (lambda v21: v21 + 21 if v21 % 2 else (lambda v20: v20 + 20 if v20 % 2 else (lambda v19: v19 + 19 if v19 % 2 else (lambda v18: v18 + 18 if v18 % 2 else (lambda v17: v17 + 17 if v17 % 2 else (lambda v16: v16 + 16 if v16 % 2 else (lambda v15: v15 + 15 if v15 % 2 else (lambda v14: v14 + 14 if v14 % 2 else (lambda v13: v13 + 13 if v13 % 2 else (lambda v12: v12 + 12 if v12 % 2 else (lambda v11: v11 + 11 if v11 % 2 else (lambda v10: v10 + 10 if v10 % 2 else (lambda v9: v9 + 9 if v9 % 2 else (lambda v8: v8 + 8 if v8 % 2 else (lambda v7: v7 + 7 if v7 % 2 else (lambda v6: v6 + 6 if v6 % 2 else (lambda v5: v5 + 5 if v5 % 2 else (lambda v4: v4 + 4 if v4 % 2 else (lambda v3: v3 + 3 if v3 % 2 else (lambda v2: v2 + 2 if v2 % 2 else (lambda v1: v1 + 1 if v1 % 2 else (lambda v0: v0 + 0 if v0 % 2 else x))))))))))))))))))))))))))))))))))))))))(x)
+
+
+def flatten(grid):
+    return [c for a in grid for b in a for c in b if c if c != 0 if c != 1 if c != 2 if c != 3 if c != 4 if c != 5 if c != 6 if c != 7 if c != 8 if c != 9 if c != 10 if c != 11 if c != 12 if c != 13 if c != 14 if c != 15 if c != 16 if c != 17 if c != 18 if c != 19 if c != 20 if c != 21 if c != 22 if c != 23 if c != 24 if c != 25 if c != 26 if c != 27 if c != 28 if c != 29]
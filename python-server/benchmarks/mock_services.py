@@ -0,0 +1,344 @@
+"""Local stand-ins for GitHub, Express and Gemini, for the pipeline benchmarks.
+
+    python -m benchmarks.mock_services [--port 8900] [--github-latency-ms 20]
+        [--rate-limit 5000 --rate-window 3600] [--express-latency-ms 5] [--gemini-latency-ms 300]
+
+One aiohttp server answers under three prefixes:
+
+    /github   the REST endpoints the pipelines call (installation tokens, trees,
+              blobs, commits, contributors, repository, pulls/N/files, compare,
+              contents) plus the GraphQL repository-context query
+    /express  every /scanning/* POST, acknowledged with {"ok": true}
+    /gemini   generateContent for any model
+
+Repositories come from benchmarks.synthetic: `files-1000` has 1000 files.
+Pull request N of a repository changes its first N files. The compare head
+`head-N` changes N files. Every installation token gets its own rate-limit
+budget of --rate-limit requests per --rate-window seconds, with GitHub's
+headers and 403 responses.
+
+GET /_stats returns request counts per endpoint and bytes received per Express
+path. POST /_reset clears them and the rate-limit budgets.
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+from aiohttp import web
+
+from benchmarks import synthetic
+
+PER_PAGE_MAX = 100
+
+
+class MockState:
+    def __init__(self, args):
+        self.args = args
+        self.github_calls: Counter = Counter()
+        self.express_calls: Counter = Counter()
+        self.express_bytes: Counter = Counter()
+        self.gemini_calls = 0
+        self.rate_limited = 0
+        # token -> (window start, requests used)
+        self.budgets: Dict[str, Tuple[float, int]] = {}
+        # (files, seed) -> {blob sha: path}
+        self._shas: Dict[Tuple[int, int], Dict[str, str]] = {}
+
+    def reset(self) -> None:
+        self.github_calls.clear()
+        self.express_calls.clear()
+        self.express_bytes.clear()
+        self.gemini_calls = 0
+        self.rate_limited = 0
+        self.budgets.clear()
+
+    def paths_by_sha(self, files: int, seed: int) -> Dict[str, str]:
+        key = (files, seed)
+        if key not in self._shas:
+            self._shas[key] = {synthetic.blob_sha(p, seed): p for p in synthetic.file_paths(files, seed)}
+        return self._shas[key]
+
+    async def latency(self, ms: float) -> None:
+        if ms > 0:
+            # +/- 25% jitter so concurrent requests don't complete in lockstep
+            await asyncio.sleep(ms * random.uniform(0.75, 1.25) / 1000)
+
+    def take_budget(self, token: str) -> Tuple[bool, Dict[str, str]]:
+        limit, window = self.args.rate_limit, self.args.rate_window
+        now = time.time()
+        start, used = self.budgets.get(token, (now, 0))
+        if now - start >= window:
+            start, used = now, 0
+        allowed = used < limit
+        if allowed:
+            used += 1
+        self.budgets[token] = (start, used)
+        headers = {
+            "X-RateLimit-Limit": str(limit),
+            "X-RateLimit-Remaining": str(limit - used),
+            "X-RateLimit-Used": str(used),
+            "X-RateLimit-Reset": f"{start + window:.3f}",
+            "X-RateLimit-Resource": "core",
+        }
+        return allowed, headers
+
+
+def _json(data, headers: Optional[Dict[str, str]] = None, status: int = 200) -> web.Response:
+    return web.Response(body=json.dumps(data).encode(), status=status, headers=headers,
+                        content_type="application/json")
+
+
+def _repo(request: web.Request):
+    parsed = synthetic.parse_repo_name(request.match_info["repo"])
+    if parsed is None:
+        raise web.HTTPNotFound(text=json.dumps({"message": "Not Found"}), content_type="application/json")
+    return parsed
+
+
+def _page(request: web.Request, items: list, base_headers: Dict[str, str]):
+    per_page = min(int(request.query.get("per_page", 30)), PER_PAGE_MAX)
+    page = int(request.query.get("page", 1))
+    last = max(1, -(-len(items) // per_page))
+    headers = dict(base_headers)
+    if last > 1:
+        url = request.url.with_query({**request.query, "page": str(last)})
+        headers["Link"] = f'<{url}>; rel="last"'
+    return items[(page - 1) * per_page:page * per_page], headers
+
+
+def _commit(repo: str, i: int) -> Dict:
+    author = f"dev{i % synthetic.CONTRIBUTORS_PER_REPO}"
+    date = (datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(hours=7 * i)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return {
+        "sha": hashlib.sha1(f"{repo}:{i}".encode()).hexdigest(),
+        "commit": {
+            "message": f"Change {i}",
+            "author": {"name": author, "email": f"{author}@example.com", "date": date},
+            "committer": {"name": author, "date": date},
+        },
+    }
+
+
+def _contents(path: str, content: str) -> Dict:
+    raw = content.encode()
+    return {
+        "type": "file",
+        "path": path,
+        "sha": hashlib.sha1(raw).hexdigest(),
+        "size": len(raw),
+        "encoding": "base64",
+        "content": base64.b64encode(raw).decode(),
+    }
+
+
+def build_app(args) -> web.Application:
+    state = MockState(args)
+    routes = web.RouteTableDef()
+
+    @web.middleware
+    async def github_gate(request: web.Request, handler):
+        """Latency, call counting, ETags and the per-token rate limit for /github"""
+        if not request.path.startswith("/github/"):
+            return await handler(request)
+        resource = request.match_info.route.resource
+        state.github_calls[resource.canonical[len("/github/"):] if resource else request.path] += 1
+        await state.latency(args.github_latency_ms)
+        if request.path.startswith("/github/app/"):
+            return await handler(request)
+
+        token = request.headers.get("Authorization", "").partition(" ")[2]
+        allowed, headers = state.take_budget(token)
+        if not allowed:
+            state.rate_limited += 1
+            return _json({"message": "API rate limit exceeded"}, headers, status=403)
+
+        response = await handler(request)
+        response.headers.update(headers)
+        if request.method == "GET" and response.status == 200 and response.body is not None:
+            etag = '"' + hashlib.sha1(response.body).hexdigest() + '"'
+            if request.headers.get("If-None-Match") == etag:
+                return web.Response(status=304, headers={**headers, "ETag": etag})
+            response.headers["ETag"] = etag
+        return response
+
+    @routes.post("/github/app/installations/{installation}/access_tokens")
+    async def access_token(request):
+        expires = datetime.now(timezone.utc) + timedelta(hours=1)
+        return _json({
+            "token": f"bench-{request.match_info['installation']}-{random.getrandbits(32):08x}",
+            "expires_at": expires.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }, status=201)
+
+    @routes.get("/github/repos/{owner}/{repo}")
+    async def repository(request):
+        _repo(request)
+        return _json({
+            "stargazers_count": 42, "forks_count": 7, "watchers_count": 42,
+            "license": {"name": "MIT License"}, "default_branch": "main", "private": False,
+        })
+
+    @routes.get("/github/repos/{owner}/{repo}/git/trees/{branch}")
+    async def tree(request):
+        files, seed = _repo(request)
+        entries = [
+            {"path": p, "mode": "100644", "type": "blob", "sha": synthetic.blob_sha(p, seed),
+             "size": synthetic.file_size(p, seed)}
+            for p in synthetic.file_paths(files, seed)
+        ]
+        return _json({"sha": hashlib.sha1(request.match_info["repo"].encode()).hexdigest(), "tree": entries,
+                      "truncated": False})
+
+    @routes.get("/github/repos/{owner}/{repo}/git/blobs/{sha}")
+    async def blob(request):
+        files, seed = _repo(request)
+        path = state.paths_by_sha(files, seed).get(request.match_info["sha"])
+        if path is None:
+            return _json({"message": "Not Found"}, status=404)
+        return _json(_contents(path, synthetic.file_content(path, seed)))
+
+    @routes.get("/github/repos/{owner}/{repo}/contents/{path:.+}")
+    async def contents(request):
+        files, seed = _repo(request)
+        path = request.match_info["path"]
+        if path not in state.paths_by_sha(files, seed).values():
+            return _json({"message": "Not Found"}, status=404)
+        content = synthetic.file_content(path, seed)
+        if request.query.get("ref", "").startswith("base"):
+            # The base revision lacks the last fifth of the file, so PR deltas aren't empty
+            content = content[:len(content) * 4 // 5]
+        return _json(_contents(path, content))
+
+    @routes.get("/github/repos/{owner}/{repo}/commits")
+    async def commits(request):
+        _repo(request)
+        repo = request.match_info["repo"]
+        if "path" in request.query:
+            # Recent commits touching one file
+            count = synthetic._rng("churn", repo, request.query["path"]).randint(0, 25)
+            items = [_commit(repo, i) for i in range(count)]
+        else:
+            items = [_commit(repo, i) for i in range(synthetic.COMMITS_PER_REPO)]
+        page, headers = _page(request, items, {})
+        return _json(page, headers)
+
+    @routes.get("/github/repos/{owner}/{repo}/contributors")
+    async def contributors(request):
+        _repo(request)
+        items = [
+            {"login": f"dev{i}", "id": 1000 + i, "type": "User", "avatar_url": None, "html_url": None,
+             "contributions": synthetic.COMMITS_PER_REPO // synthetic.CONTRIBUTORS_PER_REPO}
+            for i in range(synthetic.CONTRIBUTORS_PER_REPO)
+        ]
+        page, headers = _page(request, items, {})
+        return _json(page, headers)
+
+    @routes.get("/github/repos/{owner}/{repo}/pulls/{number}/files")
+    async def pull_files(request):
+        files, seed = _repo(request)
+        count = min(int(request.match_info["number"]), files, 3000)
+        items = [synthetic.pr_file(p, seed) for p in synthetic.file_paths(files, seed)[:count]]
+        page, headers = _page(request, items, {})
+        return _json(page, headers)
+
+    @routes.get("/github/repos/{owner}/{repo}/compare/{spec}")
+    async def compare(request):
+        files, seed = _repo(request)
+        base, head = request.match_info["spec"].split("...", 1)
+        count = int(head.rsplit("-", 1)[1]) if head.startswith("head-") else 10
+        return _json({
+            "merge_base_commit": {"sha": base},
+            "files": [synthetic.pr_file(p, seed) for p in synthetic.file_paths(files, seed)[:count]],
+        })
+
+    @routes.post("/github/graphql")
+    async def graphql(request):
+        body = await request.json()
+        variables = body.get("variables", {})
+        repo = variables.get("name", "")
+        start = int(variables["cursor"]) if variables.get("cursor") else 0
+        end = min(start + 100, synthetic.COMMITS_PER_REPO)
+        nodes = []
+        for i in range(start, end):
+            c = _commit(repo, i)
+            author = dict(c["commit"]["author"], user={"login": c["commit"]["author"]["name"], "databaseId": i,
+                                                       "avatarUrl": None, "url": None})
+            nodes.append({"oid": c["sha"], "message": c["commit"]["message"], "author": author,
+                          "committer": c["commit"]["committer"]})
+        history = {"pageInfo": {"hasNextPage": end < synthetic.COMMITS_PER_REPO, "endCursor": str(end)},
+                   "nodes": nodes}
+        target = {"history": history} if variables.get("withHistory", True) else {}
+        repository = {"defaultBranchRef": {"name": "main", "target": target}}
+        if "cursor" not in variables:
+            total = {"totalCount": 5}
+            repository.update({
+                "stargazerCount": 42, "forkCount": 7, "watchers": total, "licenseInfo": {"name": "MIT License"},
+                "isPrivate": False, "openIssues": total, "closedIssues": total, "openPRs": total,
+                "closedPRs": total, "mergedPRs": total, "releases": {"totalCount": 0, "nodes": []},
+            })
+        return _json({"data": {"repository": repository}})
+
+    @routes.post("/express/{path:.*}")
+    async def express(request):
+        path = "/" + request.match_info["path"]
+        state.express_calls[path] += 1
+        state.express_bytes[path] += len(await request.read())
+        await state.latency(args.express_latency_ms)
+        return _json({"ok": True})
+
+    @routes.post("/gemini/{version}/models/{model}")
+    async def gemini(request):
+        state.gemini_calls += 1
+        await request.read()
+        await state.latency(args.gemini_latency_ms)
+        text = json.dumps({"suggestions": [{"title": "Split long function", "priority": "medium"}]})
+        return _json({
+            "candidates": [{"content": {"parts": [{"text": text}]}}],
+            "usageMetadata": {"promptTokenCount": 1200, "candidatesTokenCount": 300},
+        })
+
+    @routes.get("/_stats")
+    async def stats(request):
+        return _json({
+            "github": dict(state.github_calls),
+            "githubTotal": sum(state.github_calls.values()),
+            "rateLimited": state.rate_limited,
+            "express": {p: {"requests": n, "bytes": state.express_bytes[p]} for p, n in state.express_calls.items()},
+            "gemini": state.gemini_calls,
+        })
+
+    @routes.post("/_reset")
+    async def reset(request):
+        state.reset()
+        return _json({"ok": True})
+
+    app = web.Application(middlewares=[github_gate], client_max_size=1024 ** 3)
+    app.add_routes(routes)
+    return app
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--github-latency-ms", type=float, default=20.0)
+    parser.add_argument("--rate-limit", type=int, default=5000, help="requests per token per window")
+    parser.add_argument("--rate-window", type=float, default=3600.0, help="seconds")
+    parser.add_argument("--express-latency-ms", type=float, default=5.0)
+    parser.add_argument("--gemini-latency-ms", type=float, default=300.0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    add_arguments(parser)
+    args = parser.parse_args()
+    web.run_app(build_app(args), host=args.host, port=args.port, access_log=None, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""End-to-end pipeline benchmarks against local GitHub, Express and Gemini stand-ins.
+
+    python -m benchmarks.pipelines [--scenarios full_repo pull push_scan push_many push_batch impact insights]
+        [--files 100 1000 10000] [--repeat 3] [--json results.json]
+        [--github-latency-ms 20] [--rate-limit 5000 --rate-window 3600]
+        [--express-latency-ms 5] [--gemini-latency-ms 300]
+
+Run from python-server/. benchmarks.mock_services is started on a free port
+and every scenario runs in a fresh interpreter pointed at it (GITHUB_API_URL,
+EXPRESS_URL, GEMINI_API_BASE), with its caches in a temporary directory, so
+runs don't share warm state and peak RSS belongs to one scenario.
+
+    full_repo   full_repo_analysis of a repository with N files
+    pull        pull_analyze_repo of a PR changing N files (GitHub caps PRs at 3000)
+    push_scan   ScanFiles on a push modifying N source files
+    push_many   N source files as N/5 pushes across 10 installations, one ScanFiles call each, concurrently
+    push_batch  the same pushes in one ScanFilesBatch call
+    impact      seed_impact of a push comparing N changed files
+    insights    POST /v2/api/analyze with N refactor-priority files (all insight types)
+
+Each scenario runs --repeat times. The first run is cold; later runs hit the
+ETag and block-metric caches. Reported per scenario: run latency (first, p50,
+p95), throughput in files/s at the median, GitHub calls and rate-limited
+responses per run, Express requests and bytes per run, Gemini calls per run,
+and the peak RSS of the API process and of its largest analysis worker.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import Any, Callable, Dict, List
+
+from benchmarks import mock_services, synthetic
+
+SCENARIOS = ["full_repo", "pull", "push_scan", "push_many", "push_batch", "impact", "insights"]
+PUSH_FILES = 5
+PUSH_INSTALLATIONS = 10
+OWNER = "bench"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _private_key_pem() -> str:
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+
+
+def _request(url: str, method: str = "GET") -> Dict[str, Any]:
+    with urllib.request.urlopen(urllib.request.Request(url, method=method), timeout=10) as resp:
+        return json.loads(resp.read())
+
+
+def _peak_rss_mib(pid: str = "self") -> float:
+    """High-water RSS from /proc; falls back to getrusage for this process"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if pid == "self":
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return 0.0
+
+
+def _source_paths(files: int) -> List[str]:
+    return [p for p in synthetic.file_paths(files) if p.endswith((".py", ".js", ".ts", ".tsx", ".jsx"))]
+
+
+# --- one scenario, in the child process -------------------------------------
+
+def _scenario(name: str, files: int) -> Callable[[], Any]:
+    """A coroutine function running one iteration of the scenario"""
+    repo = synthetic.repo_name(files)
+    full_name = f"{OWNER}/{repo}"
+
+    if name == "full_repo":
+        from app.schemas.fullrepo_analyze import FullRepoAnalysisRequest
+        from app.services.analyze_service import full_repo_analysis
+
+        payload = FullRepoAnalysisRequest(
+            repoId="1", owner=OWNER, repoName=repo, fullName=full_name, branch="main", installationId="1",
+            requestedBy="bench", requestedAt=time.strftime("%Y-%m-%dT%H:%M:%SZ"), resume=False,
+        )
+        return lambda: full_repo_analysis(payload)
+
+    if name == "pull":
+        from app.schemas.pull_analyze import PullAnalyzeRequest
+        from app.services.analyze_service import pull_analyze_repo
+
+        payload = PullAnalyzeRequest(
+            repoFullName=full_name, repoId=1, installationId=1, prNumber=min(files, 3000), action="opened",
+            sender={"login": "bench"}, head={"sha": "head", "ref": "feature"}, base={"sha": "base", "ref": "main"},
+        )
+        return lambda: pull_analyze_repo(payload)
+
+    if name == "push_scan":
+        from app.schemas.pushScan_model import PushScanPayload
+        from app.services.pushScan_service import ScanFiles
+
+        # Enough repository to hold N source files
+        paths = _source_paths(files * 2)[:files]
+        payload = PushScanPayload(repoId=1, repoName=f"{OWNER}/{synthetic.repo_name(files * 2)}", commitSha="head",
+                                  installationId=1, filesModified=paths)
+        return lambda: ScanFiles(payload)
+
+    if name in ("push_many", "push_batch"):
+        from app.schemas.pushScan_model import PushScanPayload
+        from app.services.pushScan_service import ScanFiles, ScanFilesBatch
+
+        paths = _source_paths(files * 2)[:files]
+        pushes = [
+            PushScanPayload(repoId=i + 1, repoName=f"{OWNER}/{synthetic.repo_name(files * 2)}", commitSha=f"head-{i}",
+                            installationId=i % PUSH_INSTALLATIONS + 1, filesModified=paths[start:start + PUSH_FILES])
+            for i, start in enumerate(range(0, len(paths), PUSH_FILES))
+        ]
+        if name == "push_batch":
+            return lambda: ScanFilesBatch(pushes)
+
+        async def run():
+            await asyncio.gather(*(ScanFiles(p) for p in pushes))
+        return run
+
+    if name == "impact":
+        from app.schemas.push_analyze import PushAnalyzeRequest
+        from app.services.impact_analyzer import seed_impact
+
+        payload = PushAnalyzeRequest(repoFullName=full_name, repoId=1, installationId=1, headCommitSha=f"head-{files}")
+        return lambda: seed_impact(payload)
+
+    if name == "insights":
+        import httpx
+        from app.main import app
+
+        body = _insights_request(files)
+
+        async def run():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+                resp = await client.post("/v2/api/analyze", json=body)
+                resp.raise_for_status()
+        return run
+
+    raise SystemExit(f"Unknown scenario {name!r}")
+
+
+def _insights_request(files: int) -> Dict[str, Any]:
+    priority = [
+        {"path": p, "riskScore": 50 + i % 50, "cyclomaticComplexity": 10 + i % 30, "maintainabilityIndex": 40.0,
+         "halsteadVolume": 900.0, "locTotal": 300 + i, "reason": "High complexity"}
+        for i, p in enumerate(_source_paths(files * 2)[:files])
+    ]
+    return {
+        "repoId": 1, "repoName": "bench", "branch": "main", "insightType": "all",
+        "result": {
+            "avgCyclomaticComplexity": 8.5, "avgMaintainabilityIndex": 55.0, "avgHalsteadVolume": 700.0,
+            "weightedCyclomaticComplexity": 9.1, "weightedMaintainabilityIndex": 52.0, "weightedHalsteadVolume": 750.0,
+            "technicalDebtScore": 37.0, "totalLOC": 120000, "totalFiles": files, "refactorPriorityFiles": priority,
+        },
+        "commitAnalysis": {
+            "totalCommits": 300, "daysActive": 400, "activeDays": 180, "activityRatio": 0.45, "avgCommitsPerDay": 0.75,
+            "recentCommits30Days": 40, "contributorCount": 40, "topContributorRatio": 0.2, "busFactor": "healthy",
+            "avgMessageLength": 42.0, "firstCommit": "2024-01-01", "lastCommit": "2025-02-01",
+            "velocity": {"trend": "stable", "consistency": 0.7},
+        },
+        "repoHealthScore": {
+            "overallHealthScore": 68.0, "healthRating": "good",
+            "componentScores": {"codeQuality": 60.0, "developmentActivity": 75.0, "busFactor": 5, "community": 50.0},
+            "strengths": ["Active development"], "weaknesses": ["Complex modules"],
+        },
+        "distributions": {"maintainabilityDistribution": [10, 20, 30], "complexityDistribution": [30, 20, 10]},
+    }
+
+
+def run_one(name: str, files: int, repeat: int, result_file: str) -> None:
+    from app.services import analysis_pool
+
+    run = _scenario(name, files)
+
+    async def main():
+        latencies = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            await run()
+            latencies.append(time.perf_counter() - started)
+        return latencies
+
+    latencies = asyncio.run(main())
+    workers = list((analysis_pool._executor._processes or {}).keys()) if analysis_pool._executor else []
+    result = {
+        "latencies": latencies,
+        "rssMiB": _peak_rss_mib(),
+        "workerRssMiB": max((_peak_rss_mib(str(pid)) for pid in workers), default=0.0),
+    }
+    analysis_pool.shutdown()
+    with open(result_file, "w") as f:
+        json.dump(result, f)
+
+
+# --- driver --------------------------------------------------------------------
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _child_env(mock_url: str, workdir: str, pem: str) -> Dict[str, str]:
+    return {
+        **os.environ,
+        "PORT": "0",
+        "EXPRESS_URL": f"{mock_url}/express",
+        "GITHUB_API_URL": f"{mock_url}/github/",
+        "GEMINI_API_BASE": f"{mock_url}/gemini",
+        "GITHUB_APP_ID": "1",
+        "GITHUB_PRIVATE_KEY": pem,
+        "GEMINI_API_KEY": "bench",
+        "GEMINI_API_KEY2": "bench",
+        "TOGETHER_API_KEY": "bench",
+        "CHECKPOINT_DIR": os.path.join(workdir, "checkpoints"),
+        "GITHUB_CACHE_DIR": os.path.join(workdir, "github-cache"),
+        "BLOCK_METRICS_PATH": os.path.join(workdir, "block-metrics.sqlite3"),
+        "REVIEWER_HISTORY_PATH": os.path.join(workdir, "reviewer-history.sqlite3"),
+        "BLOB_STORE_DIR": os.path.join(workdir, "blobs"),
+        "PATH_RULES_DIR": os.path.join(workdir, "path-rules"),
+        "TRACING_EXPORTER": "none",
+    }
+
+
+def _summarize(name: str, files: int, repeat: int, result: Dict[str, Any], stats: Dict[str, Any]) -> Dict[str, Any]:
+    latencies = result["latencies"]
+    p50 = statistics.median(latencies)
+    express = stats["express"]
+    return {
+        "scenario": name,
+        "files": files,
+        "runs": repeat,
+        "firstSeconds": latencies[0],
+        "p50Seconds": p50,
+        "p95Seconds": _percentile(latencies, 95),
+        "filesPerSecond": files / p50 if p50 else None,
+        "githubCallsPerRun": stats["githubTotal"] / repeat,
+        "githubCalls": stats["github"],
+        "rateLimited": stats["rateLimited"],
+        "expressRequestsPerRun": sum(e["requests"] for e in express.values()) / repeat,
+        "expressMiBPerRun": sum(e["bytes"] for e in express.values()) / repeat / 1024 ** 2,
+        "geminiCallsPerRun": stats["gemini"] / repeat,
+        "peakRssMiB": result["rssMiB"],
+        "peakWorkerRssMiB": result["workerRssMiB"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--files", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="write the results here as well")
+    parser.add_argument("--verbose", action="store_true", help="show the pipelines' own output")
+    parser.add_argument("--run-one", nargs=2, metavar=("SCENARIO", "FILES"), help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    mock_services.add_arguments(parser)
+    args = parser.parse_args()
+
+    if args.run_one:
+        run_one(args.run_one[0], int(args.run_one[1]), args.repeat, args.result_file)
+        return
+
+    port = _free_port()
+    mock_url = f"http://127.0.0.1:{port}"
+    mock_args = [
+        "--port", str(port), "--github-latency-ms", str(args.github_latency_ms),
+        "--rate-limit", str(args.rate_limit), "--rate-window", str(args.rate_window),
+        "--express-latency-ms", str(args.express_latency_ms), "--gemini-latency-ms", str(args.gemini_latency_ms),
+    ]
+    mock = subprocess.Popen([sys.executable, "-m", "benchmarks.mock_services", *mock_args])
+    output = None if args.verbose else subprocess.DEVNULL
+    results = []
+    try:
+        for _ in range(100):
+            try:
+                _request(f"{mock_url}/_stats")
+                break
+            except OSError:
+                time.sleep(0.1)
+        pem = _private_key_pem()
+
+        print(f"{'scenario':<10} {'files':>6} {'first s':>8} {'p50 s':>8} {'p95 s':>8} {'files/s':>9} "
+              f"{'GH/run':>8} {'429/403':>7} {'Exp MiB':>8} {'LLM':>5} {'RSS MiB':>8} {'wkr MiB':>8}")
+        for name in args.scenarios:
+            for files in args.files:
+                with tempfile.TemporaryDirectory(prefix="codehealth-bench-") as workdir:
+                    _request(f"{mock_url}/_reset", method="POST")
+                    result_file = os.path.join(workdir, "result.json")
+                    subprocess.run(
+                        [sys.executable, "-m", "benchmarks.pipelines", "--run-one", name, str(files),
+                         "--repeat", str(args.repeat), "--result-file", result_file],
+                        env=_child_env(mock_url, workdir, pem), stdout=output, stderr=output, check=True,
+                    )
+                    with open(result_file) as f:
+                        result = json.load(f)
+                summary = _summarize(name, files, args.repeat, result, _request(f"{mock_url}/_stats"))
+                results.append(summary)
+                print(
+                    f"{name:<10} {files:>6} {summary['firstSeconds']:>8.2f} {summary['p50Seconds']:>8.2f} "
+                    f"{summary['p95Seconds']:>8.2f} {summary['filesPerSecond']:>9.1f} "
+                    f"{summary['githubCallsPerRun']:>8.0f} {summary['rateLimited']:>7} "
+                    f"{summary['expressMiBPerRun']:>8.2f} {summary['geminiCallsPerRun']:>5.0f} "
+                    f"{summary['peakRssMiB']:>8.0f} {summary['peakWorkerRssMiB']:>8.0f}",
+                    flush=True,
+                )
+    finally:
+        mock.terminate()
+        mock.wait()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Deterministic synthetic repositories for the pipeline benchmarks.
+
+A repository is described entirely by its name, `files-<count>[-seed-<n>]`, so
+the mock GitHub server and the benchmark runner agree on its contents without
+sharing state. File contents are generated on demand from the path.
+"""
+import hashlib
+import random
+import re
+from functools import lru_cache
+from typing import Dict, List
+
+_NAME = re.compile(r"^files-(\d+)(?:-seed-(\d+))?$")
+
+# Extension mix of a typical service repository; non-source files are listed
+# in the tree too, so the client-side extension filter is exercised
+_EXTENSIONS = [(".py", 55), (".js", 10), (".ts", 10), (".tsx", 5), (".md", 8), (".json", 7), (".yml", 5)]
+_DIRS = ["app", "app/api", "app/models", "app/services", "lib", "src", "src/components", "tests", "scripts", "docs"]
+
+COMMITS_PER_REPO = 300
+CONTRIBUTORS_PER_REPO = 40
+
+
+def repo_name(files: int, seed: int = 0) -> str:
+    return f"files-{files}" + (f"-seed-{seed}" if seed else "")
+
+
+def parse_repo_name(name: str):
+    match = _NAME.match(name)
+    if match is None:
+        return None
+    return int(match.group(1)), int(match.group(2) or 0)
+
+
+def _rng(*parts) -> random.Random:
+    return random.Random(hashlib.sha1(":".join(map(str, parts)).encode()).digest())
+
+
+@lru_cache(maxsize=8)
+def file_paths(files: int, seed: int = 0) -> List[str]:
+    rng = _rng("tree", files, seed)
+    extensions = [ext for ext, _ in _EXTENSIONS]
+    weights = [w for _, w in _EXTENSIONS]
+    paths = []
+    for i in range(files):
+        directory = rng.choice(_DIRS)
+        depth = rng.randint(0, 2)
+        subdirs = "".join(f"/pkg{rng.randint(0, 30)}" for _ in range(depth))
+        paths.append(f"{directory}{subdirs}/module_{i}{rng.choices(extensions, weights)[0]}")
+    return paths
+
+
+def file_size(path: str, seed: int = 0) -> int:
+    """Target size in bytes: mostly 1-8 KiB, with a long tail up to ~200 KiB"""
+    rng = _rng("size", path, seed)
+    if rng.random() < 0.02:
+        return rng.randint(50_000, 200_000)
+    return int(rng.lognormvariate(8.2, 0.7))
+
+
+def _python_source(rng: random.Random, size: int) -> str:
+    parts = ['"""Generated module."""', "import os", "from typing import Any, Dict, List", ""]
+    total = 0
+    n = 0
+    while total < size:
+        n += 1
+        if rng.random() < 0.3:
+            body = [
+                f"class Service{n}:",
+                f"    def __init__(self, limit: int = {rng.randint(1, 100)}):",
+                "        self.limit = limit",
+                "        self.items: List[Any] = []",
+                "",
+                "    def add(self, item):",
+                "        if len(self.items) >= self.limit:",
+                "            raise ValueError('full')",
+                "        self.items.append(item)",
+                "",
+            ]
+        else:
+            branches = rng.randint(1, 8)
+            body = [f"def handler_{n}(request: Dict[str, Any], retries: int = 3) -> Dict[str, Any]:"]
+            body.append("    result = {}")
+            for b in range(branches):
+                keyword = "if" if b == 0 else "elif"
+                body.append(f"    {keyword} request.get('kind') == 'k{b}' and retries > {b}:")
+                body.append(f"        result['value'] = [x * {b} for x in range(retries) if x % 2]")
+            body.append("    for key, value in request.items():")
+            body.append("        try:")
+            body.append("            result[key] = os.path.join(str(value), key)")
+            body.append("        except TypeError:")
+            body.append("            continue")
+            body.append("    return result")
+            body.append("")
+        text = "\n".join(body) + "\n"
+        parts.append(text)
+        total += len(text)
+    return "\n".join(parts)
+
+
+def _js_source(rng: random.Random, size: int) -> str:
+    parts = ["import { useState } from 'react';", ""]
+    total = 0
+    n = 0
+    while total < size:
+        n += 1
+        branches = rng.randint(1, 6)
+        lines = [f"export function handler{n}(req, res) {{", "  let total = 0;"]
+        for b in range(branches):
+            lines.append(f"  if (req.kind === 'k{b}' && req.retries > {b}) {{ total += {b}; }}")
+        lines += [
+            "  for (const item of req.items || []) {",
+            "    total += item.price ? item.price : 0;",
+            "  }",
+            "  return res.json({ total });",
+            "}",
+            "",
+        ]
+        text = "\n".join(lines)
+        parts.append(text)
+        total += len(text)
+    return "\n".join(parts)
+
+
+def file_content(path: str, seed: int = 0) -> str:
+    rng = _rng("content", path, seed)
+    size = file_size(path, seed)
+    if path.endswith(".py"):
+        return _python_source(rng, size)
+    if path.endswith((".js", ".ts", ".tsx", ".jsx")):
+        return _js_source(rng, size)
+    return ("lorem ipsum dolor sit amet\n" * (size // 27 + 1))[:size]
+
+
+def blob_sha(path: str, seed: int = 0) -> str:
+    return hashlib.sha1(f"{seed}:{path}".encode()).hexdigest()
+
+
+def pr_file(path: str, seed: int = 0) -> Dict:
+    """A pull request file entry with a small synthetic patch"""
+    rng = _rng("pr", path, seed)
+    added = rng.randint(1, 80)
+    removed = rng.randint(0, 30)
+    lines = [f"@@ -1,{removed + 3} +1,{added + 3} @@", " import os", " import sys", " "]
+    lines += [f"-old_value_{i} = compute({i})" for i in range(removed)]
+    lines += [f"+new_value_{i} = compute({i}, retries=3)" for i in range(added)]
+    return {
+        "sha": blob_sha(path, seed),
+        "filename": path,
+        "status": rng.choice(["modified", "modified", "modified", "added"]),
+        "additions": added,
+        "deletions": removed,
+        "changes": added + removed,
+        "patch": "\n".join(lines),
+    }
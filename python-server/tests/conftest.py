@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Settings are read at import; the required ones get throwaway values so app modules import
+os.environ.setdefault("PORT", "0")
+os.environ.setdefault("EXPRESS_URL", "http://express.invalid")
+os.environ.setdefault("TRACING_EXPORTER", "none")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
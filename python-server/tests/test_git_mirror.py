@@ -0,0 +1,200 @@
+"""GitMirror against a local bare repository standing in for GitHub"""
+import asyncio
+import os
+import subprocess
+
+import pytest
+
+from app.core.config import settings
+from app.services import git_mirror
+from app.services.git_mirror import mirror_for, synced_mirror
+
+OWNER, REPO = "octo", "widgets"
+
+
+def _git(cwd, *args, date="2024-03-01T12:00:00+02:00"):
+    env = {
+        **os.environ,
+        "GIT_AUTHOR_NAME": "Ada", "GIT_AUTHOR_EMAIL": "ada@example.com", "GIT_AUTHOR_DATE": date,
+        "GIT_COMMITTER_NAME": "Bob", "GIT_COMMITTER_EMAIL": "bob@example.com", "GIT_COMMITTER_DATE": date,
+    }
+    return subprocess.run(["git", *args], cwd=cwd, env=env, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def _write(work, path, content):
+    full = os.path.join(work, path)
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, "w") as f:
+        f.write(content)
+
+
+class Upstream:
+    """A bare "GitHub" repository and a working clone to push to it from"""
+
+    def __init__(self, root):
+        self.bare = os.path.join(root, "remote", OWNER, f"{REPO}.git")
+        self.work = os.path.join(root, "work")
+        os.makedirs(self.bare)
+        _git(self.bare, "init", "--bare", "-b", "main")
+        _git(root, "clone", self.bare, self.work)
+        _git(self.work, "checkout", "-b", "main")
+
+    def commit(self, files, message, removed=(), date="2024-03-01T12:00:00+02:00"):
+        for path, content in files.items():
+            _write(self.work, path, content)
+        for path in removed:
+            _git(self.work, "rm", "-q", path)
+        _git(self.work, "add", "-A")
+        _git(self.work, "commit", "-q", "-m", message, date=date)
+        _git(self.work, "push", "-q", "origin", "main")
+        return _git(self.work, "rev-parse", "HEAD")
+
+
+@pytest.fixture
+def upstream(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "GIT_MIRROR_ENABLED", True)
+    monkeypatch.setattr(settings, "GIT_MIRROR_DIR", str(tmp_path / "mirrors"))
+    monkeypatch.setattr(settings, "GIT_MIRROR_REMOTE", str(tmp_path / "remote" / "{owner}" / "{repo}.git"))
+    monkeypatch.setattr(settings, "GIT_MIRROR_FETCH_INTERVAL", 3600.0)
+    monkeypatch.setattr(git_mirror, "_mirrors", {})
+    return Upstream(str(tmp_path))
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def history(upstream):
+    first = upstream.commit({"app/main.py": "print('hi')\n", "README.md": "# widgets\n", "old.js": "a\nb\nc\n"},
+                           "Initial commit")
+    second = upstream.commit(
+        {"app/main.py": "print('hi')\nprint('there')\n", "lib/util.ts": "export const x = 1;\n"},
+        "Add util\n\nLonger explanation\nover two lines.", removed=["old.js"], date="2024-03-02T08:30:00-05:00",
+    )
+    return upstream, first, second
+
+
+def test_tree_lists_analyzable_blobs(history):
+    upstream, _, second = history
+    mirror = _run(synced_mirror(OWNER, REPO, "", "main"))
+    tree = _run(mirror.tree("main", (".py", ".ts", ".js")))
+
+    assert tree["sha"] == _git(upstream.work, "rev-parse", "HEAD^{tree}")
+    files = {f["path"]: f for f in tree["files"]}
+    assert set(files) == {"app/main.py", "lib/util.ts"}
+    assert files["app/main.py"]["size"] == len("print('hi')\nprint('there')\n")
+    assert files["app/main.py"]["sha"] == _git(upstream.work, "rev-parse", "HEAD:app/main.py")
+
+
+def test_blobs_read_by_sha(history):
+    upstream, _, _ = history
+    mirror = _run(synced_mirror(OWNER, REPO, "", "main"))
+    sha = _git(upstream.work, "rev-parse", "HEAD:lib/util.ts")
+
+    found = _run(mirror.blobs([{"sha": sha}, {"sha": "0" * 40}, {"sha": "not-hex"}]))
+    assert found == {sha: b"export const x = 1;\n"}
+
+
+def test_commits_log_with_full_messages_and_utc_dates(history):
+    _, first, second = history
+    mirror = _run(synced_mirror(OWNER, REPO, "", "HEAD"))
+    commits = _run(mirror.commits())
+
+    assert [c["sha"] for c in commits] == [second, first]
+    assert commits[0]["message"] == "Add util\n\nLonger explanation\nover two lines."
+    assert commits[0]["author"] == {"name": "Ada", "email": "ada@example.com", "date": "2024-03-02T13:30:00Z"}
+    assert commits[1]["committer"] == {"name": "Bob", "date": "2024-03-01T10:00:00Z"}
+
+
+def test_commits_numstat(history):
+    mirror = _run(synced_mirror(OWNER, REPO, "", "HEAD"))
+    latest = _run(mirror.commits(with_stats=True))[0]
+
+    files = {f["filename"]: (f["additions"], f["deletions"]) for f in latest["files"]}
+    assert files == {"app/main.py": (1, 0), "lib/util.ts": (1, 0), "old.js": (0, 3)}
+    assert latest["stats"] == {"additions": 2, "deletions": 3, "total": 5}
+
+
+def test_compare_matches_github_shape(history):
+    upstream, first, second = history
+    third = upstream.commit({"lib/renamed.ts": "export const x = 1;\n"}, "Rename util\n\nBody", removed=["lib/util.ts"])
+    mirror = _run(synced_mirror(OWNER, REPO, "", first, third))
+    result = _run(mirror.compare(first, third))
+
+    assert result["status"] == "ahead"
+    assert (result["ahead_by"], result["behind_by"], result["total_commits"]) == (2, 0, 2)
+    assert result["merge_base_commit"]["sha"] == first
+    assert [(c["sha"], c["commit"]["message"]) for c in result["commits"]] == [
+        (second, "Add util\n\nLonger explanation\nover two lines."),
+        (third, "Rename util\n\nBody"),
+    ]
+    files = {f["filename"]: f for f in result["files"]}
+    assert files["app/main.py"]["status"] == "modified"
+    assert (files["app/main.py"]["additions"], files["app/main.py"]["deletions"]) == (1, 0)
+    assert files["app/main.py"]["patch"].startswith("@@ -1 +1,2 @@")
+    assert files["old.js"]["status"] == "removed"
+    assert files["old.js"]["deletions"] == 3
+    # util.ts was added and renamed within the range, so GitHub lists only the new path
+    assert files["lib/renamed.ts"]["status"] == "added"
+    assert "lib/util.ts" not in files
+
+
+def test_compare_reports_renames(history):
+    upstream, _, second = history
+    third = upstream.commit({"app/entry.py": "print('hi')\nprint('there')\n"}, "Move main", removed=["app/main.py"])
+    mirror = _run(synced_mirror(OWNER, REPO, "", second, third))
+    files = _run(mirror.compare(second, third))["files"]
+
+    assert files == [{
+        "filename": "app/entry.py", "status": "renamed", "additions": 0, "deletions": 0, "changes": 0,
+        "previous_filename": "app/main.py",
+    }]
+
+
+def test_branch_reads_fetch_past_the_interval(history):
+    upstream, _, second = history
+    assert _run(synced_mirror(OWNER, REPO, "", "main")) is not None
+    third = upstream.commit({"app/new.py": "x = 1\n"}, "Another push")
+
+    # Within GIT_MIRROR_FETCH_INTERVAL, but "main" has moved: it must not resolve to the old head
+    mirror = _run(synced_mirror(OWNER, REPO, "", "main"))
+    assert "app/new.py" in {f["path"] for f in _run(mirror.tree("main", (".py",)))["files"]}
+    assert _run(mirror.commits())[0]["sha"] == third
+
+
+def test_sha_reads_use_the_mirror_until_the_commit_is_missing(history):
+    upstream, first, second = history
+    mirror = mirror_for(OWNER, REPO)
+    _run(synced_mirror(OWNER, REPO, "", second))
+    synced_at = mirror._synced_at
+
+    # Known SHAs, and expressions anchored at them, don't fetch again
+    _run(synced_mirror(OWNER, REPO, "", first, f"{second}~1"))
+    assert mirror._synced_at == synced_at
+
+    third = upstream.commit({"app/new.py": "x = 1\n"}, "Another push")
+    _run(synced_mirror(OWNER, REPO, "", third))
+    assert mirror._synced_at > synced_at
+    assert _run(mirror.has_commit(third))
+
+
+def test_token_stays_out_of_the_mirror_config(history):
+    mirror = _run(synced_mirror(OWNER, REPO, "ghs_secret", "main"))
+    with open(os.path.join(mirror.path, "config")) as f:
+        assert "ghs_secret" not in f.read()
+
+
+def test_merge_base_of_diverged_branches(history):
+    upstream, _, second = history
+    _git(upstream.work, "checkout", "-q", "-b", "feature")
+    _write(upstream.work, "app/feature.py", "y = 2\n")
+    _git(upstream.work, "add", "-A")
+    _git(upstream.work, "commit", "-q", "-m", "Feature")
+    feature = _git(upstream.work, "rev-parse", "HEAD")
+    _git(upstream.work, "push", "-q", "origin", "feature")
+    _git(upstream.work, "checkout", "-q", "main")
+    main = upstream.commit({"app/main.py": "print('moved on')\n"}, "Main moves on")
+
+    mirror = _run(synced_mirror(OWNER, REPO, "", main, feature))
+    assert _run(mirror.merge_base(main, feature)) == second
@@ -0,0 +1,47 @@
+"""AuthorHistory persistence and author identities"""
+import sqlite3
+
+from app.schemas.push_analyze import CommitItem
+from app.services.reviewers import AuthorHistory
+
+REPO = "Octo/Widgets"
+
+
+def _commit(sha, login=None, name=None, added=(), modified=(), removed=()):
+    return CommitItem(id=sha, author=login or name, authorLogin=login,
+                      added=list(added), modified=list(modified), removed=list(removed))
+
+
+def test_history_survives_a_restart(tmp_path):
+    path = str(tmp_path / "history.sqlite3")
+    history = AuthorHistory(path, max_files=100, per_file=5)
+    history.record(REPO, [_commit("a", "ada", added=["app.py"]), _commit("b", "bob", modified=["app.py"])])
+
+    restarted = AuthorHistory(path, max_files=100, per_file=5)
+    assert restarted.recent_authors("octo/widgets", "app.py") == {"bob": 1.0, "ada": 0.8}
+
+
+def test_only_usernames_are_recorded(tmp_path):
+    history = AuthorHistory(str(tmp_path / "history.sqlite3"), max_files=100, per_file=5)
+    history.record(REPO, [_commit("a", name="Ada Lovelace", added=["app.py"]), _commit("b", "bob", added=["app.py"])])
+    assert history.recent_authors(REPO, "app.py") == {"bob": 1.0}
+
+
+def test_removed_and_oldest_paths_are_dropped_from_the_store(tmp_path):
+    path = str(tmp_path / "history.sqlite3")
+    history = AuthorHistory(path, max_files=2, per_file=5)
+    history.record(REPO, [_commit("a", "ada", added=["a.py", "b.py"])])
+    history.record(REPO, [_commit("b", "ada", added=["c.py"], removed=["b.py"])])
+    history.record(REPO, [_commit("c", "ada", added=["d.py"])])
+
+    with sqlite3.connect(path) as con:
+        assert sorted(p for (p,) in con.execute("SELECT path FROM authors")) == ["c.py", "d.py"]
+    restarted = AuthorHistory(path, max_files=2, per_file=5)
+    assert restarted.recent_authors(REPO, "a.py") == {}
+    assert restarted.recent_authors(REPO, "d.py") == {"ada": 1.0}
+
+
+def test_memory_only_without_a_path():
+    history = AuthorHistory("", max_files=10, per_file=5)
+    history.record(REPO, [_commit("a", "ada", added=["app.py"])])
+    assert history.recent_authors(REPO, "app.py") == {"ada": 1.0}